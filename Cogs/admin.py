@@ -1,23 +1,32 @@
 
 import discord
+import asyncio
 import os
 import datetime
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
-import numpy as np
 import io
 from discord.ext import commands
-from Cogs.utils.mongo import Users, Servers, ProfitData, ServerProfit
+from Cogs.utils.mongo import Users, Servers, ProfitData, ServerProfit, guild_settings, blacklist, transfers, ledger
 from Cogs.utils.emojis import emoji
+from Cogs.utils.lazy_imports import lazy_import, import_profile
+
+
+def _setup_pyplot(pyplot):
+    # Set default matplotlib style
+    pyplot.style.use('dark_background')
+
+
+# matplotlib is only needed for the profit graphs, import it on first use
+plt = lazy_import("matplotlib.pyplot", on_load=_setup_pyplot)
+mdates = lazy_import("matplotlib.dates")
+np = lazy_import("numpy")
 
 class AdminCommands(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.admin_ids = self.load_admin_ids()
-        self.blacklisted_ids = self.load_blacklisted_ids()
-        
-        # Set default matplotlib style
-        plt.style.use('dark_background')
+        # Shared with every bot process through Mongo
+        self.blacklisted_ids = blacklist
+        self.migrate_blacklist_file()
         
         # Add command check for blacklisted users
         self.bot.add_check(self.check_blacklist)
@@ -49,8 +58,10 @@ class AdminCommands(commands.Cog):
             print(f"Error loading admin IDs: {e}")
         return admin_ids
         
-    def load_blacklisted_ids(self):
-        """Load blacklisted IDs from blacklist.txt file"""
+    def migrate_blacklist_file(self):
+        """Move IDs from the old blacklist.txt into the shared blacklist, once"""
+        if not os.path.exists("blacklist.txt"):
+            return
         blacklisted_ids = []
         try:
             with open("blacklist.txt", "r") as f:
@@ -58,20 +69,11 @@ class AdminCommands(commands.Cog):
                     line = line.strip()
                     if line and line.isdigit():
                         blacklisted_ids.append(int(line))
+            if blacklisted_ids:
+                blacklist.import_ids(blacklisted_ids)
+                os.replace("blacklist.txt", "blacklist.txt.migrated")
         except Exception as e:
-            print(f"Error loading blacklisted IDs: {e}")
-        return blacklisted_ids
-        
-    def save_blacklisted_ids(self):
-        """Save blacklisted IDs to blacklist.txt file"""
-        try:
-            with open("blacklist.txt", "w") as f:
-                for user_id in self.blacklisted_ids:
-                    f.write(f"{user_id}\n")
-            return True
-        except Exception as e:
-            print(f"Error saving blacklisted IDs: {e}")
-            return False
+            print(f"Error migrating blacklisted IDs: {e}")
     
     def is_admin(self, user_id):
         """Check if a user ID is in the admin list"""
@@ -110,18 +112,8 @@ class AdminCommands(commands.Cog):
         # Get current balance and primary coin
         current_points = user_data.get("points", 0)
         primary_coin = user_data.get("primary_coin", "BTC")
-        
-        # Update user balance (add or subtract based on amount sign)
-        new_balance = current_points + amount
-        
-        # Prevent negative balance
-        if new_balance < 0:
-            new_balance = 0
-            
-        # Update points balance
-        db.update_balance(user.id, new_balance, "points", "$set")
-        
-        # Also update the wallet for the primary coin
+
+        # Keep the primary coin's wallet in step with the points
         crypto_values = {
             "BTC": 0.00000024,   # 1 point = 0.00000024 btc
             "LTC": 0.00023,      # 1 point = 0.00023 ltc
@@ -129,16 +121,51 @@ class AdminCommands(commands.Cog):
             "USDT": 0.0212,      # 1 point = 0.0212 usdt
             "SOL": 0.0001442     # 1 point = 0.0001442 sol
         }
-        
-        # Calculate crypto amount for wallet update
-        crypto_amount = new_balance * crypto_values[primary_coin]
-        
-        # Update wallet
-        db.collection.update_one(
-            {"discord_id": user.id},
-            {"$set": {f"wallet.{primary_coin}": crypto_amount}}
-        )
-        
+
+        history_entry = {
+            "type": "admin_add",
+            "amount": amount,
+            "currency": "points",
+            "admin_id": ctx.author.id
+        }
+
+        if amount >= 0:
+            # Credit from the house, nothing to debit
+            _, error = await asyncio.to_thread(
+                transfers.transfer, "admin_add",
+                to_id=user.id,
+                credit={"points": amount, f"wallet.{primary_coin}": amount * crypto_values[primary_coin]},
+                history=(None, history_entry)
+            )
+            if error == "missing":
+                embed = discord.Embed(
+                    title="<:no:1344252518305234987> | User Not Found",
+                    description=f"{user.mention} doesn't have an account.",
+                    color=0xFF0000
+                )
+                return await ctx.reply(embed=embed)
+        else:
+            # Never take more than the user has
+            removed = min(-amount, current_points)
+            _, error = await asyncio.to_thread(
+                transfers.transfer, "admin_add",
+                from_id=user.id,
+                debit={"points": removed},
+                history=(history_entry, None)
+            )
+            if error == "insufficient":
+                embed = discord.Embed(
+                    title="<:no:1344252518305234987> | Balance Changed",
+                    description=f"{user.mention}'s balance changed while removing points. Please try again.",
+                    color=0xFF0000
+                )
+                return await ctx.reply(embed=embed)
+            db.collection.update_one(
+                {"discord_id": user.id},
+                {"$inc": {f"wallet.{primary_coin}": -removed * crypto_values[primary_coin]}}
+            )
+        new_balance = max(current_points + amount, 0)
+
         # Create response embed
         action = "added to" if amount > 0 else "removed from"
         embed = discord.Embed(
@@ -147,21 +174,101 @@ class AdminCommands(commands.Cog):
             color=0x00FF00 if amount > 0 else 0xFF9900
         )
         await ctx.reply(embed=embed)
-        
-        # Add to history
-        history_entry = {
-            "type": "admin_add",
-            "amount": amount,
-            "currency": "points",
-            "timestamp": int(discord.utils.utcnow().timestamp()),
-            "admin_id": ctx.author.id
-        }
-        
-        db.collection.update_one(
-            {"discord_id": user.id},
-            {"$push": {"history": {"$each": [history_entry], "$slice": -100}}}  # Keep last 100 entries
+
+    @commands.command(name="audit")
+    async def audit(self, ctx, user: discord.User = None):
+        """Recompute a user's points from the ledger (Admin only)
+
+        Usage: !audit @user
+        """
+        if not self.is_admin(ctx.author.id):
+            embed = discord.Embed(
+                title="<:no:1344252518305234987> | Access Denied",
+                description="This command is restricted to administrators only.",
+                color=0xFF0000
+            )
+            return await ctx.reply(embed=embed)
+        if user is None:
+            embed = discord.Embed(
+                title="<:no:1344252518305234987> | Invalid Usage",
+                description="`!audit @user`",
+                color=0xFF0000
+            )
+            return await ctx.reply(embed=embed)
+
+        await asyncio.to_thread(ledger.flush)
+        result = await asyncio.to_thread(ledger.audit, user.id)
+        balanced = abs(result["drift"]) < 0.01
+        embed = discord.Embed(
+            title=f"{'<:yes:1355501647538815106>' if balanced else '<:no:1344252518305234987>'} | Ledger Audit: {user.name}",
+            color=0x00FFAE if balanced else 0xFF0000
         )
-        
+        embed.add_field(name="Balance", value=f"{result['balance']:,.2f} points", inline=True)
+        embed.add_field(name="Ledger", value=f"{result['ledger_balance']:,.2f} points", inline=True)
+        embed.add_field(name="Drift", value=f"{result['drift']:,.2f} points", inline=True)
+        embed.add_field(
+            name="Entries",
+            value=f"{result['entries']:,} ({result['uncompacted_entries']:,} since the last compaction)",
+            inline=False
+        )
+        if not balanced:
+            embed.add_field(name="Fix", value=f"`!ledger reconcile {user.id}` records the drift as an adjustment", inline=False)
+        embed.set_footer(text="BetSync Casino")
+        await ctx.reply(embed=embed)
+
+    @commands.command(name="ledger")
+    async def ledger_command(self, ctx, action: str = None, target: str = None):
+        """Ledger maintenance (Admin only)
+
+        Usage: !ledger compact
+               !ledger reconcile <user_id|all>
+        """
+        if not self.is_admin(ctx.author.id):
+            embed = discord.Embed(
+                title="<:no:1344252518305234987> | Access Denied",
+                description="This command is restricted to administrators only.",
+                color=0xFF0000
+            )
+            return await ctx.reply(embed=embed)
+
+        if action == "compact":
+            await asyncio.to_thread(ledger.flush)
+            compacted = await asyncio.to_thread(ledger.compact)
+            embed = discord.Embed(
+                title="<:yes:1355501647538815106> | Ledger Compacted",
+                description=f"Updated the snapshots of {compacted:,} users.",
+                color=0x00FFAE
+            )
+            return await ctx.reply(embed=embed)
+
+        if action == "reconcile" and target == "all":
+            checked, adjusted = await asyncio.to_thread(ledger.reconcile_all)
+            embed = discord.Embed(
+                title="<:yes:1355501647538815106> | Ledger Reconciled",
+                description=f"Checked {checked:,} users, recorded adjustments for {adjusted:,}.",
+                color=0x00FFAE
+            )
+            return await ctx.reply(embed=embed)
+
+        if action == "reconcile" and target and target.strip("<@!>").isdigit():
+            user_id = int(target.strip("<@!>"))
+            drift = await asyncio.to_thread(ledger.reconcile, user_id)
+            embed = discord.Embed(
+                title="<:yes:1355501647538815106> | Ledger Reconciled",
+                description=f"Recorded an adjustment of {drift:,.2f} points for <@{user_id}>." if drift else f"<@{user_id}> was already in balance.",
+                color=0x00FFAE
+            )
+            return await ctx.reply(embed=embed)
+
+        embed = discord.Embed(
+            title="<:no:1344252518305234987> | Invalid Usage",
+            description="`!ledger compact` - fold old entries into the balance snapshots\n"
+                      "`!ledger reconcile <user_id>` - record a user's drift as an adjustment\n"
+                      "`!ledger reconcile all` - reconcile every user, also opens balances from before the ledger",
+            color=0xFF0000
+        )
+        await ctx.reply(embed=embed)
+
     @commands.command(name="addadmin")
     async def addadmin(self, ctx, user: discord.Member = None):
         """Add a user as a server admin in the database (Bot Admin only)
@@ -221,6 +328,7 @@ class AdminCommands(commands.Cog):
             {"server_id": ctx.guild.id},
             {"$set": {"server_admins": server_admins}}
         )
+        guild_settings.invalidate(ctx.guild.id)
         
         # Send confirmation message
         embed = discord.Embed(
@@ -353,6 +461,7 @@ class AdminCommands(commands.Cog):
             {"server_id": ctx.guild.id},
             {"$set": {"server_admins": server_admins}}
         )
+        guild_settings.invalidate(ctx.guild.id)
         
         # Send confirmation message
         embed = discord.Embed(
@@ -414,7 +523,8 @@ class AdminCommands(commands.Cog):
                 if admin:
                     admin_list.append(f"{admin.mention} (`{admin.id}`)")
                 else:
-                    admin_list.append(f"Unknown User (`{admin_id}`)")
+                    # Members aren't all cached, a mention still renders
+                    admin_list.append(f"<@{admin_id}> (`{admin_id}`)")
             
             embed.add_field(
                 name=f"Admins ({len(server_admins)})",
@@ -630,11 +740,8 @@ class AdminCommands(commands.Cog):
             )
             return await ctx.reply(embed=embed)
         
-        # Add user to blacklisted_ids
-        self.blacklisted_ids.append(user.id)
-        
-        # Save to blacklist.txt
-        success = self.save_blacklisted_ids()
+        # Add user to the shared blacklist
+        success = self.blacklisted_ids.add(user.id)
         
         if not success:
             embed = discord.Embed(
@@ -693,11 +800,8 @@ class AdminCommands(commands.Cog):
             )
             return await ctx.reply(embed=embed)
         
-        # Remove user from blacklisted_ids
-        self.blacklisted_ids.remove(user.id)
-        
-        # Save to blacklist.txt
-        success = self.save_blacklisted_ids()
+        # Remove user from the shared blacklist
+        success = self.blacklisted_ids.remove(user.id)
         
         if not success:
             embed = discord.Embed(
@@ -770,126 +874,47 @@ class AdminCommands(commands.Cog):
         
     async def generate_profit_graph(self, view_type="daily"):
         """Generate a profit graph based on the time frame"""
-        # Get profit data from MongoDB
+        # Profit rollups from MongoDB, in points
         profit_db = ProfitData()
-        profit_data = profit_db.get_profit_data()
-        
-        if not profit_data:
-            raise ValueError("No profit data available")
-        
+
         # Prepare data based on view type
         dates = []
         profits = []
         cumulative_profits = []
         total_profit = 0
-        
+
         # Set time frame data
         if view_type == "daily":
-            # Get last 30 days
+            # Last 30 days, days without bets count as zero
+            daily = await asyncio.to_thread(profit_db.daily_profit, 30)
             end_date = datetime.datetime.now().date()
-            start_date = end_date - datetime.timedelta(days=30)
-            
-            # Create a date range for the last 30 days
-            date_range = {}
-            current_date = start_date
-            while current_date <= end_date:
-                date_range[current_date] = 0
-                current_date += datetime.timedelta(days=1)
-            
-            # Fill in available data
-            for item in profit_data:
-                date_str = item.get("date")
-                # Convert string date to datetime.date if needed
-                if isinstance(date_str, str):
-                    try:
-                        date = datetime.datetime.strptime(date_str, "%Y-%m-%d").date()
-                    except ValueError:
-                        continue
-                elif isinstance(date_str, datetime.date):
-                    date = date_str
-                else:
-                    continue
-                
-                if start_date <= date <= end_date:
-                    date_range[date] = item.get("total_profit", 0)
-            
-            # Convert to lists
-            for date, profit in sorted(date_range.items()):
-                dates.append(date)
-                profits.append(profit * 0.0212)  # Convert tokens to USD (1 token = 0.0212$)
-                total_profit += profit
-                cumulative_profits.append(total_profit * 0.0212)  # Convert tokens to USD
-            
+            series = []
+            if daily:
+                for offset in range(30, -1, -1):
+                    date = end_date - datetime.timedelta(days=offset)
+                    series.append((date, daily.get(date, 0)))
             x_label = "Day"
             title = "Daily Profit (Last 30 Days)"
-            
+
         elif view_type == "monthly":
-            # Group by month
-            monthly_data = {}
-            
-            for item in profit_data:
-                date_str = item.get("date")
-                # Convert string date to datetime.date if needed
-                if isinstance(date_str, str):
-                    try:
-                        date = datetime.datetime.strptime(date_str, "%Y-%m-%d").date()
-                    except ValueError:
-                        continue
-                elif isinstance(date_str, datetime.date):
-                    date = date_str
-                else:
-                    continue
-                
-                # Create a key for year-month
-                month_key = datetime.date(date.year, date.month, 1)
-                    
-                if month_key not in monthly_data:
-                    monthly_data[month_key] = 0
-                    
-                monthly_data[month_key] += item.get("total_profit", 0)
-            
-            # Sort by date and convert to lists
-            for date, profit in sorted(monthly_data.items()):
-                dates.append(date)
-                profits.append(profit * 0.0212)  # Convert tokens to USD
-                total_profit += profit
-                cumulative_profits.append(total_profit * 0.0212)  # Convert tokens to USD
-            
+            series = await asyncio.to_thread(profit_db.monthly_profit, 12)
             x_label = "Month"
             title = "Monthly Profit"
-            
+
         else:  # all_time
-            # Group by date (keep all records, but ensure they're sorted)
-            all_data = {}
-            
-            for item in profit_data:
-                date_str = item.get("date")
-                # Convert string date to datetime.date if needed
-                if isinstance(date_str, str):
-                    try:
-                        date = datetime.datetime.strptime(date_str, "%Y-%m-%d").date()
-                    except ValueError:
-                        continue
-                elif isinstance(date_str, datetime.date):
-                    date = date_str
-                else:
-                    continue
-                
-                if date not in all_data:
-                    all_data[date] = 0
-                    
-                    all_data[date] += item.get("total_profit", 0)
-            
-            # Sort by date and convert to lists
-            for date, profit in sorted(all_data.items()):
-                dates.append(date)
-                profits.append(profit * 0.0212)  # Convert tokens to USD
-                total_profit += profit
-                cumulative_profits.append(total_profit * 0.0212)  # Convert tokens to USD
-            
-            x_label = "Date"
+            series = await asyncio.to_thread(profit_db.monthly_profit)
+            x_label = "Month"
             title = "All-Time Profit"
-        
+
+        if not series:
+            raise ValueError("No profit data available")
+
+        for date, profit in series:
+            dates.append(date)
+            profits.append(profit * 0.0212)  # Convert points to USD (1 point = 0.0212$)
+            total_profit += profit
+            cumulative_profits.append(total_profit * 0.0212)  # Convert points to USD
+
         # Create the plot with a modern gray background
         fig, ax = plt.subplots(figsize=(12, 6), dpi=100)
         fig.patch.set_facecolor('#2B2D31')  # Modern dark gray for outer background
@@ -934,7 +959,7 @@ class AdminCommands(commands.Cog):
                 ax.xaxis.set_major_formatter(mdates.DateFormatter('%b %Y'))
             else:
                 ax.xaxis.set_major_locator(mdates.AutoDateLocator())
-                ax.xaxis.set_major_formatter(mdates.DateFormatter('%d %b'))
+                ax.xaxis.set_major_formatter(mdates.DateFormatter('%b %Y'))
                 
             # Customize grid
             ax.grid(True, linestyle='--', alpha=0.3, zorder=1)
@@ -1276,6 +1301,33 @@ class AdminCommands(commands.Cog):
             )
             await ctx.reply(embed=error_embed)
             
+    @commands.command(name="importprofile", aliases=["imports"])
+    async def importprofile(self, ctx):
+        """Show which heavy dependencies have been imported and how long they took (Admin only)
+
+        Usage: !importprofile
+        """
+        if not self.is_admin(ctx.author.id):
+            embed = discord.Embed(
+                title="<:no:1344252518305234987> | Access Denied",
+                description="This command is restricted to administrators only.",
+                color=0xFF0000
+            )
+            return await ctx.reply(embed=embed)
+
+        lines = []
+        for name, seconds in import_profile():
+            timing = "deferred" if seconds is None else f"{seconds * 1000:.1f} ms"
+            lines.append(f"{name:<28} {timing}")
+
+        embed = discord.Embed(
+            title="📦 Import Profile",
+            description=f"```\n{chr(10).join(lines) or 'No deferred imports registered'}```",
+            color=0x00FFAE
+        )
+        embed.set_footer(text=f"Requested by {ctx.author.name}", icon_url=ctx.author.avatar.url if ctx.author.avatar else ctx.author.default_avatar.url)
+        await ctx.reply(embed=embed)
+
     @commands.command(name="adminpanel", aliases=["ap"])
     async def adminpanel(self, ctx, page: int = 1):
         """Display all available admin commands with pagination (Admin only)
@@ -1298,6 +1350,8 @@ class AdminCommands(commands.Cog):
             # Add admin commands from AdminCommands cog
             admin_commands = [
                 ("addcash", "Add tokens or credits to a user's balance", "!addcash @user 100 tokens"),
+                ("audit", "Recompute a user's points from the ledger", "!audit @user"),
+                ("ledger", "Compact or reconcile the points ledger", "!ledger reconcile all"),
                 ("addadmin", "Add a user as a server admin", "!addadmin @user"),
                 ("viewadmins", "View server admins across all servers", "!viewadmins server_id"),
                 ("removeadmin", "Remove a user as a server admin", "!removeadmin @user"),
@@ -2298,6 +2352,8 @@ class AdminPanelPaginator(discord.ui.View):
         # Calculate which commands to show
         admin_commands = [
             ("addcash", "Add tokens or credits to a user's balance", "!addcash @user 100 tokens"),
+            ("audit", "Recompute a user's points from the ledger", "!audit @user"),
+            ("ledger", "Compact or reconcile the points ledger", "!ledger reconcile all"),
             ("addadmin", "Add a user as a server admin", "!addadmin @user"),
             ("viewadmins", "View server admins across all servers", "!viewadmins server_id"),
             ("removeadmin", "Remove a user as a server admin", "!removeadmin @user"),
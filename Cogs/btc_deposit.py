@@ -4,23 +4,27 @@ import discord
 from discord.ext import commands, tasks
 import os
 import requests
-import qrcode
 import io
 import asyncio
 import datetime
 import time
-import aiohttp
 import json
 import re
 from dotenv import load_dotenv
-from bitcoinlib.keys import HDKey
-from bitcoinlib.networks import Network
 from colorama import Fore, Style
 
-from Cogs.utils.mongo import Users
+from Cogs.utils.mongo import Users, counters, ledger
+from Cogs.utils.metrics import timed
 from Cogs.utils.notifier import Notifier
 from Cogs.utils.emojis import emoji
 from Cogs.utils.currency_helper import get_crypto_price
+from Cogs.utils.http_client import http_client
+from Cogs.utils.deposit_watcher import DepositWatcher
+from Cogs.utils.chain_tip import TipHeightCache
+from Cogs.utils.address_pool import AddressPool
+from Cogs.utils.render_cache import deposit_cards, deposit_card_fonts
+from Cogs.utils.lazy_imports import lazy_import
+from Cogs.utils.dm_fanout import resolve_user
 
 # Load environment variables
 load_dotenv()
@@ -35,10 +39,18 @@ BTC_SATOSHIS = 100_000_000  # 1 BTC = 100,000,000 satoshis
 REQUIRED_CONFIRMATIONS = 2
 MEMPOOL_API_URL = "https://mempool.space/api"  # Mempool.space Bitcoin API
 CHECK_DEPOSIT_COOLDOWN = 15  # seconds
+WATCH_INTERVAL = 60  # seconds between background checks of a watched address
+BLOCK_TIME = 600  # average seconds between blocks, sets how long the tip height is cached
 EMBED_TIMEOUT = 600  # 10 minutes in seconds
 
-from PIL import Image, ImageDraw, ImageFont
+# Heavy dependencies are only imported when a deposit is actually made
+qrcode = lazy_import("qrcode")
+bitcoinlib_keys = lazy_import("bitcoinlib.keys")
+bitcoinlib_networks = lazy_import("bitcoinlib.networks")
 
+from PIL import Image, ImageDraw
+
+@timed("render", "btc_deposit_card")
 def generate_qr_code(address: str, username: str):
     """Generates a styled QR code image with text."""
     qr_data = f"bitcoin:{address}"
@@ -53,20 +65,7 @@ def generate_qr_code(address: str, username: str):
     qr_img = qr.make_image(fill_color="black", back_color="white").convert('RGB')
     qr_width, qr_height = qr_img.size
 
-    try:
-        title_font = ImageFont.truetype("Helvetica-Bold.ttf", 30)
-        subtitle_font = ImageFont.truetype("Helvetica.ttf", 18)
-        brand_font = ImageFont.truetype("Helvetica-Bold.ttf", 36)
-    except IOError:
-        print(f"{Fore.YELLOW}[!] Warning: Font files not found. Using default font.{Style.RESET_ALL}")
-        try:
-            title_font = ImageFont.truetype("arial.ttf", 30)
-            subtitle_font = ImageFont.truetype("arial.ttf", 18)
-            brand_font = ImageFont.truetype("arial.ttf", 36)
-        except IOError:
-            title_font = ImageFont.load_default()
-            subtitle_font = ImageFont.load_default()
-            brand_font = ImageFont.load_default()
+    title_font, subtitle_font, brand_font = deposit_card_fonts()
 
     title_text = f"{username}'s Deposit Address"
     instruction_text = "Only send BITCOIN"
@@ -152,6 +151,42 @@ class DepositView(discord.ui.View):
             except KeyError:
                 pass
 
+    async def show_success(self, deposits):
+        """Turn the deposit message into a receipt for the credited transactions"""
+        if not self.message:
+            return
+        total_btc = sum(d['amount_crypto'] for d in deposits)
+
+        main_embed = self.message.embeds[0]
+        main_embed.title = "<:yes:1355501647538815106> | Deposit Success"
+        main_embed.description = f"<:btc:1339343483089063976> **+{total_btc:,.8f} BTC** from {len(deposits)} transaction(s)"
+        main_embed.clear_fields()
+        main_embed.set_image(url=None)  # Remove QR code image
+
+        for i, deposit in enumerate(deposits, 1):
+            txid = deposit['txid']
+            txid_short = txid[:10] + '...' if len(txid) > 10 else txid
+            explorer_url = f"https://mempool.space/tx/{txid}"
+            tx_value = f"[`{txid_short}`]({explorer_url})" if txid != 'N/A' else "N/A"
+
+            main_embed.add_field(
+                name=f"Transaction #{i}",
+                value=f"Amount: {deposit['amount_crypto']:,.8f} BTC\nTXID: {tx_value}",
+                inline=False
+            )
+
+        updated_user = self.cog.users_db.fetch_user(self.user_id)
+        btc_balance = updated_user.get("wallet", {}).get("BTC", "N/A") if updated_user else "N/A"
+        main_embed.add_field(name="New BTC Balance", value=f"<:btc:1339343483089063976> {btc_balance:,.8f} BTC", inline=True)
+
+        for item in self.children:
+            if isinstance(item, discord.ui.Button) and item.custom_id == "check_deposit_button":
+                item.disabled = True
+                item.style = discord.ButtonStyle.grey
+                item.label = "Checked"
+
+        await self.message.edit(embed=main_embed, view=self, attachments=[])
+
     @discord.ui.button(label="Check for New Deposits", style=discord.ButtonStyle.green, custom_id="check_deposit_button", emoji="🔄")
     async def check_deposit_button(self, button: discord.ui.Button, interaction: discord.Interaction):
         now = time.time()
@@ -184,67 +219,12 @@ class DepositView(discord.ui.View):
         await interaction.response.defer(ephemeral=True)
 
         try:
-            status, details = await self.cog._check_for_deposits(self.user_id, self.address)
+            # The watcher keeps this address checked; this is a cache read unless the result is stale
+            status, details = await self.cog.watcher.status(self.user_id, self.address)
 
             if status == "success":
-                deposits = details.get('deposits', [details])
-                total_btc = sum(d['amount_crypto'] for d in deposits)
-
-                for deposit in deposits:
-                    btc_price = await get_crypto_price('bitcoin')
-                    usd_value = deposit['amount_crypto'] * btc_price if btc_price else None
-
-                    history_entry = {
-                        "type": "btc_deposit",
-                        "amount_crypto": deposit['amount_crypto'],
-                        "currency": "BTC",
-                        "usd_value": usd_value,
-                        "txid": deposit['txid'],
-                        "address": self.address,
-                        "confirmations": deposit.get('confirmations', REQUIRED_CONFIRMATIONS),
-                        "timestamp": datetime.datetime.utcnow().isoformat() + "Z"
-                    }
-                    self.cog.users_db.update_history(self.user_id, history_entry)
-
-                    if usd_value:
-                        self.cog.users_db.collection.update_one(
-                            {"discord_id": self.user_id},
-                            {"$inc": {"total_deposit_amount_usd": usd_value}}
-                        )
-
-                if not self.message:
-                    await interaction.followup.send("Error: Could not find the original deposit message to update.", ephemeral=True)
-                    return
-
-                main_embed = self.message.embeds[0]
-                main_embed.title = "<:yes:1355501647538815106> | Deposit Success"
-                main_embed.description = f"<:btc:1339343483089063976> **+{total_btc:,.8f} BTC** from {len(deposits)} transaction(s)"
-                main_embed.clear_fields()
-                main_embed.set_image(url=None)  # Remove QR code image
-
-                for i, deposit in enumerate(deposits, 1):
-                    txid = deposit['txid']
-                    txid_short = txid[:10] + '...' if len(txid) > 10 else txid
-                    explorer_url = f"https://mempool.space/tx/{txid}"
-                    tx_value = f"[`{txid_short}`]({explorer_url})" if txid != 'N/A' else "N/A"
-
-                    main_embed.add_field(
-                        name=f"Transaction #{i}",
-                        value=f"Amount: {deposit['amount_crypto']:,.8f} BTC\nTXID: {tx_value}",
-                        inline=False
-                    )
-
-                updated_user = self.cog.users_db.fetch_user(self.user_id)
-                btc_balance = updated_user.get("wallet", {}).get("BTC", "N/A") if updated_user else "N/A"
-                main_embed.add_field(name="New BTC Balance", value=f"<:btc:1339343483089063976> {btc_balance:,.8f} BTC", inline=True)
-
-                for item in self.children:
-                    if isinstance(item, discord.ui.Button) and item.custom_id == "check_deposit_button":
-                        item.disabled = True
-                        item.style = discord.ButtonStyle.grey
-                        item.label = "Checked"
-
-                await self.message.edit(embed=main_embed, view=self, attachments=[])
+                # Credited and shown on the deposit message by the watcher callback
+                return
 
             elif status == "pending":
                 pending_amount = details.get('amount_crypto', 0)
@@ -309,18 +289,100 @@ class BtcDeposit(commands.Cog):
         self.notifier = Notifier()
         self.active_deposit_views = {}
         self.button_cooldowns = {}
+        self.tip_height = TipHeightCache("btc", self._fetch_tip_height, BLOCK_TIME, min_ttl=WATCH_INTERVAL)
+        self.watcher = DepositWatcher("btc", self._watch_check, WATCH_INTERVAL)
+        self.watcher.start(bot)
+        self._master_key = None
+        self.address_pool = AddressPool("btc", self._derive_address, self._reserve_address_indices)
+        if BTC_XPUB:
+            self.address_pool.start(bot)
 
         if not BTC_XPUB:
             print(f"{Fore.RED}[!] ERROR: BTC_XPUB not found in environment variables! BTC deposits will not work.{Style.RESET_ALL}")
         if not DEPOSIT_WEBHOOK_URL:
             print(f"{Fore.YELLOW}[!] WARNING: DEPOSIT_WEBHOOK_URL not found. Deposit notifications will not be sent.{Style.RESET_ALL}")
 
-    async def _get_next_address_index(self, user_id: int) -> int:
+    def cog_unload(self):
+        self.watcher.stop()
+        self.address_pool.stop()
+
+    async def _fetch_tip_height(self) -> int:
+        response = await http_client.get(f"{MEMPOOL_API_URL}/blocks/tip/height")
+        if response.status != 200:
+            raise RuntimeError(f"API Error ({response.status}) fetching block height.")
+        return int(response.text())
+
+    async def _watch_check(self, user_id: int, address: str) -> tuple[str, dict]:
+        """Watcher check: credit confirmed deposits and tell the user about them"""
         user_data = self.users_db.fetch_user(user_id)
-        if user_data and 'btc_address_index' in user_data:
-            return user_data.get('btc_address_index', -1) + 1
-        else:
-            return 0
+        primary_currency = (user_data or {}).get('primary_coin', (user_data or {}).get('primary_currency', '')).upper()
+        if primary_currency != 'BTC':
+            # BTC deposits are only claimed while BTC is the primary currency
+            return "no_new", {}
+
+        status, details = await self._check_for_deposits(user_id, address)
+        if status == "success":
+            deposits = details.get('deposits', [details])
+            await self._record_deposit_value(user_id, deposits)
+            view = self.active_deposit_views.get(user_id)
+            if view and view.address == address and view.message:
+                await view.show_success(deposits)
+            else:
+                await self._dm_deposit(user_id, deposits)
+        return status, details
+
+    async def _record_deposit_value(self, user_id: int, deposits: list):
+        btc_price = await get_crypto_price('bitcoin')
+        if not btc_price:
+            return
+        usd_value = sum(d['amount_crypto'] for d in deposits) * btc_price
+        self.users_db.collection.update_one(
+            {"discord_id": user_id},
+            {"$inc": {"total_deposit_amount_usd": usd_value}}
+        )
+
+    async def _dm_deposit(self, user_id: int, deposits: list):
+        """Deposit confirmed while the user had no deposit message open"""
+        user = await resolve_user(self.bot, user_id)
+        if not user:
+            return
+        total_btc = sum(d['amount_crypto'] for d in deposits)
+        embed = discord.Embed(
+            title="<:yes:1355501647538815106> | Deposit Success",
+            description=f"<:btc:1339343483089063976> **+{total_btc:,.8f} BTC** has been credited to your balance.",
+            color=0x00FFAE
+        )
+        embed.set_footer(text="BetSync Casino")
+        try:
+            await user.send(embed=embed)
+        except (discord.Forbidden, discord.HTTPException):
+            pass
+
+    def _hd_key(self):
+        # Parsing the xpub is the slow part, so it happens once per process
+        if self._master_key is None:
+            master_key = bitcoinlib_keys.HDKey(BTC_XPUB)
+            master_key.network = bitcoinlib_networks.Network('bitcoin')
+            self._master_key = master_key
+        return self._master_key
+
+    def _derive_address(self, index: int) -> str:
+        """Native SegWit address at m/0h/index, blocking"""
+        return self._hd_key().subkey_for_path(f"m/0h/{index}").address()
+
+    def _next_address_index(self) -> int:
+        """One past the highest btc_address_index stored, seeds the counter once"""
+        highest_index_user = self.users_db.collection.find_one(
+            {"btc_address_index": {"$exists": True}},
+            sort=[("btc_address_index", -1)]
+        )
+        last_global_index = -1
+        if highest_index_user and isinstance(highest_index_user.get('btc_address_index'), int):
+            last_global_index = highest_index_user['btc_address_index']
+        return last_global_index + 1
+
+    def _reserve_address_indices(self, count: int) -> int:
+        return counters.reserve("btc_address_index", count, floor=self._next_address_index)
 
     async def _generate_btc_address(self, user_id: int) -> tuple[str | None, str | None]:
         user_data = self.users_db.fetch_user(user_id)
@@ -334,32 +396,12 @@ class BtcDeposit(commands.Cog):
             return None, "BTC_XPUB environment variable is not configured."
 
         try:
-            highest_index_user = self.users_db.collection.find_one(
-                {"btc_address_index": {"$exists": True}},
-                sort=[("btc_address_index", -1)]
-            )
-
-            last_global_index = -1
-            if highest_index_user and 'btc_address_index' in highest_index_user and isinstance(highest_index_user['btc_address_index'], int):
-                last_global_index = highest_index_user['btc_address_index']
-
-            next_index = last_global_index + 1
-            print(f"{Fore.CYAN}[i] Generating address for user {user_id} using globally next index: {next_index} (Last highest global index found: {last_global_index}){Style.RESET_ALL}")
-
-            if not BTC_XPUB:
-                return None, "BTC_XPUB environment variable is not configured."
-            print(f"{Fore.CYAN}[i] Using BTC_XPUB starting with: {BTC_XPUB[:10]}...{Style.RESET_ALL}")
-            master_key = HDKey(BTC_XPUB)
-            master_key.network = Network('bitcoin')
-
-            derivation_path = f"m/0h/{next_index}"
             try:
-                derived_key = master_key.subkey_for_path(derivation_path)
-                address = derived_key.address()
-                print(f"{Fore.GREEN}[+] Derived address using user path (Native SegWit): {derivation_path}{Style.RESET_ALL}")
+                next_index, address = await self.address_pool.take()
             except Exception as derive_err:
-                print(f"{Fore.RED}[!] Error: Derivation failed using path ({derivation_path}): {derive_err}. Ensure BTC_XPUB is compatible with this path and p2wpkh.{Style.RESET_ALL}")
-                return None, f"Failed to derive address using path {derivation_path}: {derive_err}. Check XPUB compatibility."
+                print(f"{Fore.RED}[!] Error: Derivation failed on path m/0h/i: {derive_err}. Ensure BTC_XPUB is compatible with this path and p2wpkh.{Style.RESET_ALL}")
+                return None, f"Failed to derive address: {derive_err}. Check XPUB compatibility."
+            derivation_path = f"m/0h/{next_index}"
 
             print(f"{Fore.CYAN}[i] Final derived info for user {user_id}: Address={address}, Path={derivation_path}, Index={next_index}{Style.RESET_ALL}")
 
@@ -395,28 +437,27 @@ class BtcDeposit(commands.Cog):
                 return "error", {"error": "User data not found."}
 
             try:
-                async with aiohttp.ClientSession() as session:
-                    txs_url = f"{MEMPOOL_API_URL}/address/{address}/txs"
-                    async with session.get(txs_url) as response:
-                        if response.status != 200:
-                            print(f"{Fore.RED}[!] Mempool API Error ({response.status}) fetching transactions for {address}. Response: {await response.text()}{Style.RESET_ALL}")
-                            return "error", {"error": f"API Error ({response.status}) fetching transactions."}
-
-                        try:
-                            transactions = await response.json()
-                        except Exception as e:
-                            print(f"{Fore.RED}[!] Error parsing transactions for {address}: {e}{Style.RESET_ALL}")
-                            return "error", {"error": "Failed to parse transaction data"}
-
-                    tip_url = f"{MEMPOOL_API_URL}/blocks/tip/height"
-                    async with session.get(tip_url) as tip_response:
-                        if tip_response.status != 200:
-                            print(f"{Fore.RED}[!] API Error ({tip_response.status}) fetching block height.{Style.RESET_ALL}")
-                            return "error", {"error": f"API Error ({tip_response.status}) fetching block height."}
-                        current_block_height = int(await tip_response.text())
+                txs_url = f"{MEMPOOL_API_URL}/address/{address}/txs"
+                response = await http_client.get(txs_url)
+                if response.status != 200:
+                    print(f"{Fore.RED}[!] Mempool API Error ({response.status}) fetching transactions for {address}. Response: {response.text()}{Style.RESET_ALL}")
+                    return "error", {"error": f"API Error ({response.status}) fetching transactions."}
+
+                try:
+                    transactions = response.json()
+                except Exception as e:
+                    print(f"{Fore.RED}[!] Error parsing transactions for {address}: {e}{Style.RESET_ALL}")
+                    return "error", {"error": "Failed to parse transaction data"}
 
                 if not transactions:
                     return "no_new", {}
+
+                # Shared, cached per chain; only fetched when a check needs confirmations
+                try:
+                    current_block_height = await self.tip_height.get()
+                except Exception as e:
+                    print(f"{Fore.RED}[!] Error fetching block height: {e}{Style.RESET_ALL}")
+                    return "error", {"error": "Failed to fetch block height."}
             except Exception as e:
                 transactions = []
                 current_block_height = -1
@@ -428,6 +469,7 @@ class BtcDeposit(commands.Cog):
                 self.users_db.collection.update_one({"discord_id": user_id}, {"$set": {"history": []}})
 
             processed_txids = {entry.get('txid') for entry in history if entry and entry.get('type') == 'btc_deposit'}
+            processed_txids.update(user_data.get('processed_btc_txids', []))
             new_deposit_processed_in_this_check = False
             first_pending_tx = None
 
@@ -481,18 +523,22 @@ class BtcDeposit(commands.Cog):
                 balance_before_btc = user_data.get("wallet", {}).get("BTC", 0)
                 balance_before_points = user_data.get("points", 0)
 
+                # Credit and mark the txid in one update, so the watcher and a button press
+                # (or two processes) racing on the same transaction only credit it once
                 update_result_wallet = self.users_db.collection.update_one(
-                    {"discord_id": user_id},
+                    {"discord_id": user_id, "processed_btc_txids": {"$ne": txid}},
                     {
                         "$inc": {
                             "wallet.BTC": amount_crypto,
                             "points": points_to_add
-                        }
+                        },
+                        "$addToSet": {"processed_btc_txids": txid}
                     }
                 )
                 if not update_result_wallet or update_result_wallet.matched_count == 0:
-                    print(f"{Fore.RED}[!] Failed to update wallet.BTC for user {user_id} for txid {txid}. Aborting processing.{Style.RESET_ALL}")
+                    print(f"{Fore.YELLOW}[!] TX {txid} for user {user_id} was already credited or the user is missing. Skipping.{Style.RESET_ALL}")
                     continue
+                ledger.record(user_id, points_to_add, "deposit", f"btc:{txid}")
                 print(f"{Fore.GREEN}[+] Updated wallet.BTC for user {user_id} by {amount_crypto:.8f} BTC for txid {txid}{Style.RESET_ALL}")
 
                 history_entry = {
@@ -509,10 +555,6 @@ class BtcDeposit(commands.Cog):
                 if not history_update_success:
                     print(f"{Fore.YELLOW}[!] Failed to update history for user {user_id}, txid {txid}. Balance was updated.{Style.RESET_ALL}")
 
-                self.users_db.collection.update_one(
-                    {"discord_id": user_id},
-                    {"$addToSet": {"processed_btc_txids": txid}}
-                )
                 await asyncio.to_thread(self.users_db.save, user_id)
 
                 balance_after_btc = balance_before_btc + amount_crypto
@@ -660,7 +702,7 @@ class BtcDeposit(commands.Cog):
             return
 
         try:
-            qr_buffer = await asyncio.to_thread(generate_qr_code, address, ctx.author.name)
+            qr_buffer = io.BytesIO(await deposit_cards.get(f"btc:{address}:{ctx.author.name}", generate_qr_code, address, ctx.author.name))
             qr_file = discord.File(qr_buffer, filename="btc_deposit_qr.png")
         except Exception as qr_err:
             print(f"{Fore.RED}[!] Failed to generate QR code for {address}: {qr_err}{Style.RESET_ALL}")
@@ -684,7 +726,8 @@ class BtcDeposit(commands.Cog):
         try:
             message = await ctx.reply(content=msg_content, embed=embed, file=qr_file, view=view)
             view.message = message
-            self.active_deposit_views[user_id] = message
+            self.active_deposit_views[user_id] = view
+            self.watcher.watch(user_id, address)
         except Exception as send_err:
             print(f"{Fore.RED}[!] Failed to send deposit message for user {user_id}: {send_err}{Style.RESET_ALL}")
             await ctx.reply("<:no:1344252518305234987> Failed to send deposit message. Please try again.")
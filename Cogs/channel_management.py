@@ -1,6 +1,6 @@
 import discord
 from discord.ext import commands
-from Cogs.utils.mongo import Servers
+from Cogs.utils.mongo import Servers, guild_settings
 
 class ChannelManagementCog(commands.Cog):
     def __init__(self, bot):
@@ -43,16 +43,14 @@ class ChannelManagementCog(commands.Cog):
         if ctx.command.cog_name in ['AdminCommands', 'ChannelManagementCog']:
             return True
 
-        # Get server data
-        db = Servers()
-        server_data = db.fetch_server(ctx.guild.id)
+        # Cached guild settings, a dict lookup on the hot path
+        settings = Servers().fetch_settings(ctx.guild.id)
 
-        if not server_data:
+        if not settings:
             return True
 
         # Check if current channel is in disabled channels list
-        disabled_channels = server_data.get("disabled_channels", [])
-        if ctx.channel.id in disabled_channels:
+        if ctx.channel.id in settings["disabled_channels"]:
             embed = discord.Embed(
                 title="<:no:1344252518305234987> | Commands Disabled",
                 description=f"Commands are disabled in {ctx.channel.mention}.",
@@ -149,6 +147,7 @@ class ChannelManagementCog(commands.Cog):
             {"server_id": ctx.guild.id},
             {"$set": {"disabled_channels": disabled_channels}}
         )
+        guild_settings.invalidate(ctx.guild.id)
 
         # Send confirmation
         embed = discord.Embed(
@@ -251,6 +250,7 @@ class ChannelManagementCog(commands.Cog):
             {"server_id": ctx.guild.id},
             {"$set": {"disabled_channels": disabled_channels}}
         )
+        guild_settings.invalidate(ctx.guild.id)
 
         # Send confirmation
         embed = discord.Embed(
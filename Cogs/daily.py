@@ -1,4 +1,5 @@
 
+import asyncio
 import discord
 from discord.ext import commands
 import datetime
@@ -73,6 +74,16 @@ class Daily(commands.Cog):
         )
         loading_message = await ctx.reply(embed=loading_embed)
 
+        # The online and custom status checks need presence updates from the gateway
+        if not self.bot.intents.presences:
+            error_embed = discord.Embed(
+                title="<:no:1344252518305234987> | Daily Rewards Unavailable",
+                description="Daily rewards can't verify your status on this instance. Please try again later.",
+                color=0xFF0000
+            )
+            await loading_message.edit(embed=error_embed)
+            return
+
         # Get user data
         db = Users()
         user_data = db.fetch_user(ctx.author.id)
@@ -129,6 +140,13 @@ class Daily(commands.Cog):
 
         # Check 3: User must be online
         member = ctx.guild.get_member(ctx.author.id)
+        if member is None:
+            # The trimmed member cache may not hold the author; ask the gateway for them with their presence
+            try:
+                found = await ctx.guild.query_members(user_ids=[ctx.author.id], presences=True, cache=True)
+            except asyncio.TimeoutError:
+                found = []
+            member = found[0] if found else None
         if member and member.status != discord.Status.offline:
             requirements.append("✅ You must be online")
         else:
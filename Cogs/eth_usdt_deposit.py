@@ -4,24 +4,27 @@ import discord
 from discord.ext import commands, tasks
 import os
 import requests
-import qrcode
 import io
 import asyncio
 import datetime
 import time
-import aiohttp
 import json
 import re
 from dotenv import load_dotenv
-from web3 import Web3
-from web3.middleware import geth_poa_middleware
-from eth_account import Account
 from colorama import Fore, Style
 
-from Cogs.utils.mongo import Users
+from Cogs.utils.mongo import Users, counters, ledger
+from Cogs.utils.metrics import timed
 from Cogs.utils.notifier import Notifier
 from Cogs.utils.emojis import emoji
 from Cogs.utils.currency_helper import get_crypto_price
+from Cogs.utils.http_client import http_client
+from Cogs.utils.deposit_watcher import DepositWatcher
+from Cogs.utils.chain_tip import TipHeightCache
+from Cogs.utils.address_pool import AddressPool
+from Cogs.utils.render_cache import deposit_cards, deposit_card_fonts
+from Cogs.utils.lazy_imports import lazy_import
+from Cogs.utils.dm_fanout import resolve_user
 
 # Load environment variables
 load_dotenv()
@@ -35,12 +38,37 @@ ETH_CONVERSION_RATE = 0.000010  # 1 point = 0.000010 ETH
 USDT_CONVERSION_RATE = 0.0212  # 1 point = 0.0212 USDT
 REQUIRED_CONFIRMATIONS = 12  # Ethereum typically needs more confirmations
 CHECK_DEPOSIT_COOLDOWN = 15  # seconds
+WATCH_INTERVAL = 30  # seconds between background checks of a watched address
+BLOCK_TIME = 12  # seconds per slot, sets how long the block number is cached
+SCAN_MARGIN = REQUIRED_CONFIRMATIONS  # blocks below the tip that are rescanned, so pending transactions are seen again
 EMBED_TIMEOUT = 600  # 10 minutes in seconds
-INFURA_URL = "https://mainnet.infura.io/v3/YOUR_INFURA_PROJECT_ID"  # Replace with actual Infura ID
+ETHERSCAN_API_URL = "https://api.etherscan.io/api"
+ETHERSCAN_API_KEY = os.environ.get("ETHERSCAN_API_KEY")
 USDT_CONTRACT_ADDRESS = "0xdAC17F958D2ee523a2206206994597C13D831ec7"  # Mainnet USDT
+COINGECKO_IDS = {"eth": "ethereum", "usdt": "tether"}
+ETH_DERIVATION_PATH_TEMPLATE = "m/44'/60'/0'/0/{}"
 
-from PIL import Image, ImageDraw, ImageFont
+# Heavy dependencies are only imported when a deposit is actually made
+qrcode = lazy_import("qrcode")
+eth_account = lazy_import("eth_account")
+eth_hdaccount = lazy_import("eth_account.hdaccount")
 
+from PIL import Image, ImageDraw
+
+
+def is_incoming_transfer(tx: dict, address: str, currency: str) -> bool:
+    """True if an Etherscan txlist/tokentx entry moved funds into address"""
+    # Both lists also contain the address's outgoing transactions
+    if (tx.get('to') or '').lower() != address.lower():
+        return False
+    if currency == "eth":
+        # A reverted transaction still shows its value but moved nothing
+        return tx.get('isError') == '0' and tx.get('txreceipt_status', '1') in ('1', '')
+    # tokentx lists Transfer events, which reverted transactions never emit
+    return (tx.get('contractAddress') or '').lower() == USDT_CONTRACT_ADDRESS.lower()
+
+
+@timed("render", "eth_deposit_card")
 def generate_qr_code(address: str, username: str, currency: str):
     """Generates a styled QR code image with text for ETH/USDT."""
     qr_data = f"ethereum:{address}" if currency == "eth" else f"ethereum:{address}?contractAddress={USDT_CONTRACT_ADDRESS}&decimal=6"
@@ -55,20 +83,7 @@ def generate_qr_code(address: str, username: str, currency: str):
     qr_img = qr.make_image(fill_color="black", back_color="white").convert('RGB')
     qr_width, qr_height = qr_img.size
 
-    try:
-        title_font = ImageFont.truetype("Helvetica-Bold.ttf", 30)
-        subtitle_font = ImageFont.truetype("Helvetica.ttf", 18)
-        brand_font = ImageFont.truetype("Helvetica-Bold.ttf", 36)
-    except IOError:
-        print(f"{Fore.YELLOW}[!] Warning: Font files not found. Using default font.{Style.RESET_ALL}")
-        try:
-            title_font = ImageFont.truetype("arial.ttf", 30)
-            subtitle_font = ImageFont.truetype("arial.ttf", 18)
-            brand_font = ImageFont.truetype("arial.ttf", 36)
-        except IOError:
-            title_font = ImageFont.load_default()
-            subtitle_font = ImageFont.load_default()
-            brand_font = ImageFont.load_default()
+    title_font, subtitle_font, brand_font = deposit_card_fonts()
 
     title_text = f"{username}'s Deposit Address"
     instruction_text = f"Only send {currency.upper()}" 
@@ -155,6 +170,42 @@ class DepositView(discord.ui.View):
             except KeyError:
                 pass
 
+    async def show_success(self, deposits):
+        """Turn the deposit message into a receipt for the credited transactions"""
+        if not self.message:
+            return
+        total_amount = sum(d['amount_crypto'] for d in deposits)
+
+        main_embed = self.message.embeds[0]
+        main_embed.title = "<:yes:1355501647538815106> | Deposit Success"
+        main_embed.description = f"<:{self.currency}:1339343445675868191> **+{total_amount:,.8f} {self.currency.upper()}** from {len(deposits)} transaction(s)"
+        main_embed.clear_fields()
+        main_embed.set_image(url=None)
+
+        for i, deposit in enumerate(deposits, 1):
+            txid = deposit['txid']
+            txid_short = txid[:10] + '...' if len(txid) > 10 else txid
+            explorer_url = f"https://etherscan.io/tx/{txid}"
+            tx_value = f"[`{txid_short}`]({explorer_url})" if txid != 'N/A' else "N/A"
+
+            main_embed.add_field(
+                name=f"Transaction #{i}",
+                value=f"Amount: {deposit['amount_crypto']:,.8f} {self.currency.upper()}\nTXID: {tx_value}",
+                inline=False
+            )
+
+        updated_user = self.cog.users_db.fetch_user(self.user_id)
+        balance = updated_user.get("wallet", {}).get(self.currency.upper(), "N/A") if updated_user else "N/A"
+        main_embed.add_field(name=f"New {self.currency.upper()} Balance", value=f"<:{self.currency}:1339343445675868191> {balance:,.8f} {self.currency.upper()}", inline=True)
+
+        for item in self.children:
+            if isinstance(item, discord.ui.Button) and item.custom_id == "check_deposit_button":
+                item.disabled = True
+                item.style = discord.ButtonStyle.grey
+                item.label = "Checked"
+
+        await self.message.edit(embed=main_embed, view=self, attachments=[])
+
     @discord.ui.button(label="Check for New Deposits", style=discord.ButtonStyle.green, custom_id="check_deposit_button", emoji="🔄")
     async def check_deposit_button(self, button: discord.ui.Button, interaction: discord.Interaction):
         now = time.time()
@@ -170,75 +221,12 @@ class DepositView(discord.ui.View):
         await interaction.response.defer(ephemeral=True)
 
         try:
-            status, details = await self.cog._check_for_deposits(self.user_id, self.address, self.currency)
+            # The watcher keeps this address checked; this is a cache read unless the result is stale
+            status, details = await self.cog.watchers[self.currency].status(self.user_id, self.address)
 
             if status == "success":
-                deposits = details.get('deposits', [details])
-                total_amount = sum(d['amount_crypto'] for d in deposits)
-                total_points = sum(d.get('points_credited', 0) for d in deposits)
-                
-                if total_points > 0:
-                    update_result = self.cog.users_db.update_balance(self.user_id, total_points, operation="$inc")
-                    if not update_result or update_result.matched_count == 0:
-                        print(f"{Fore.RED}[!] Failed to update balance for user {self.user_id} after successful deposit check.{Style.RESET_ALL}")
-                        await interaction.followup.send("Deposit detected, but failed to update your balance. Please contact support.", ephemeral=True)
-                        return
-
-                    for deposit in deposits:
-                        crypto_price = await get_crypto_price(self.currency)
-                        usd_value = deposit['amount_crypto'] * crypto_price if crypto_price else None
-                        
-                        history_entry = {
-                            "type": f"{self.currency}_deposit",
-                            "amount_crypto": deposit['amount_crypto'],
-                            "currency": self.currency.upper(),
-                            "usd_value": usd_value,
-                            "txid": deposit['txid'],
-                            "address": self.address,
-                            "confirmations": deposit.get('confirmations', REQUIRED_CONFIRMATIONS),
-                            "timestamp": datetime.datetime.utcnow().isoformat() + "Z"
-                        }
-                        self.cog.users_db.update_history(self.user_id, history_entry)
-                        
-                        if usd_value:
-                            self.cog.users_db.collection.update_one(
-                                {"discord_id": self.user_id},
-                                {"$inc": {"total_deposit_amount_usd": usd_value}}
-                            )
-
-                if not self.message:
-                    await interaction.followup.send("Error: Could not find the original deposit message to update.", ephemeral=True)
-                    return
-
-                main_embed = self.message.embeds[0]
-                main_embed.title = "<:yes:1355501647538815106> | Deposit Success"
-                main_embed.description = f"<:{self.currency}:1339343445675868191> **+{total_amount:,.8f} {self.currency.upper()}** from {len(deposits)} transaction(s)"
-                main_embed.clear_fields()
-                main_embed.set_image(url=None)
-
-                for i, deposit in enumerate(deposits, 1):
-                    txid = deposit['txid']
-                    txid_short = txid[:10] + '...' if len(txid) > 10 else txid
-                    explorer_url = f"https://etherscan.io/tx/{txid}"
-                    tx_value = f"[`{txid_short}`]({explorer_url})" if txid != 'N/A' else "N/A"
-                    
-                    main_embed.add_field(
-                        name=f"Transaction #{i}",
-                        value=f"Amount: {deposit['amount_crypto']:,.8f} {self.currency.upper()}\nTXID: {tx_value}",
-                        inline=False
-                    )
-
-                updated_user = self.cog.users_db.fetch_user(self.user_id)
-                balance = updated_user.get("wallet", {}).get(self.currency.upper(), "N/A") if updated_user else "N/A"
-                main_embed.add_field(name=f"New {self.currency.upper()} Balance", value=f"<:{self.currency}:1339343445675868191> {balance:,.8f} {self.currency.upper()}", inline=True)
-                
-                for item in self.children:
-                    if isinstance(item, discord.ui.Button) and item.custom_id == "check_deposit_button":
-                        item.disabled = True
-                        item.style = discord.ButtonStyle.grey
-                        item.label = "Checked"
-
-                await self.message.edit(embed=main_embed, view=self, attachments=[])
+                # Credited and shown on the deposit message by the watcher callback
+                return
 
             elif status == "pending":
                 pending_amount = details.get('amount_crypto', 0)
@@ -303,16 +291,163 @@ class EthUsdtDeposit(commands.Cog):
         self.notifier = Notifier()
         self.active_deposit_views = {}
         self.button_cooldowns = {}
+        # ETH and USDT deposits share one chain, so they share one block number
+        self.tip_height = TipHeightCache("eth", self._fetch_block_number, BLOCK_TIME, min_ttl=WATCH_INTERVAL)
+        self.watchers = {
+            currency: DepositWatcher(currency, self._watch_checker(currency), WATCH_INTERVAL)
+            for currency in ("eth", "usdt")
+        }
+        for watcher in self.watchers.values():
+            watcher.start(bot)
+        # ETH and USDT addresses come from the same path, so they share one index counter and pool
+        self._seed = None
+        self.address_pool = AddressPool("eth", self._derive_address, self._reserve_address_indices)
+        if METAMASK_SEED:
+            self.address_pool.start(bot)
 
         if not METAMASK_SEED:
             print(f"{Fore.RED}[!] ERROR: METAMASK_SEED not found in environment variables! ETH/USDT deposits will not work.{Style.RESET_ALL}")
         if not DEPOSIT_WEBHOOK_URL:
             print(f"{Fore.YELLOW}[!] WARNING: DEPOSIT_WEBHOOK_URL not found. Deposit notifications will not be sent.{Style.RESET_ALL}")
 
-        # Initialize Web3
-        self.w3 = Web3(Web3.HTTPProvider(INFURA_URL))
-        self.w3.middleware_onion.inject(geth_poa_middleware, layer=0)
-        Account.enable_unaudited_hdwallet_features()
+    def cog_unload(self):
+        for watcher in self.watchers.values():
+            watcher.stop()
+        self.address_pool.stop()
+
+    async def _fetch_block_number(self) -> int:
+        # From Etherscan itself, so confirmations are counted against the index the transactions come from
+        response = await http_client.get(ETHERSCAN_API_URL, params={
+            "module": "proxy", "action": "eth_blockNumber", "apikey": ETHERSCAN_API_KEY
+        })
+        if response.status != 200:
+            raise RuntimeError(f"Etherscan API Error ({response.status}) fetching block number.")
+        result = response.json().get("result", "")
+        if not isinstance(result, str) or not result.startswith("0x"):
+            raise RuntimeError(f"Etherscan returned no block number: {result}")
+        return int(result, 16)
+
+    def _watch_checker(self, currency: str):
+        async def check(user_id: int, address: str) -> tuple[str, dict]:
+            return await self._watch_check(user_id, address, currency)
+        return check
+
+    async def _watch_check(self, user_id: int, address: str, currency: str) -> tuple[str, dict]:
+        """Watcher check: credit confirmed deposits and tell the user about them"""
+        status, details = await self._check_for_deposits(user_id, address, currency)
+        if status == "error":
+            return status, details
+        if status != "success":
+            self._advance_cursor(user_id, currency, details.pop('scanned_to', None))
+            return status, details
+
+        deposits = await self._credit_deposits(user_id, address, currency, details['deposits'])
+        # Only after crediting, so a failed credit is picked up by the next scan
+        self._advance_cursor(user_id, currency, details.get('scanned_to'))
+        if not deposits:
+            return "no_new", {}
+
+        view = self.active_deposit_views.get(user_id)
+        if view and view.address == address and view.currency == currency and view.message:
+            await view.show_success(deposits)
+        else:
+            await self._dm_deposit(user_id, currency, deposits)
+        return "success", {"deposits": deposits}
+
+    def _advance_cursor(self, user_id: int, currency: str, block: int | None):
+        """Remember that every transaction up to block is settled, the next scan starts after it"""
+        if block is None or block < 0:
+            return
+        self.users_db.collection.update_one(
+            {"discord_id": user_id},
+            {"$max": {f"{currency}_scan_block": block}}
+        )
+
+    async def _credit_deposits(self, user_id: int, address: str, currency: str, deposits: list) -> list:
+        """Credit each confirmed deposit once, returns the ones credited by this call"""
+        rate = ETH_CONVERSION_RATE if currency == 'eth' else USDT_CONVERSION_RATE
+        crypto_price = await get_crypto_price(COINGECKO_IDS[currency])
+        credited = []
+        for deposit in deposits:
+            points_to_add = deposit['amount_crypto'] / rate
+            # Crediting and marking the txid in one update keeps racing checks from crediting twice
+            result = self.users_db.collection.update_one(
+                {"discord_id": user_id, f"processed_{currency}_txids": {"$ne": deposit['txid']}},
+                {
+                    "$inc": {
+                        f"wallet.{currency.upper()}": deposit['amount_crypto'],
+                        "points": points_to_add
+                    },
+                    "$addToSet": {f"processed_{currency}_txids": deposit['txid']}
+                }
+            )
+            if result.matched_count == 0:
+                continue
+            ledger.record(user_id, points_to_add, "deposit", f"{currency}:{deposit['txid']}")
+
+            usd_value = deposit['amount_crypto'] * crypto_price if crypto_price else None
+            history_entry = {
+                "type": f"{currency}_deposit",
+                "amount_crypto": deposit['amount_crypto'],
+                "points_credited": points_to_add,
+                "currency": currency.upper(),
+                "usd_value": usd_value,
+                "txid": deposit['txid'],
+                "address": address,
+                "confirmations": deposit.get('confirmations', REQUIRED_CONFIRMATIONS),
+                "timestamp": datetime.datetime.utcnow().isoformat() + "Z"
+            }
+            self.users_db.update_history(user_id, history_entry)
+            if usd_value:
+                self.users_db.collection.update_one(
+                    {"discord_id": user_id},
+                    {"$inc": {"total_deposit_amount_usd": usd_value}}
+                )
+
+            deposit['points_credited'] = points_to_add
+            credited.append(deposit)
+            print(f"{Fore.GREEN}[+] Processed {currency.upper()} deposit for user {user_id}: {deposit['amount_crypto']} {currency.upper()}, TXID: {deposit['txid']}{Style.RESET_ALL}")
+        return credited
+
+    async def _dm_deposit(self, user_id: int, currency: str, deposits: list):
+        """Deposit confirmed while the user had no deposit message open"""
+        user = await resolve_user(self.bot, user_id)
+        if not user:
+            return
+        total_amount = sum(d['amount_crypto'] for d in deposits)
+        embed = discord.Embed(
+            title="<:yes:1355501647538815106> | Deposit Success",
+            description=f"<:{currency}:1339343445675868191> **+{total_amount:,.8f} {currency.upper()}** has been credited to your balance.",
+            color=0x00FFAE
+        )
+        embed.set_footer(text="BetSync Casino")
+        try:
+            await user.send(embed=embed)
+        except (discord.Forbidden, discord.HTTPException):
+            pass
+
+    def _derive_address(self, index: int) -> str:
+        """Address at m/44'/60'/0'/0/index, blocking"""
+        # The mnemonic to seed step is a 2048-round PBKDF2, so the seed is computed once
+        if self._seed is None:
+            self._seed = eth_hdaccount.seed_from_mnemonic(METAMASK_SEED, "")
+        private_key = eth_hdaccount.key_from_seed(self._seed, ETH_DERIVATION_PATH_TEMPLATE.format(index))
+        return eth_account.Account.from_key(private_key).address
+
+    def _next_address_index(self) -> int:
+        """One past the highest ETH or USDT index stored, seeds the counter once"""
+        next_index = 0
+        for currency in ("eth", "usdt"):
+            highest_index_user = self.users_db.collection.find_one(
+                {f"{currency}_address_index": {"$exists": True}},
+                sort=[(f"{currency}_address_index", -1)]
+            )
+            if highest_index_user and f"{currency}_address_index" in highest_index_user:
+                next_index = max(next_index, highest_index_user[f"{currency}_address_index"] + 1)
+        return next_index
+
+    def _reserve_address_indices(self, count: int) -> int:
+        return counters.reserve("eth_address_index", count, floor=self._next_address_index)
 
     async def _generate_eth_address(self, user_id: int, currency: str) -> tuple[str | None, str | None]:
         """Generates or retrieves a unique ETH/USDT deposit address for the user."""
@@ -327,24 +462,7 @@ class EthUsdtDeposit(commands.Cog):
             return None, "METAMASK_SEED environment variable is not configured."
 
         try:
-            # Find the highest index used for this currency
-            highest_index_user = self.users_db.collection.find_one(
-                {f"{currency}_address_index": {"$exists": True}},
-                sort=[(f"{currency}_address_index", -1)]
-            )
-
-            last_global_index = -1
-            if highest_index_user and f"{currency}_address_index" in highest_index_user:
-                last_global_index = highest_index_user[f"{currency}_address_index"]
-
-            next_index = last_global_index + 1
-
-            # Derive address from seed phrase
-            account = Account.from_mnemonic(
-                METAMASK_SEED,
-                account_path=f"m/44'/60'/0'/0/{next_index}"
-            )
-            address = account.address
+            next_index, address = await self.address_pool.take()
 
             # Store the new address and index
             update_data = {
@@ -379,48 +497,68 @@ class EthUsdtDeposit(commands.Cog):
                 print(f"{Fore.RED}[!] User data not found for user {user_id} at start of deposit check.{Style.RESET_ALL}")
                 return "error", {"error": "User data not found."}
 
+            try:
+                current_block = await self.tip_height.get()
+            except Exception as e:
+                print(f"{Fore.RED}[!] Error fetching ETH block number: {e}{Style.RESET_ALL}")
+                return "error", {"error": "Failed to fetch block number."}
+
+            # Only blocks after the last settled one, so the response stays small as the address ages.
+            # Everything at least SCAN_MARGIN blocks deep is confirmed and credited by this check.
+            start_block = user_data.get(f'{currency}_scan_block', -1) + 1
+            scanned_to = current_block - SCAN_MARGIN
+
             # For ETH, check normal transactions
             # For USDT, check token transfers
-            ETHERSCAN_API_KEY = os.environ.get("ETHERSCAN_API_KEY")
+            params = {
+                "module": "account",
+                "address": address,
+                "startblock": start_block,
+                "endblock": 99999999,
+                "sort": "desc",
+                "apikey": ETHERSCAN_API_KEY
+            }
             if currency == "eth":
-                api_url = f"https://api.etherscan.io/api?module=account&action=txlist&address={address}&startblock=0&endblock=99999999&sort=desc&apikey={ETHERSCAN_API_KEY}"
+                params["action"] = "txlist"
             else:
-                api_url = f"https://api.etherscan.io/api?module=account&action=tokentx&contractaddress={USDT_CONTRACT_ADDRESS}&address={address}&startblock=0&endblock=99999999&sort=desc&apikey={ETHERSCAN_API_KEY}"
+                params["action"] = "tokentx"
+                params["contractaddress"] = USDT_CONTRACT_ADDRESS
 
             try:
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(api_url) as response:
-                        if response.status != 200:
-                            print(f"{Fore.RED}[!] Etherscan API Error ({response.status}) fetching transactions for {address}.{Style.RESET_ALL}")
-                            return "error", {"error": "Failed to check deposits. Please try again later."}
-
-                        data = await response.json()
-                        if data.get('status') != '1':
-                            error_msg = data.get('message', 'Etherscan API error')
-                            if "No transactions found" in error_msg:
-                                return "no_new", {}
-                            print(f"{Fore.RED}[!] Etherscan API returned error: {error_msg}{Style.RESET_ALL}")
-                            return "error", {"error": "Failed to check deposits. Please try again later."}
-
-                        transactions = data.get('result', [])
+                response = await http_client.get(ETHERSCAN_API_URL, params=params)
+                if response.status != 200:
+                    print(f"{Fore.RED}[!] Etherscan API Error ({response.status}) fetching transactions for {address}.{Style.RESET_ALL}")
+                    return "error", {"error": "Failed to check deposits. Please try again later."}
+
+                data = response.json()
+                if data.get('status') != '1':
+                    error_msg = data.get('message', 'Etherscan API error')
+                    if "No transactions found" in error_msg:
+                        return "no_new", {"scanned_to": scanned_to}
+                    print(f"{Fore.RED}[!] Etherscan API returned error: {error_msg}{Style.RESET_ALL}")
+                    return "error", {"error": "Failed to check deposits. Please try again later."}
+
+                transactions = data.get('result', [])
             except Exception as e:
                 print(f"{Fore.RED}[!] Error during API check for {address}: {e}{Style.RESET_ALL}")
                 return "error", {"error": f"API request failed: {e}"}
 
             if not transactions:
-                return "no_new", {}
+                return "no_new", {"scanned_to": scanned_to}
 
             history = user_data.get('history', [])
             processed_txids = {entry.get('txid') for entry in history if entry and entry.get('type') == f'{currency}_deposit'}
+            processed_txids.update(user_data.get(f'processed_{currency}_txids', []))
 
             new_deposits = []
             first_pending_tx = None
-            current_block = self.w3.eth.block_number
 
             for tx in transactions:
                 txid = tx.get('hash')
                 if not txid or txid in processed_txids:
                     continue
+                if not is_incoming_transfer(tx, address, currency):
+                    continue
 
                 # For ETH: value is in wei
                 # For USDT: value is in the token decimals (6 for USDT)
@@ -453,14 +591,11 @@ class EthUsdtDeposit(commands.Cog):
                 })
 
             if new_deposits:
-                return "success", {
-                    "deposits": new_deposits,
-                    "points_credited": sum(deposit['amount_crypto'] / (ETH_CONVERSION_RATE if currency == 'eth' else USDT_CONVERSION_RATE) for deposit in new_deposits)
-                }
+                return "success", {"deposits": new_deposits, "scanned_to": scanned_to}
             elif first_pending_tx:
-                return "pending", first_pending_tx
+                return "pending", dict(first_pending_tx, scanned_to=scanned_to)
             else:
-                return "no_new", {}
+                return "no_new", {"scanned_to": scanned_to}
 
         except Exception as e:
             print(f"{Fore.RED}[!] Error in _check_for_deposits for user {user_id}: {e}{Style.RESET_ALL}")
@@ -540,7 +675,7 @@ class EthUsdtDeposit(commands.Cog):
 
         # Generate QR code
         try:
-            qr_buffer = await asyncio.to_thread(generate_qr_code, address, ctx.author.name, currency)
+            qr_buffer = io.BytesIO(await deposit_cards.get(f"{currency}:{address}:{ctx.author.name}", generate_qr_code, address, ctx.author.name, currency))
         except Exception as e:
             print(f"{Fore.RED}[!] Error generating QR code for user {user_id}: {e}{Style.RESET_ALL}")
             qr_buffer = None
@@ -578,6 +713,7 @@ class EthUsdtDeposit(commands.Cog):
 
         view.message = message
         self.active_deposit_views[user_id] = view
+        self.watchers[currency].watch(user_id, address)
 
 def setup(bot):
     bot.add_cog(EthUsdtDeposit(bot))
\ No newline at end of file
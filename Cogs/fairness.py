@@ -0,0 +1,121 @@
+import discord
+from discord.ext import commands
+from Cogs.utils.provably_fair import get_fair, verify, hash_seed, OUTCOMES
+
+
+class Fairness(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        self.fair = get_fair()
+
+    @commands.command(aliases=["seed", "fair"])
+    async def seeds(self, ctx):
+        """View your active provably fair seeds"""
+        pair = self.fair.get_pair(ctx.author.id)
+        embed = discord.Embed(
+            title="🔐 | Provably Fair Seeds",
+            description=(
+                f"**Server Seed (hashed):** `{self.fair.server_seed_hash(pair)}`\n"
+                f"**Client Seed:** `{pair['client_seed']}`\n"
+                f"**Next Nonce:** `{pair['nonce']}`\n\n"
+                "Use `!rotateseed [client seed]` to reveal this server seed and start a new one.\n"
+                "Use `!verify <game> <server seed> <client seed> <nonce>` to check a bet."
+            ),
+            color=0x00FFAE
+        )
+        previous = pair.get("previous")
+        if previous and previous.get("server_seed"):
+            embed.add_field(
+                name="Previous Pair (revealed)",
+                value=(
+                    f"**Server Seed:** `{previous['server_seed']}`\n"
+                    f"**Client Seed:** `{previous['client_seed']}`\n"
+                    f"**Bets Made:** `{previous['nonce']}`"
+                ),
+                inline=False
+            )
+        embed.set_footer(text="BetSync Casino", icon_url=self.bot.user.avatar.url)
+        await ctx.reply(embed=embed)
+
+    @commands.command(aliases=["rotate", "newseed"])
+    async def rotateseed(self, ctx, client_seed: str = None):
+        """Reveal your current server seed and generate a new pair"""
+        if client_seed and len(client_seed) > 64:
+            embed = discord.Embed(
+                title="<:no:1344252518305234987> | Invalid Client Seed",
+                description="Client seed must be at most 64 characters.",
+                color=0xFF0000
+            )
+            return await ctx.reply(embed=embed)
+
+        old, new = self.fair.rotate(ctx.author.id, client_seed)
+        embed = discord.Embed(
+            title="🔄 | Seeds Rotated",
+            color=0x00FFAE
+        )
+        embed.add_field(
+            name="Previous Pair (revealed)",
+            value=(
+                f"**Server Seed:** `{old['server_seed']}`\n"
+                f"**Server Seed Hash:** `{hash_seed(old['server_seed'])}`\n"
+                f"**Client Seed:** `{old['client_seed']}`\n"
+                f"**Bets Made:** `{old['nonce']}`"
+            ),
+            inline=False
+        )
+        embed.add_field(
+            name="New Pair",
+            value=(
+                f"**Server Seed (hashed):** `{self.fair.server_seed_hash(new)}`\n"
+                f"**Client Seed:** `{new['client_seed']}`"
+            ),
+            inline=False
+        )
+        embed.set_footer(text="BetSync Casino", icon_url=self.bot.user.avatar.url)
+        await ctx.reply(embed=embed)
+
+    @commands.command()
+    async def verify(self, ctx, game: str = None, server_seed: str = None, client_seed: str = None, nonce: int = None):
+        """Recompute the outcome of a bet from its revealed seeds"""
+        if not game or not server_seed or client_seed is None or nonce is None:
+            embed = discord.Embed(
+                title="🔍 How to Verify a Bet",
+                description=(
+                    "**Usage:** `!verify <game> <server seed> <client seed> <nonce>`\n"
+                    f"**Games:** {', '.join(f'`{name}`' for name in OUTCOMES)}\n\n"
+                    "- **Server seeds are revealed with `!rotateseed`**\n"
+                    "- **Each bet's client seed and nonce are saved in your history**"
+                ),
+                color=0x00FFAE
+            )
+            embed.set_footer(text="BetSync Casino", icon_url=self.bot.user.avatar.url)
+            return await ctx.reply(embed=embed)
+
+        try:
+            outcome, digest = verify(game.lower(), server_seed, client_seed, nonce)
+        except ValueError as e:
+            embed = discord.Embed(
+                title="<:no:1344252518305234987> | Verification Failed",
+                description=str(e) if "Unknown game" in str(e) else "Server seed must be a hex string.",
+                color=0xFF0000
+            )
+            return await ctx.reply(embed=embed)
+
+        embed = discord.Embed(
+            title="<:yes:1355501647538815106> | Bet Verified",
+            description=(
+                f"**Game:** {game.lower()}\n"
+                f"**Server Seed Hash:** `{hash_seed(server_seed)}`\n"
+                f"**Client Seed:** `{client_seed}`\n"
+                f"**Nonce:** `{nonce}`\n"
+                f"**HMAC:** `{digest}`\n\n"
+                f"**Outcome:** `{outcome}`"
+            ),
+            color=0x00FF00
+        )
+        embed.set_footer(text="BetSync Casino", icon_url=self.bot.user.avatar.url)
+        await ctx.reply(embed=embed)
+
+
+def setup(bot):
+    bot.add_cog(Fairness(bot))
@@ -2,10 +2,11 @@ import os
 import requests
 import discord
 import json
+import asyncio
 import datetime
 from discord.ext import commands
 from Cogs.utils.emojis import emoji
-from Cogs.utils.mongo import Users, Servers
+from Cogs.utils.mongo import Users, Servers, transfers, ledger
 from colorama import Fore, Back, Style
 
 class Fetches(commands.Cog):
@@ -1205,17 +1206,22 @@ class Fetches(commands.Cog):
             rn = datetime.datetime.now().strftime("%X")
             print(f"{Back.CYAN}  {Style.DIM}{self.user_id}{Style.RESET_ALL}{Back.RESET}{Fore.CYAN}{Fore.WHITE}    {Fore.LIGHTWHITE_EX}{rn}{Fore.WHITE}    {Style.BRIGHT}{Fore.GREEN}Claiming {rakeback_tokens:.2f} rakeback tokens{Style.RESET_ALL}  {Fore.MAGENTA}rakeback_claim{Fore.WHITE}")
 
-            # Update rakeback tokens to 0
-            update_result = db.collection.update_one(
-                {"discord_id": self.user_id},
-                {"$set": {"rakeback_tokens": 0}}
+            # Move the rakeback into points in one update, rakeback earned meanwhile stays
+            transfer, error = await asyncio.to_thread(
+                transfers.transfer,
+                "rakeback_claim",
+                from_id=self.user_id,
+                debit={"rakeback_tokens": rakeback_tokens},
+                to_id=self.user_id,
+                credit={"points": rakeback_tokens},
+                history=(None, {"type": "rakeback_claim", "amount": rakeback_tokens, "currency": "points"}),
+                key=f"rakeback:{interaction.id}"
             )
-
-            # Add the rakeback tokens to user's tokens
-            balance_result = db.update_balance(self.user_id, rakeback_tokens, operation="$inc")
+            if error:
+                return await interaction.response.send_message("Your rakeback was already claimed!", ephemeral=True)
 
             # Log after claiming
-            print(f"{Back.GREEN}  {Style.DIM}{self.user_id}{Style.RESET_ALL}{Back.RESET}{Fore.GREEN}    SUCCESS    {Fore.WHITE}Rakeback claimed: {rakeback_tokens:.2f} points | DB updates: {update_result.modified_count}, {balance_result}{Style.RESET_ALL}")
+            print(f"{Back.GREEN}  {Style.DIM}{self.user_id}{Style.RESET_ALL}{Back.RESET}{Fore.GREEN}    SUCCESS    {Fore.WHITE}Rakeback claimed: {rakeback_tokens:.2f} points | Transfer: {transfer['_id']}{Style.RESET_ALL}")
 
             # Disable the button
             for child in self.children:
@@ -1508,6 +1514,7 @@ class Fetches(commands.Cog):
                 }
             }
         )
+        ledger.record(ctx.author.id, new_points - current_points, "currency_switch", new_currency)
 
         embed = discord.Embed(
             title="<:yes:1355501647538815106> | Primary Currency Updated",
@@ -1622,6 +1629,7 @@ class CurrencyDropdownView(discord.ui.View):
                 }
             }
         )
+        ledger.record(self.user_id, new_points - current_points, "currency_switch", selected_currency)
 
         embed = discord.Embed(
             title="<:yes:1355501647538815106> | Primary Currency Updated",
@@ -5,6 +5,7 @@ import random
 import datetime
 from discord.ext import commands
 from Cogs.utils.mongo import Users, Servers
+from Cogs.utils.game_sessions import sessions
 from Cogs.utils.emojis import emoji
 
 class BaccaratView(discord.ui.View):
@@ -33,7 +34,7 @@ class BaccaratView(discord.ui.View):
 class BaccaratGame(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.ongoing_games = {}
+        self.ongoing_games = sessions.registry("baccarat")
         self.card_ranks = ['A', '2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K']
         self.card_suits = ['hearts', 'diamonds', 'clubs', 'spades']
 
@@ -95,7 +96,7 @@ class BaccaratGame(commands.Cog):
             return await ctx.reply(embed=embed)
             
         # Check if the user already has an ongoing game
-        if ctx.author.id in self.ongoing_games:
+        if not await self.ongoing_games.reserve(ctx.author.id):
             embed = discord.Embed(
                 title="<:no:1344252518305234987> | Game In Progress",
                 description="You already have an ongoing game. Please finish it first.",
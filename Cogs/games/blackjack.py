@@ -6,6 +6,8 @@ import datetime
 from PIL import Image, ImageDraw, ImageFont
 from discord.ext import commands
 from Cogs.utils.mongo import Users, Servers
+from Cogs.utils.metrics import timed
+from Cogs.utils.game_sessions import sessions
 from Cogs.utils.emojis import emoji
 
 # Card values
@@ -421,7 +423,7 @@ class BlackjackView(discord.ui.View):
 class Blackjack(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.ongoing_games = {}
+        self.ongoing_games = sessions.registry("blackjack")
 
     @commands.command(aliases=["bj", "21"])
     async def blackjack(self, ctx, bet_amount: str = None):
@@ -455,7 +457,7 @@ class Blackjack(commands.Cog):
             return await ctx.reply(embed=embed)
 
         # Check if the user already has an ongoing game
-        if ctx.author.id in self.ongoing_games:
+        if not await self.ongoing_games.reserve(ctx.author.id):
             embed = discord.Embed(
                 title="<:no:1344252518305234987> | Game In Progress",
                 description="You already have an ongoing game. Please finish it first.",
@@ -626,6 +628,7 @@ class Blackjack(commands.Cog):
                 pass
             await ctx.reply(embed=error_embed)
 
+    @timed("render", "blackjack_table")
     async def generate_game_image(self, player_cards, dealer_cards, show_dealer=False):
         """Generate game image showing card hands, styled like the provided image"""
         # Image dimensions and settings
@@ -6,6 +6,7 @@ import time
 import datetime
 from discord.ext import commands
 from Cogs.utils.mongo import Users, Servers
+from Cogs.utils.game_sessions import sessions
 from colorama import Fore
 
 class PlayAgainView(discord.ui.View):
@@ -444,7 +445,7 @@ class BuildGameView(discord.ui.View):
 class BuildCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.ongoing_games = {}
+        self.ongoing_games = sessions.registry("build")
 
     @commands.command(aliases=["builder", "construct"])
     async def build(self, ctx, bet_amount: str = None):
@@ -468,7 +469,7 @@ class BuildCog(commands.Cog):
             embed.set_footer(text="BetSync Casino • Aliases: !builder, !tower, !construct")
             return await ctx.reply(embed=embed)
 
-        if ctx.author.id in self.ongoing_games:
+        if not await self.ongoing_games.reserve(ctx.author.id):
             embed = discord.Embed(
                 title="<:no:1344252518305234987> | Game In Progress",
                 description="You already have an ongoing construction project. Please finish it first.",
@@ -511,6 +512,7 @@ class BuildCog(commands.Cog):
         self.ongoing_games[ctx.author.id] = {
             "game_type": "build",
             "game_view": game_view,
+            "bet_amount": game_view.bet_amount,
             "start_time": time.time()
         }
 
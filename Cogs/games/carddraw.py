@@ -4,6 +4,7 @@ import random
 import asyncio
 from discord.ext import commands
 from Cogs.utils.mongo import Users
+from Cogs.utils.metrics import timed
 from Cogs.utils.emojis import emoji
 from Cogs.utils.currency_helper import process_bet_amount
 from PIL import Image, ImageDraw, ImageFont
@@ -424,6 +425,7 @@ class CardDraw(commands.Cog):
         suit = random.choice(self.card_suits)
         return (value, suit)
     
+    @timed("render", "carddraw_table")
     async def generate_game_image(self, player1, player2, player1_card, player2_card):
         """Generate an image showing the card draw game result"""
         # Create image with dark background
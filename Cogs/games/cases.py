@@ -7,6 +7,7 @@ import asyncio
 from PIL import Image, ImageDraw, ImageFont
 from discord.ext import commands
 from Cogs.utils.mongo import Users, Servers
+from Cogs.utils.metrics import timed
 from Cogs.utils.emojis import emoji
 
 class CasesPlayAgainView(discord.ui.View):
@@ -81,6 +82,7 @@ class CasesCog(commands.Cog):
             print(f"Warning: Font file {self.font_path} not found, using default font")
             self.font_path = None
 
+    @timed("render", "cases_result")
     def generate_result_image(self, selected_multiplier, user_name=None):
         """Generate an image showing the case opening result in a modern style"""
         # Set up the image dimensions - wider, less height
@@ -355,6 +357,7 @@ class CasesCog(commands.Cog):
 
         return buffer
 
+    @timed("render", "cases_case")
     async def generate_case_image(self, selected_multiplier):
         """Generates a case opening result image."""
         buffer = self.generate_result_image(selected_multiplier)
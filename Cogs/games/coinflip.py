@@ -4,7 +4,9 @@ import random
 import time
 from discord.ext import commands
 from Cogs.utils.mongo import Users, Servers
+from Cogs.utils.game_sessions import sessions
 from Cogs.utils.emojis import emoji
+from Cogs.utils.provably_fair import get_fair, coinflip_outcome
 
 
 class PlayAgainView(discord.ui.View):
@@ -75,7 +77,7 @@ class PlayAgainView(discord.ui.View):
 class CoinflipCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.ongoing_games = {}
+        self.ongoing_games = sessions.registry("coinflip")
 
     @commands.command(aliases=["cf", "coin", "flip"])
     async def coinflip(self, ctx, bet_amount: str = None, side=None):
@@ -97,7 +99,7 @@ class CoinflipCog(commands.Cog):
             return await ctx.reply(embed=embed)
 
         # Check if the user already has an ongoing game
-        if ctx.author.id in self.ongoing_games:
+        if not await self.ongoing_games.reserve(ctx.author.id):
             embed = discord.Embed(
                 title="<:no:1344252518305234987> | Game In Progress",
                 description="You already have an ongoing game. Please finish it first.",
@@ -192,9 +194,9 @@ class CoinflipCog(commands.Cog):
             # Wait for dramatic effect
             await asyncio.sleep(2)
 
-            # Reset random seed and determine the result
-            random.seed()
-            result = random.choice(['heads', 'tails'])
+            # Determine the result from the user's provably fair seeds
+            fair_bet = get_fair().next_bet(ctx.author.id)
+            result = coinflip_outcome(fair_bet.digest)
 
             # Use custom coin emojis
             heads_emoji = "<:heads:1344974756448833576>"
@@ -240,7 +242,8 @@ class CoinflipCog(commands.Cog):
                     "amount": win_amount,
                     "bet": bet_amount_value,
                     "multiplier": multiplier,
-                    "timestamp": timestamp
+                    "timestamp": timestamp,
+                    "fair": fair_bet.proof()
                 }
             else:
                 history_entry = {
@@ -249,7 +252,8 @@ class CoinflipCog(commands.Cog):
                     "amount": bet_amount_value,
                     "bet": bet_amount_value,
                     "multiplier": 0,
-                    "timestamp": timestamp
+                    "timestamp": timestamp,
+                    "fair": fair_bet.proof()
                 }
 
             db = Users()  # Reinstantiate db
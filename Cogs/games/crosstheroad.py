@@ -4,6 +4,7 @@ import asyncio
 import time
 from discord.ext import commands
 from Cogs.utils.mongo import Users, Servers
+from Cogs.utils.game_sessions import sessions
 from colorama import Fore
 from Cogs.utils.emojis import emoji
 
@@ -358,7 +359,7 @@ class CrossTheRoadGame(discord.ui.View):
 class CrossTheRoadCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.ongoing_games = {}
+        self.ongoing_games = sessions.registry("crosstheroad")
 
     @commands.command(aliases=["ctr", "chicken", "road"])
     async def crosstheroad(self, ctx, bet_amount: str = None, difficulty: str = None):
@@ -383,7 +384,7 @@ class CrossTheRoadCog(commands.Cog):
             return await ctx.reply(embed=embed)
 
         # Check if the user already has an ongoing game
-        if ctx.author.id in self.ongoing_games:
+        if not await self.ongoing_games.reserve(ctx.author.id):
             embed = discord.Embed(
                 title="<:no:1344252518305234987> | Game In Progress",
                 description="You already have an ongoing game. Please finish it first.",
@@ -447,6 +448,7 @@ class CrossTheRoadCog(commands.Cog):
         self.ongoing_games[ctx.author.id] = {
             "game_type": "crosstheroad",
             "game_view": game_view,
+            "bet_amount": game_view.bet_amount,
             "start_time": time.time()
         }
 
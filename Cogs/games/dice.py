@@ -4,7 +4,9 @@ import time
 import asyncio
 from discord.ext import commands
 from Cogs.utils.mongo import Users, Servers
+from Cogs.utils.game_sessions import sessions
 from Cogs.utils.emojis import emoji
+from Cogs.utils.provably_fair import get_fair, dice_outcome
 
 class PlayAgainView(discord.ui.View):
     def __init__(self, cog, ctx, bet_amount):
@@ -41,7 +43,7 @@ class PlayAgainView(discord.ui.View):
 class DiceCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.ongoing_games = {}
+        self.ongoing_games = sessions.registry("dice")
 
     @commands.command(aliases=["dice", "roll", "d"])
     async def dicegame(self, ctx, bet_amount: str = None):
@@ -64,7 +66,7 @@ class DiceCog(commands.Cog):
             return await ctx.reply(embed=embed)
 
         # Check if the user already has an ongoing game
-        if ctx.author.id in self.ongoing_games:
+        if not await self.ongoing_games.reserve(ctx.author.id):
             embed = discord.Embed(
                 title="<:no:1344252518305234987> | Game In Progress",
                 description="You already have an ongoing game. Please finish it first.",
@@ -130,9 +132,10 @@ class DiceCog(commands.Cog):
             if curse_cog and curse_cog.is_player_cursed(ctx.author.id):
                 player_cursed = True
 
-            # Random dice rolls for player and dealer (1-6)
-            user_roll = random.randint(1, 6)
-            dealer_roll = random.randint(1, 6)
+            # Dice rolls for player and dealer (1-6) from the user's provably fair seeds
+            fair_bet = get_fair().next_bet(ctx.author.id)
+            user_roll, dealer_roll = dice_outcome(fair_bet.digest)
+            fair_proof = fair_bet.proof()
 
             # Force loss if player is cursed
             if player_cursed:
@@ -140,6 +143,8 @@ class DiceCog(commands.Cog):
                 if user_roll >= dealer_roll:
                     dealer_roll = user_roll + random.randint(1, 6 - user_roll) if user_roll < 6 else 6
                     user_roll = random.randint(1, dealer_roll - 1) if dealer_roll > 1 else 1
+                    # These rolls don't come from the seeds, so the bet must not claim a proof
+                    fair_proof = None
 
             # Use custom dice emojis
             dice_emojis = {
@@ -262,7 +267,9 @@ class DiceCog(commands.Cog):
                     "multiplier": tie_multiplier,
                     "user_roll": user_roll,
                     "dealer_roll": dealer_roll,
-                    "timestamp": timestamp
+                    "timestamp": timestamp,
+                    "fair": fair_proof,
+                    "provably_fair": fair_proof is not None
                 }
             elif user_won:
                 history_entry = {
@@ -273,7 +280,9 @@ class DiceCog(commands.Cog):
                     "multiplier": win_multiplier,
                     "user_roll": user_roll,
                     "dealer_roll": dealer_roll,
-                    "timestamp": timestamp
+                    "timestamp": timestamp,
+                    "fair": fair_proof,
+                    "provably_fair": fair_proof is not None
                 }
             else:
                 history_entry = {
@@ -284,7 +293,9 @@ class DiceCog(commands.Cog):
                     "multiplier": 0,
                     "user_roll": user_roll,
                     "dealer_roll": dealer_roll,
-                    "timestamp": timestamp
+                    "timestamp": timestamp,
+                    "fair": fair_proof,
+                    "provably_fair": fair_proof is not None
                 }
 
             db.update_history(ctx.author.id, history_entry)
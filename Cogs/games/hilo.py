@@ -8,6 +8,8 @@ import io
 from PIL import Image, ImageDraw, ImageFont
 from discord.ext import commands
 from Cogs.utils.mongo import Users, Servers
+from Cogs.utils.metrics import timed
+from Cogs.utils.game_sessions import sessions
 from Cogs.utils.emojis import emoji
 
 class PlayAgainView(discord.ui.View):
@@ -607,9 +609,10 @@ class HiLoView(discord.ui.View):
 class HiLo(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.ongoing_games = {}
+        self.ongoing_games = sessions.registry("hilo")
         self.card_cache = {}  # Cache for loaded card images
 
+    @timed("render", "hilo_table")
     async def create_game_image(self, current_card, previous_cards, high_profit, low_profit, total_profit, 
                                game_over=False, lost_choice=None, cashed_out=False, current_winnings=0):
         """Generate the game image similar to the provided example"""
@@ -931,7 +934,7 @@ class HiLo(commands.Cog):
             return await ctx.reply(embed=embed)
 
         # Check if the user already has an ongoing game
-        if ctx.author.id in self.ongoing_games:
+        if not await self.ongoing_games.reserve(ctx.author.id):
             embed = discord.Embed(
                 title="<:no:1344252518305234987> | Game In Progress",
                 description="You already have an ongoing game. Please finish it first.",
@@ -963,6 +966,12 @@ class HiLo(commands.Cog):
 
             # Set up the game
             tu = bet_info["tokens_used"]
+
+            # Mark the game as ongoing with its stake, so an interrupted game is refunded
+            self.ongoing_games[ctx.author.id] = {
+                "tokens_used": tu,
+                "bet_amount": bet_info["total_bet_amount"]
+            }
             
             currency_used = "points"
             # Update loading message to indicate progress
@@ -1003,9 +1012,6 @@ class HiLo(commands.Cog):
             file = discord.File(fp=game_image, filename="hilo_game.png")
             embed.set_image(url="attachment://hilo_game.png")
 
-            # Mark user as having an ongoing game
-            self.ongoing_games[ctx.author.id] = "hilo"
-
             # Send the game message
             message = await ctx.reply(embed=embed, file=file, view=view)
             view.message = message
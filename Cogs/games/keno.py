@@ -9,6 +9,8 @@ import numpy as np
 from PIL import Image, ImageDraw, ImageFont
 from discord.ext import commands
 from Cogs.utils.mongo import Users, Servers
+from Cogs.utils.metrics import timed
+from Cogs.utils.game_sessions import sessions
 from Cogs.utils.emojis import emoji
 from colorama import Fore
 
@@ -26,6 +28,7 @@ PAYOUTS = {
     10: {1: 0.0, 2: 0.0, 3: 0.5, 4: 2.0, 5: 20.0}
 }
 
+@timed("render", "keno_paytable")
 def generate_paytable_image():
     """Generate a visually appealing payout table image"""
     # Image dimensions and settings - larger size for better fit
@@ -379,7 +382,7 @@ PROBABILITIES = {
 class Keno(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.ongoing_games = {}
+        self.ongoing_games = sessions.registry("keno")
         
     @commands.command(aliases=["k"])
     async def keno(self, ctx, bet_amount: str = None):
@@ -415,7 +418,7 @@ class Keno(commands.Cog):
             return await ctx.reply(embed=embed, file=paytable_file)
             
         # Check if the user already has an ongoing game
-        if ctx.author.id in self.ongoing_games:
+        if not await self.ongoing_games.reserve(ctx.author.id):
             embed = discord.Embed(
                 title="<:no:1344252518305234987> | Game In Progress",
                 description="You already have an ongoing game. Please finish it first.",
@@ -660,6 +663,7 @@ class Keno(commands.Cog):
         
         return img_byte_array
     
+    @timed("render", "keno_board")
     async def generate_keno_image(self, selected_numbers, winning_numbers=None, game_over=False):
         """Generate the Keno board image"""
         # Set colors
@@ -1,12 +1,14 @@
 import discord
-import random
 import asyncio
 import time
 import io
 from PIL import Image, ImageDraw, ImageFont
 from discord.ext import commands
 from Cogs.utils.mongo import Users, Servers
+from Cogs.utils.metrics import timed
+from Cogs.utils.game_sessions import sessions, DEFAULT_TTL
 from Cogs.utils.emojis import emoji
+from Cogs.utils.provably_fair import get_fair, limbo_outcome
 
 class LimboGame:
     def __init__(self, cog, ctx, bet_amount, target_multiplier, user_id, rolls=None):
@@ -145,11 +147,9 @@ class LimboGame:
                 # Stop simulation if we run out of funds
                 break
 
-            # Roll the multiplier (with 15% house edge)
-            # The formula: rolled_mult = 1.0 / (1.0 - R) where R is [0, 0.85)
-            r = random.random() * 0.85
-            rolled_multiplier = 1.0 / (1.0 - r)
-            rounded_multiplier = round(rolled_multiplier, 2)  # Round to 2 decimal places
+            # Roll the multiplier (with 15% house edge) from the user's provably fair seeds
+            fair_bet = get_fair().next_bet(self.user_id)
+            rounded_multiplier = limbo_outcome(fair_bet.digest)
 
             # Determine if user won
             won = rounded_multiplier >= self.target_multiplier
@@ -183,6 +183,7 @@ class LimboGame:
                     "bet": self.bet_amount,
                     "multiplier": self.target_multiplier,
                     "rolled_multiplier": rounded_multiplier,
+                    "fair": fair_bet.proof(),
                     "timestamp": current_timestamp
                 }
                 win_entries.append(win_entry)
@@ -200,6 +201,7 @@ class LimboGame:
                     "multiplier": 0,
                     "target_multiplier": self.target_multiplier,
                     "rolled_multiplier": rounded_multiplier,
+                    "fair": fair_bet.proof(),
                     "timestamp": current_timestamp
                 }
                 loss_entries.append(loss_entry)
@@ -288,11 +290,9 @@ class LimboGame:
                     #credits_used = self.credits_used
                     is_first_bet = False  # Mark first bet as processed
 
-                # Roll the multiplier (with 15% house edge)
-                # The formula: rolled_mult = 1.0 / (1.0 - R) where R is [0, 0.85)
-                r = random.random() * 0.85
-                rolled_multiplier = 1.0 / (1.0 - r)
-                rounded_multiplier = round(rolled_multiplier, 2)  # Round to 2 decimal places
+                # Roll the multiplier (with 15% house edge) from the user's provably fair seeds
+                fair_bet = get_fair().next_bet(self.user_id)
+                rounded_multiplier = limbo_outcome(fair_bet.digest)
 
                 # Determine if user won
                 won = rounded_multiplier >= self.target_multiplier
@@ -322,6 +322,7 @@ class LimboGame:
                         "bet": self.bet_amount,
                         "multiplier": self.target_multiplier,
                         "rolled_multiplier": rounded_multiplier,
+                        "fair": fair_bet.proof(),
                         "timestamp": int(time.time())
                     }
                     #win_entries.append(win_entry) # This is auto mode, so no win_entries list
@@ -345,6 +346,7 @@ class LimboGame:
                         "multiplier": 0,
                         "target_multiplier": self.target_multiplier,
                         "rolled_multiplier": rounded_multiplier,
+                        "fair": fair_bet.proof(),
                         "timestamp": int(time.time())
                     }
                     #loss_entries.append(loss_entry) # This is auto mode, so no loss_entries list
@@ -428,6 +430,7 @@ class LimboGame:
         embed.set_footer(text="BetSync Casino • Limbo", icon_url=self.ctx.bot.user.avatar.url)
         return embed
 
+    @timed("render", "limbo_multiplier")
     async def generate_multiplier_image(self, multiplier, won):
         """Generate an image showing the multiplier in BetRush style"""
         # Create a new image with dark background
@@ -530,7 +533,8 @@ class LimboGame:
 
 class LimboControlView(discord.ui.View):
     def __init__(self, game, show_cashout=True):
-        super().__init__(timeout=None)
+        # Expire with the game's session rather than outliving it
+        super().__init__(timeout=DEFAULT_TTL)
         self.game = game
 
         # Only add cashout button if needed
@@ -544,6 +548,13 @@ class LimboControlView(discord.ui.View):
             ))
             self.children[0].callback = self.cash_out
 
+    async def on_timeout(self):
+        """Stop an auto game once it outlives its session TTL"""
+        self.game.stop_game()
+        # The user may have started another game since this one ended
+        if self.game.cog.ongoing_games.get(self.game.user_id) is self.game:
+            del self.game.cog.ongoing_games[self.game.user_id]
+
     async def cash_out(self, interaction: discord.Interaction):
         if interaction.user.id != self.game.user_id:
             return await interaction.response.send_message("This is not your game!", ephemeral=True)
@@ -580,7 +591,7 @@ class LimboControlView(discord.ui.View):
 class LimboCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.ongoing_games = {}
+        self.ongoing_games = sessions.registry("limbo")
 
     @commands.command(aliases=["l", "crash", "cr"])
     async def limbo(self, ctx, bet_amount: str = None, target_multiplier: str = None, rolls_or_currency: str = None):
@@ -605,7 +616,7 @@ class LimboCog(commands.Cog):
             return await ctx.reply(embed=embed)
 
         # Check if user already has an active game
-        if ctx.author.id in self.ongoing_games:
+        if not await self.ongoing_games.reserve(ctx.author.id):
             embed = discord.Embed(
                 title="<:no:1344252518305234987> | Game In Progress",
                 description="You already have an ongoing game. Please finish it first.",
@@ -5,6 +5,7 @@ import datetime
 import time
 from discord.ext import commands
 from Cogs.utils.mongo import Users
+from Cogs.utils.game_sessions import sessions
 from Cogs.utils.emojis import emoji
 
 class MatchGame:
@@ -211,7 +212,7 @@ class MatchGameView(discord.ui.View):
 class Match(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.ongoing_games = {}
+        self.ongoing_games = sessions.registry("match")
         self.ctx = None
 
     @commands.command(aliases=["mat", "matchgame"])
@@ -238,7 +239,7 @@ class Match(commands.Cog):
             return await ctx.reply(embed=embed)
 
         # Check for active game
-        if ctx.author.id in self.ongoing_games:
+        if not await self.ongoing_games.reserve(ctx.author.id):
             embed = discord.Embed(
                 title="<:no:1344252518305234987> | Game In Progress",
                 description="You already have an ongoing game. Please finish it first.",
@@ -4,6 +4,7 @@ import random
 import time
 from discord.ext import commands
 from Cogs.utils.mongo import Users, Servers
+from Cogs.utils.game_sessions import sessions
 from Cogs.utils.emojis import emoji
 from Cogs.utils.currency_helper import process_bet_amount
 
@@ -554,7 +555,7 @@ class MinesTileView(discord.ui.View):
 class MinesCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.ongoing_games = {}
+        self.ongoing_games = sessions.registry("mines")
         self.cursed_players = set()  # Players cursed with bad luck
 
     @commands.Cog.listener()
@@ -629,7 +630,7 @@ class MinesCog(commands.Cog):
             return await ctx.reply(embed=embed)
 
         # Check if the user already has an ongoing game
-        if ctx.author.id in self.ongoing_games:
+        if not await self.ongoing_games.reserve(ctx.author.id):
             embed = discord.Embed(
                 title="<:no:1344252518305234987> | Game In Progress",
                 description="You already have an ongoing game. Please finish it first.",
@@ -4,6 +4,7 @@ import random
 from discord.ext import commands
 from datetime import datetime
 from Cogs.utils.mongo import Users, Servers
+from Cogs.utils.game_sessions import sessions
 import uuid
 
 class RoleSelectionView(discord.ui.View):
@@ -193,7 +194,7 @@ class PlayAgainView(discord.ui.View):
 class PenaltyCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.ongoing_games = {}  # Now uses game_id instead of user_id
+        self.ongoing_games = sessions.registry("penalty")  # Now uses game_id instead of user_id
 
     @commands.command(aliases=["pen", "pk"])
     async def penalty(self, ctx, bet_amount: str = None, role: str = None, direction: str = None):
@@ -6,6 +6,8 @@ from typing import List, Tuple
 from discord.ext import commands
 from PIL import Image, ImageDraw, ImageFont
 from Cogs.utils.mongo import Users, Servers
+from Cogs.utils.metrics import timed
+from Cogs.utils.game_sessions import sessions
 import datetime
 
 # Define multiplier tables from the provided data
@@ -269,6 +271,7 @@ class PlinkoGame:
 
         return path, final_pos
 
+    @timed("render", "plinko_board")
     def generate_board_image(self) -> io.BytesIO:
         """Generate a visual representation of the Plinko board"""
         # Constants for board rendering - Adjust size based on row count
@@ -636,7 +639,7 @@ class PlinkoView(discord.ui.View):
 class Plinko(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.ongoing_games = {}  # Store ongoing games for each user
+        self.ongoing_games = sessions.registry("plinko")  # Store ongoing games for each user
 
     @commands.command(aliases=["plk"])
     async def plinko(self, ctx, bet_amount: str = None, difficulty: str = None, rows: str = None):
@@ -669,6 +672,13 @@ class Plinko(commands.Cog):
                         color=0xFF0000
                     )
                     return await ctx.reply(embed=embed)
+        if not await self.ongoing_games.reserve(ctx.author.id):
+            embed = discord.Embed(
+                title="❌ Game Already Running",
+                description="You already have an ongoing Plinko game. Please finish it before starting a new one.",
+                color=0xFF0000
+            )
+            return await ctx.reply(embed=embed)
 
         # Import currency helper
         from Cogs.utils.currency_helper import process_bet_amount
@@ -8,6 +8,8 @@ import io
 
 from discord.ext import commands
 from Cogs.utils.mongo import Users, Servers
+from Cogs.utils.metrics import timed
+from Cogs.utils.game_sessions import sessions
 from Cogs.utils.emojis import emoji
 
 # Define the paytable with multipliers for each hand type
@@ -191,8 +193,9 @@ class PlayAgainView(discord.ui.View):
 class Poker(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.ongoing_games = {}
+        self.ongoing_games = sessions.registry("poker")
 
+    @timed("render", "poker_hand")
     async def generate_game_image(self, cards, held_cards, is_final=False, win_type=None):
         # Create background with modern gray
         width, height = 1000, 500
@@ -494,7 +497,7 @@ class Poker(commands.Cog):
             return await ctx.reply(embed=embed)
 
         # Check if the user already has an ongoing game
-        if ctx.author.id in self.ongoing_games:
+        if not await self.ongoing_games.reserve(ctx.author.id):
             embed = discord.Embed(
                 title="<:no:1344252518305234987> | Game In Progress",
                 description="You already have an ongoing game. Please finish it first.",
@@ -4,6 +4,7 @@ import random
 import time
 from discord.ext import commands
 from Cogs.utils.mongo import Users, Servers
+from Cogs.utils.game_sessions import sessions
 from Cogs.utils.emojis import emoji
 
 class PCFView(discord.ui.View):
@@ -361,7 +362,7 @@ class ContinueOrCashoutView(discord.ui.View):
 class ProgressiveCoinflipCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.ongoing_games = {}
+        self.ongoing_games = sessions.registry("progressivecf")
 
     @commands.command(aliases=["pcf"])
     async def progressivecf(self, ctx, bet_amount: str = None):
@@ -389,7 +390,7 @@ class ProgressiveCoinflipCog(commands.Cog):
             return await ctx.reply(embed=embed)
 
         # Check if the user already has an ongoing game
-        if ctx.author.id in self.ongoing_games:
+        if not await self.ongoing_games.reserve(ctx.author.id):
             embed = discord.Embed(
                 title="<:no:1344252518305234987> | Game In Progress",
                 description="You already have an ongoing game. Please finish it first.",
@@ -8,6 +8,7 @@ import io
 from discord.ext import commands
 from Cogs.utils.currency_helper import process_bet_amount
 from Cogs.utils.mongo import Users, Servers
+from Cogs.utils.game_sessions import sessions
 from colorama import Fore
 from Cogs.utils.emojis import emoji
 
@@ -460,7 +461,7 @@ class PumpGameView(discord.ui.View):
 class PumpCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.ongoing_games = {}
+        self.ongoing_games = sessions.registry("pump")
 
     @commands.command(aliases=["balloon"])
     async def pump(self, ctx, bet_amount: str = None, difficulty: str = None):
@@ -484,7 +485,7 @@ class PumpCog(commands.Cog):
             embed.set_footer(text="BetSync Casino • Aliases: !balloon")
             return await ctx.reply(embed=embed)
 
-        if ctx.author.id in self.ongoing_games:
+        if not await self.ongoing_games.reserve(ctx.author.id):
             embed = discord.Embed(
                 title="<:no:1344252518305234987> | Game In Progress",
                 description="You already have an ongoing game. Please finish it first.",
@@ -543,6 +544,7 @@ class PumpCog(commands.Cog):
         self.ongoing_games[ctx.author.id] = {
             "game_type": "pump",
             "game_view": game_view,
+            "bet_amount": game_view.bet_amount,
             "start_time": time.time()
         }
 
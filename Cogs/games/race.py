@@ -3,6 +3,7 @@ import random
 import asyncio
 from discord.ext import commands
 from Cogs.utils.mongo import Users, Servers
+from Cogs.utils.game_sessions import sessions
 from Cogs.utils.emojis import emoji
 
 class RacePlayAgainView(discord.ui.View):
@@ -34,7 +35,7 @@ class RacePlayAgainView(discord.ui.View):
 class RaceCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.ongoing_games = {}
+        self.ongoing_games = sessions.registry("race")
         self.track_length = 15  # Length of the race track
 
     @commands.command(aliases=["carrace"])
@@ -58,7 +59,7 @@ class RaceCog(commands.Cog):
             return await ctx.reply(embed=embed)
 
         # Check if user already has an ongoing game
-        if ctx.author.id in self.ongoing_games:
+        if not await self.ongoing_games.reserve(ctx.author.id):
             embed = discord.Embed(
                 title="<:no:1344252518305234987> | Game in Progress",
                 description="You already have a race game in progress.",
@@ -6,6 +6,7 @@ import random
 import time
 from discord.ext import commands
 from Cogs.utils.mongo import Users, Servers
+from Cogs.utils.game_sessions import sessions
 from Cogs.utils.emojis import emoji
 from Cogs.utils.currency_helper import process_bet_amount
 
@@ -75,7 +76,7 @@ class SlotsSpinningView(discord.ui.View):
 class SlotsCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.ongoing_games = {}
+        self.ongoing_games = sessions.registry("slots")
         
         # Reduced payout symbols with lower weights for better house edge
         self.symbols = {
@@ -267,7 +268,7 @@ class SlotsCog(commands.Cog):
             return await ctx.reply(embed=help_embed)
 
         # Check for ongoing games
-        if ctx.author.id in self.ongoing_games:
+        if not await self.ongoing_games.reserve(ctx.author.id):
             embed = discord.Embed(
                 title="<:no:1344252518305234987> | Game In Progress",
                 description="You already have a slots game running! Please finish it first.",
@@ -4,6 +4,7 @@ import asyncio
 import time
 from discord.ext import commands
 from Cogs.utils.mongo import Users, Servers
+from Cogs.utils.game_sessions import sessions
 from colorama import Fore
 from Cogs.utils import emojis
 import datetime
@@ -524,7 +525,7 @@ class TowerGameView(discord.ui.View):
 class TowerCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.ongoing_games = {}
+        self.ongoing_games = sessions.registry("tower")
 
     @commands.command(aliases=["twr", "climb", "towers"])
     async def tower(self, ctx, bet_amount: str = None, difficulty: str = None):
@@ -549,7 +550,7 @@ class TowerCog(commands.Cog):
             embed.set_footer(text="BetSync Casino • Aliases: !twr, !climb")
             return await ctx.reply(embed=embed)
 
-        if ctx.author.id in self.ongoing_games:
+        if not await self.ongoing_games.reserve(ctx.author.id):
             embed = discord.Embed(
                 title="<:no:1344252518305234987> | Game In Progress",
                 description="You already have an ongoing game. Please finish it first.",
@@ -626,6 +627,7 @@ class TowerCog(commands.Cog):
             self.ongoing_games[ctx.author.id] = {
                 "game_type": "tower",
                 "game_view": game_view,
+                "bet_amount": game_view.bet_amount,
                 "start_time": time.time()
             }
 
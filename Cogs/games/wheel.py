@@ -5,6 +5,7 @@ import random
 import time
 from discord.ext import commands
 from Cogs.utils.mongo import Users, Servers
+from Cogs.utils.game_sessions import sessions
 from Cogs.utils.emojis import emoji
 
 class WheelSelectionView(discord.ui.View):
@@ -108,7 +109,7 @@ class InstantSpinView(discord.ui.View):
 class WheelCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.ongoing_games = {}
+        self.ongoing_games = sessions.registry("wheel")
         # Define color multipliers with proper house edge (casino-favorable)
         self.colors = {
             "gray": {"emoji": "⚫", "multiplier": 0, "chance": 65, "name": "BUST"},
@@ -174,7 +175,7 @@ class WheelCog(commands.Cog):
             return await ctx.reply(embed=embed)
 
         # Check if the user already has an ongoing game
-        if ctx.author.id in self.ongoing_games:
+        if not await self.ongoing_games.reserve(ctx.author.id):
             embed = discord.Embed(
                 title="<:no:1344252518305234987> | Game In Progress",
                 description="You already have an ongoing game. Please finish it first.",
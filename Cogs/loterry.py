@@ -5,6 +5,8 @@ import time
 import random
 import asyncio
 from discord.ext import commands, tasks
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 from Cogs.utils.mongo import Users, MongoClient
 from Cogs.utils.emojis import emoji
 from colorama import Fore
@@ -15,31 +17,45 @@ class Lottery(commands.Cog):
         self.lottery_collection = MongoClient(os.getenv("MONGO"))["BetSync"]["lottery"]
         self.current_lottery = None
         self.lottery_cooldown = {}
+        self.ensure_indexes()
         self.initialize_lottery()
         self.lottery_reset.start()
 
     def cog_unload(self):
         self.lottery_reset.cancel()
 
+    def ensure_indexes(self):
+        """At most one active lottery, so concurrent upserts from several processes can't each create one"""
+        try:
+            self.lottery_collection.create_index(
+                "status", unique=True, partialFilterExpression={"status": "active"}
+            )
+        except Exception as e:
+            print(f"{Fore.RED}[!] Could not create the active lottery index: {e}")
+
     def initialize_lottery(self):
         """Initialize or fetch the current lottery"""
-        current = self.lottery_collection.find_one({"status": "active"})
-        
-        if not current:
-            # Create a new lottery if none is active
-            next_draw_time = self.get_next_draw_time()
-            new_lottery = {
-                "status": "active",
-                "entries": [],
-                "total_pot": 0,
-                "created_at": int(time.time()),
-                "draw_time": next_draw_time,
-                "winner": None
-            }
-            self.lottery_collection.insert_one(new_lottery)
-            self.current_lottery = new_lottery
-        else:
-            self.current_lottery = current
+        # Single upsert, so bot processes starting together share one active lottery
+        next_draw_time = self.get_next_draw_time()
+        for _ in range(2):
+            try:
+                self.current_lottery = self.lottery_collection.find_one_and_update(
+                    {"status": "active"},
+                    {"$setOnInsert": {
+                        "status": "active",
+                        "entries": [],
+                        "total_pot": 0,
+                        "created_at": int(time.time()),
+                        "draw_time": next_draw_time,
+                        "winner": None
+                    }},
+                    upsert=True,
+                    return_document=ReturnDocument.AFTER
+                )
+                return
+            except DuplicateKeyError:
+                # Another process inserted the active lottery between our match and insert; the retry finds it
+                continue
 
     def get_next_draw_time(self):
         """Calculate the next draw time (2:00 AM UTC)"""
@@ -65,7 +81,16 @@ class Lottery(commands.Cog):
             
             # If current time has passed the draw time
             if now >= self.current_lottery["draw_time"]:
-                await self.draw_lottery()
+                # Claim the draw so only one bot process runs it. The claimed
+                # document also has the entries bought on other processes.
+                claimed = self.lottery_collection.find_one_and_update(
+                    {"_id": self.current_lottery["_id"], "status": "active"},
+                    {"$set": {"status": "drawing"}},
+                    return_document=ReturnDocument.AFTER
+                )
+                if claimed:
+                    self.current_lottery = claimed
+                    await self.draw_lottery()
                 self.initialize_lottery()  # Create new lottery
         except Exception as e:
             print(f"{Fore.RED}[-] Lottery reset error: {e}")
@@ -288,8 +313,8 @@ class Lottery(commands.Cog):
     @commands.command(aliases=["lottery"])
     async def loterry(self, ctx, action=None, quantity: int = 1):
         """View or participate in the current lottery"""
-        if not self.current_lottery:
-            self.initialize_lottery()
+        # Always reload, other bot processes may have sold tickets or drawn it
+        self.initialize_lottery()
             
         if action and action.lower() in ["buy", "purchase"]:
             # Validate quantity
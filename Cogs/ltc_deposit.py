@@ -4,23 +4,27 @@ import discord
 from discord.ext import commands, tasks
 import os
 import requests
-import qrcode
 import io
 import asyncio
 import datetime
 import time
-import aiohttp
 import json
 import re
 from dotenv import load_dotenv
-from bitcoinlib.keys import HDKey
-from bitcoinlib.networks import Network # Use network name string instead
 from colorama import Fore, Style # For colored print statements
 
-from Cogs.utils.mongo import Users
+from Cogs.utils.mongo import Users, counters, ledger
+from Cogs.utils.metrics import timed
 from Cogs.utils.notifier import Notifier
 from Cogs.utils.emojis import emoji
 from Cogs.utils.currency_helper import get_crypto_price
+from Cogs.utils.http_client import http_client
+from Cogs.utils.deposit_watcher import DepositWatcher
+from Cogs.utils.chain_tip import TipHeightCache
+from Cogs.utils.address_pool import AddressPool
+from Cogs.utils.render_cache import deposit_cards, deposit_card_fonts
+from Cogs.utils.lazy_imports import lazy_import
+from Cogs.utils.dm_fanout import resolve_user
 
 # Load environment variables
 load_dotenv()
@@ -35,12 +39,20 @@ LTC_SATOSHIS = 100_000_000 # 1 LTC = 100,000,000 satoshis
 REQUIRED_CONFIRMATIONS = 2
 MEMPOOL_API_URL = "https://litecoinspace.org/api" # Mempool.space Litecoin API
 CHECK_DEPOSIT_COOLDOWN = 15 # seconds
+WATCH_INTERVAL = 30 # seconds between background checks of a watched address
+BLOCK_TIME = 150 # average seconds between blocks, sets how long the tip height is cached
 EMBED_TIMEOUT = 600 # 10 minutes in seconds
 
-from PIL import Image, ImageDraw, ImageFont
+# Heavy dependencies are only imported when a deposit is actually made
+qrcode = lazy_import("qrcode")
+bitcoinlib_keys = lazy_import("bitcoinlib.keys")
+bitcoinlib_networks = lazy_import("bitcoinlib.networks")
+
+from PIL import Image, ImageDraw
 
 # --- Helper Functions ---
 
+@timed("render", "ltc_deposit_card")
 def generate_qr_code(address: str, username: str):
     """Generates a styled QR code image with text."""
     # 1. Generate base QR code
@@ -57,22 +69,7 @@ def generate_qr_code(address: str, username: str):
     qr_width, qr_height = qr_img.size
 
     # 2. Prepare fonts and text
-    try:
-        # Adjust font paths if necessary relative to the workspace root
-        title_font = ImageFont.truetype("Helvetica-Bold.ttf", 30)
-        subtitle_font = ImageFont.truetype("Helvetica.ttf", 18)
-        brand_font = ImageFont.truetype("Helvetica-Bold.ttf", 36)
-    except IOError:
-        print(f"{Fore.YELLOW}[!] Warning: Font files not found. Using default font.{Style.RESET_ALL}")
-        # Fallback to default font if specific fonts aren't found
-        try:
-            title_font = ImageFont.truetype("arial.ttf", 30) # Try Arial as fallback
-            subtitle_font = ImageFont.truetype("arial.ttf", 18)
-            brand_font = ImageFont.truetype("arial.ttf", 36)
-        except IOError:
-             title_font = ImageFont.load_default()
-             subtitle_font = ImageFont.load_default()
-             brand_font = ImageFont.load_default()
+    title_font, subtitle_font, brand_font = deposit_card_fonts()
 
 
     title_text = f"{username}'s Deposit Address" # Changed title slightly
@@ -175,6 +172,46 @@ class DepositView(discord.ui.View):
             except KeyError:
                  pass # Already removed, potentially by another process or race condition
 
+    async def show_success(self, deposits):
+        """Turn the deposit message into a receipt for the credited transactions"""
+        if not self.message:
+            return
+        total_ltc = sum(d['amount_crypto'] for d in deposits)
+
+        main_embed = self.message.embeds[0]
+        main_embed.title = "<:yes:1355501647538815106> | Deposit Success"
+        total_points = sum(d.get('points_credited', 0) for d in deposits)
+        main_embed.description = f"<:ltc:1339343445675868191> **+{total_ltc:,.8f} LTC** (+{total_points:,.2f} points) from {len(deposits)} transaction(s)"
+        main_embed.clear_fields()
+        main_embed.set_image(url=None)  # Remove QR code image
+
+        # Show each transaction
+        for i, deposit in enumerate(deposits, 1):
+            txid = deposit['txid']
+            txid_short = txid[:10] + '...' if len(txid) > 10 else txid
+            explorer_url = f"https://litecoinspace.org/tx/{txid}"
+            tx_value = f"[`{txid_short}`]({explorer_url})" if txid != 'N/A' else "N/A"
+            
+            main_embed.add_field(
+                name=f"Transaction #{i}",
+                value=f"Amount: {deposit['amount_crypto']:,.8f} LTC\nTXID: {tx_value}",
+                inline=False
+            )
+
+        # Show new balance
+        updated_user = self.cog.users_db.fetch_user(self.user_id)
+        ltc_balance = updated_user.get("wallet", {}).get("LTC", "N/A") if updated_user else "N/A"
+        main_embed.add_field(name="New LTC Balance", value=f"<:ltc:1339343445675868191> {ltc_balance:,.8f} LTC", inline=True)
+        
+        # Disable check button
+        for item in self.children:
+            if isinstance(item, discord.ui.Button) and item.custom_id == "check_deposit_button":
+                item.disabled = True
+                item.style = discord.ButtonStyle.grey
+                item.label = "Checked"
+
+        await self.message.edit(embed=main_embed, view=self, attachments=[])
+
     @discord.ui.button(label="Check for New Deposits", style=discord.ButtonStyle.green, custom_id="check_deposit_button", emoji="🔄")
     async def check_deposit_button(self, button: discord.ui.Button, interaction: discord.Interaction):
         """Button to check for new deposits."""
@@ -209,58 +246,12 @@ class DepositView(discord.ui.View):
         await interaction.response.defer(ephemeral=True) # Defer ephemerally for pending/no_new/error
 
         try:
-            # Check for deposits (assuming _check_for_deposits returns status and details dict)
-            # The details dict should contain 'amount_crypto', 'points_credited', 'txid', 'balance_after' on success
-            status, details = await self.cog._check_for_deposits(self.user_id, self.address)
+            # The watcher keeps this address checked; this is a cache read unless the result is stale
+            status, details = await self.cog.watcher.status(self.user_id, self.address)
 
             if status == "success":
-                # Handle both single and multiple deposits
-                deposits = details.get('deposits', [details])  # Support both formats
-                total_ltc = sum(d['amount_crypto'] for d in deposits)
-                
-                # LTC deposits go directly to wallet.LTC - no additional balance updates needed here
-                # The _check_for_deposits method already handled the wallet update
-
-                # Update embed
-                if not self.message:
-                    await interaction.followup.send("Error: Could not find the original deposit message to update.", ephemeral=True)
-                    return
-
-                main_embed = self.message.embeds[0]
-                main_embed.title = "<:yes:1355501647538815106> | Deposit Success"
-                total_points = sum(d.get('points_credited', 0) for d in deposits)
-                main_embed.description = f"<:ltc:1339343445675868191> **+{total_ltc:,.8f} LTC** (+{total_points:,.2f} points) from {len(deposits)} transaction(s)"
-                main_embed.clear_fields()
-                main_embed.set_image(url=None)  # Remove QR code image
-
-                # Show each transaction
-                for i, deposit in enumerate(deposits, 1):
-                    txid = deposit['txid']
-                    txid_short = txid[:10] + '...' if len(txid) > 10 else txid
-                    explorer_url = f"https://litecoinspace.org/tx/{txid}"
-                    tx_value = f"[`{txid_short}`]({explorer_url})" if txid != 'N/A' else "N/A"
-                    
-                    main_embed.add_field(
-                        name=f"Transaction #{i}",
-                        value=f"Amount: {deposit['amount_crypto']:,.8f} LTC\nTXID: {tx_value}",
-                        inline=False
-                    )
-
-                # Show new balance
-                updated_user = self.cog.users_db.fetch_user(self.user_id)
-                ltc_balance = updated_user.get("wallet", {}).get("LTC", "N/A") if updated_user else "N/A"
-                main_embed.add_field(name="New LTC Balance", value=f"<:ltc:1339343445675868191> {ltc_balance:,.8f} LTC", inline=True)
-                
-                # Disable check button
-                for item in self.children:
-                    if isinstance(item, discord.ui.Button) and item.custom_id == "check_deposit_button":
-                        item.disabled = True
-                        item.style = discord.ButtonStyle.grey
-                        item.label = "Checked"
-
-                await self.message.edit(embed=main_embed, view=self, attachments=[])
-
-                # We don't need followup.send here as we edited the main message
+                # Credited and shown on the deposit message by the watcher callback
+                return
 
             elif status == "pending":
                 # Add amount to pending message
@@ -324,8 +315,15 @@ class LtcDeposit(commands.Cog):
         self.bot = bot
         self.users_db = Users()
         self.notifier = Notifier()
-        self.active_deposit_views = {} # user_id: message_object
+        self.active_deposit_views = {} # user_id: DepositView
         self.button_cooldowns = {} # key: timestamp
+        self.tip_height = TipHeightCache("ltc", self._fetch_tip_height, BLOCK_TIME, min_ttl=WATCH_INTERVAL)
+        self.watcher = DepositWatcher("ltc", self._watch_check, WATCH_INTERVAL)
+        self.watcher.start(bot)
+        self._master_key = None
+        self.address_pool = AddressPool("ltc", self._derive_address, self._reserve_address_indices)
+        if LTC_XPUB:
+            self.address_pool.start(bot)
 
         if not LTC_XPUB:
             print(f"{Fore.RED}[!] ERROR: LTC_XPUB not found in environment variables! LTC deposits will not work.{Style.RESET_ALL}")
@@ -337,22 +335,76 @@ class LtcDeposit(commands.Cog):
         # We might need to convert zpub to xpub or use appropriate derivation paths.
         # For now, assuming standard derivation m/0/k might work, but needs testing.
 
-    async def _get_next_address_index(self, user_id: int) -> int:
-        """Finds the next unused address index for a user."""
-        # This is a simple approach. A more robust way would be to query the max index used.
+    def cog_unload(self):
+        self.watcher.stop()
+        self.address_pool.stop()
+
+    async def _fetch_tip_height(self) -> int:
+        response = await http_client.get(f"{MEMPOOL_API_URL}/blocks/tip/height")
+        if response.status != 200:
+            raise RuntimeError(f"API Error ({response.status}) fetching block height.")
+        return int(response.text())
+
+    async def _watch_check(self, user_id: int, address: str) -> tuple[str, dict]:
+        """Watcher check: credit confirmed deposits and tell the user about them"""
         user_data = self.users_db.fetch_user(user_id)
-        if user_data and 'ltc_address_index' in user_data:
-            # If index exists, assume the next one is needed for a *new* address generation request.
-            # However, for deposits, we usually reuse the *last* generated address.
-            # Let's refine this logic in _generate_ltc_address.
-            # This helper might be better suited for finding the *absolute* next index if needed elsewhere.
-            # For now, we'll manage the index within _generate_ltc_address.
-            return user_data.get('ltc_address_index', -1) + 1
-        else:
-            # If no user data or no index, start from 0.
-            # Consider potential conflicts if multiple bots/processes generate addresses.
-            # A dedicated counter collection in MongoDB might be safer for high concurrency.
-            return 0 # Start with index 0 for the first address
+        primary_currency = (user_data or {}).get('primary_coin', (user_data or {}).get('primary_currency', '')).upper()
+        if primary_currency != 'LTC':
+            # LTC deposits are only claimed while LTC is the primary currency
+            return "no_new", {}
+
+        status, details = await self._check_for_deposits(user_id, address)
+        if status == "success":
+            deposits = details.get('deposits', [details])
+            view = self.active_deposit_views.get(user_id)
+            if view and view.address == address and view.message:
+                await view.show_success(deposits)
+            else:
+                await self._dm_deposit(user_id, deposits)
+        return status, details
+
+    async def _dm_deposit(self, user_id: int, deposits: list):
+        """Deposit confirmed while the user had no deposit message open"""
+        user = await resolve_user(self.bot, user_id)
+        if not user:
+            return
+        total_ltc = sum(d['amount_crypto'] for d in deposits)
+        embed = discord.Embed(
+            title="<:yes:1355501647538815106> | Deposit Success",
+            description=f"<:ltc:1339343445675868191> **+{total_ltc:,.8f} LTC** has been credited to your balance.",
+            color=0x00FFAE
+        )
+        embed.set_footer(text="BetSync Casino")
+        try:
+            await user.send(embed=embed)
+        except (discord.Forbidden, discord.HTTPException):
+            pass
+
+    def _hd_key(self):
+        # Parse the key once per process, without a network first to avoid conflicts with the zpub format
+        if self._master_key is None:
+            master_key = bitcoinlib_keys.HDKey(LTC_XPUB)
+            master_key.network = bitcoinlib_networks.Network('litecoin')
+            self._master_key = master_key
+        return self._master_key
+
+    def _derive_address(self, index: int) -> str:
+        """Native SegWit address at m/0'/index, blocking"""
+        return self._hd_key().subkey_for_path(f"m/0'/{index}").address()
+
+    def _next_address_index(self) -> int:
+        """One past the highest ltc_address_index stored, seeds the counter once"""
+        highest_index_user = self.users_db.collection.find_one(
+            {"ltc_address_index": {"$exists": True}}, # Ensure the field exists
+            sort=[("ltc_address_index", -1)] # Sort descending by index
+        )
+        last_global_index = -1
+        if highest_index_user and isinstance(highest_index_user.get('ltc_address_index'), int):
+            last_global_index = highest_index_user['ltc_address_index']
+        return last_global_index + 1
+
+    def _reserve_address_indices(self, count: int) -> int:
+        return counters.reserve("ltc_address_index", count, floor=self._next_address_index)
 
     async def _generate_ltc_address(self, user_id: int) -> tuple[str | None, str | None]:
         """Generates or retrieves a unique LTC deposit address for the user."""
@@ -373,43 +425,14 @@ class LtcDeposit(commands.Cog):
             return None, "LTC_XPUB environment variable is not configured."
 
         try:
-            # --- Determine the globally next available index ---
-            # Find the user with the highest ltc_address_index
-            highest_index_user = self.users_db.collection.find_one(
-                {"ltc_address_index": {"$exists": True}}, # Ensure the field exists
-                sort=[("ltc_address_index", -1)] # Sort descending by index
-            )
-
-            last_global_index = -1
-            if highest_index_user and 'ltc_address_index' in highest_index_user and isinstance(highest_index_user['ltc_address_index'], int):
-                last_global_index = highest_index_user['ltc_address_index']
-
-            next_index = last_global_index + 1
-            print(f"{Fore.CYAN}[i] Generating address for user {user_id} using globally next index: {next_index} (Last highest global index found: {last_global_index}){Style.RESET_ALL}")
-            # --- End index determination ---
-
-            # Load the xpub key
-            # Parse key first without network to avoid conflict with zpub format
-            if not LTC_XPUB: # Redundant check, but safe
-                 return None, "LTC_XPUB environment variable is not configured."
-            print(f"{Fore.CYAN}[i] Using LTC_XPUB starting with: {LTC_XPUB[:10]}...{Style.RESET_ALL}") # Log partial key
-            master_key = HDKey(LTC_XPUB)
-            # Convert to Litecoin context using proper Network object
-            from bitcoinlib.networks import Network
-            master_key.network = Network('litecoin')
-
-            # Use the user's specified derivation path (m/0'/index) for Native SegWit (p2wpkh)
-            # Ensure the index is hardened as specified (0')
-            derivation_path = f"m/0'/{next_index}" # Using user's path m/0'/i
+            # Globally unique index from the counter; Native SegWit (p2wpkh) on the user's path m/0'/i
             try:
-                # Use Litecoin network context
-                derived_key = master_key.subkey_for_path(derivation_path)
-                address = derived_key.address() # Network already specified in HDKey
-                print(f"{Fore.GREEN}[+] Derived address using user path (Native SegWit): {derivation_path}{Style.RESET_ALL}")
+                next_index, address = await self.address_pool.take()
             except Exception as derive_err:
                  # If derivation fails, log error and fail.
-                 print(f"{Fore.RED}[!] Error: Derivation failed using path ({derivation_path}): {derive_err}. Ensure LTC_XPUB is compatible with this path and p2wpkh.{Style.RESET_ALL}")
-                 return None, f"Failed to derive address using path {derivation_path}: {derive_err}. Check XPUB/ZPUB compatibility."
+                 print(f"{Fore.RED}[!] Error: Derivation failed on path m/0'/i: {derive_err}. Ensure LTC_XPUB is compatible with this path and p2wpkh.{Style.RESET_ALL}")
+                 return None, f"Failed to derive address: {derive_err}. Check XPUB/ZPUB compatibility."
+            derivation_path = f"m/0'/{next_index}"
 
             # Log the final derived details before saving
             print(f"{Fore.CYAN}[i] Final derived info for user {user_id}: Address={address}, Path={derivation_path}, Index={next_index}{Style.RESET_ALL}")
@@ -455,30 +478,30 @@ class LtcDeposit(commands.Cog):
                  return "error", {"error": "User data not found."}
 
             try:
-                async with aiohttp.ClientSession() as session:
-                    # Get address transactions from Mempool.space
-                    txs_url = f"{MEMPOOL_API_URL}/address/{address}/txs"
-                    async with session.get(txs_url) as response:
-                        if response.status != 200:
-                            print(f"{Fore.RED}[!] Mempool API Error ({response.status}) fetching transactions for {address}. Response: {await response.text()}{Style.RESET_ALL}")
-                            return "error", {"error": f"API Error ({response.status}) fetching transactions."}
-
-                        try:
-                            transactions = await response.json()
-                        except Exception as e:
-                            print(f"{Fore.RED}[!] Error parsing transactions for {address}: {e}{Style.RESET_ALL}")
-                            return "error", {"error": "Failed to parse transaction data"}
-
-                    # Get current block height
-                    tip_url = f"{MEMPOOL_API_URL}/blocks/tip/height"
-                    async with session.get(tip_url) as tip_response:
-                        if tip_response.status != 200:
-                            print(f"{Fore.RED}[!] API Error ({tip_response.status}) fetching block height.{Style.RESET_ALL}")
-                            return "error", {"error": f"API Error ({tip_response.status}) fetching block height."}
-                        current_block_height = int(await tip_response.text())
+                # Get address transactions from Mempool.space
+                txs_url = f"{MEMPOOL_API_URL}/address/{address}/txs"
+                response = await http_client.get(txs_url)
+                if response.status != 200:
+                    print(f"{Fore.RED}[!] Mempool API Error ({response.status}) fetching transactions for {address}. Response: {response.text()}{Style.RESET_ALL}")
+                    return "error", {"error": f"API Error ({response.status}) fetching transactions."}
+
+                try:
+                    transactions = response.json()
+                except Exception as e:
+                    print(f"{Fore.RED}[!] Error parsing transactions for {address}: {e}{Style.RESET_ALL}")
+                    return "error", {"error": "Failed to parse transaction data"}
+
+                # Get current block height
 
                 if not transactions:
                     return "no_new", {}
+
+                # Shared, cached per chain; only fetched when a check needs confirmations
+                try:
+                    current_block_height = await self.tip_height.get()
+                except Exception as e:
+                    print(f"{Fore.RED}[!] Error fetching block height: {e}{Style.RESET_ALL}")
+                    return "error", {"error": "Failed to fetch block height."}
             except Exception as e:
                 # Catch errors specifically from the API interaction block
                 print(f"{Fore.RED}[!] Error during API check for {address}: {e}{Style.RESET_ALL}")
@@ -501,6 +524,7 @@ class LtcDeposit(commands.Cog):
                 self.users_db.collection.update_one({"discord_id": user_id}, {"$set": {"history": []}})
 
             processed_txids = {entry.get('txid') for entry in history if entry and entry.get('type') == 'ltc_deposit'}
+            processed_txids.update(user_data.get('processed_ltc_txids', []))
             new_deposit_processed_in_this_check = False
             first_pending_tx = None
 
@@ -581,20 +605,22 @@ class LtcDeposit(commands.Cog):
                 balance_before_ltc = user_data.get("wallet", {}).get("LTC", 0) # Get LTC balance before
                 balance_before_points = user_data.get("points", 0)
 
-                # 1. Increment wallet.LTC balance AND points
+                # 1. Increment wallet.LTC balance AND points, marking the txid in the same update
+                # so the watcher and a button press (or two processes) only credit it once
                 update_result_wallet = self.users_db.collection.update_one(
-                    {"discord_id": user_id},
+                    {"discord_id": user_id, "processed_ltc_txids": {"$ne": txid}},
                     {
                         "$inc": {
                             "wallet.LTC": amount_crypto,
                             "points": points_to_add
-                        }
+                        },
+                        "$addToSet": {"processed_ltc_txids": txid}
                     }
                 )
                 if not update_result_wallet or update_result_wallet.matched_count == 0:
-                     print(f"{Fore.RED}[!] Failed to update wallet.LTC and points for user {user_id} for txid {txid}. Aborting processing.{Style.RESET_ALL}")
-                     # Potentially revert or flag for manual review
+                     print(f"{Fore.YELLOW}[!] TX {txid} for user {user_id} was already credited or the user is missing. Skipping.{Style.RESET_ALL}")
                      continue # Skip this transaction
+                ledger.record(user_id, points_to_add, "deposit", f"ltc:{txid}")
                 print(f"{Fore.GREEN}[+] Updated wallet.LTC for user {user_id} by {amount_crypto:.8f} LTC and added {points_to_add:.2f} points for txid {txid}{Style.RESET_ALL}")
 
                 # 2. Increment total deposit amount (USD value for stats tracking)
@@ -626,12 +652,6 @@ class LtcDeposit(commands.Cog):
                      print(f"{Fore.YELLOW}[!] Failed to update history for user {user_id}, txid {txid}. Balance was updated.{Style.RESET_ALL}")
                      # Balance is already updated, log this inconsistency
 
-                # 4. Add txid to processed list
-                # This prevents potential double-crediting if save/notify fails partially
-                self.users_db.collection.update_one(
-                    {"discord_id": user_id},
-                    {"$addToSet": {"processed_ltc_txids": txid}}
-                )
                 # Skip wallet save to prevent duplicate history entries
                 # The LTC wallet balance was already updated directly via MongoDB
 
@@ -667,6 +687,7 @@ class LtcDeposit(commands.Cog):
                 # Only return amount and txid, balance update is handled internally
                 return "success", {
                     "amount_crypto": amount_crypto,
+                    "points_credited": points_to_add,
                     "txid": txid
                 }
 
@@ -798,7 +819,7 @@ class LtcDeposit(commands.Cog):
 
         # Generate styled QR Code in thread
         try:
-            qr_buffer = await asyncio.to_thread(generate_qr_code, address, ctx.author.name) # Pass address and username
+            qr_buffer = io.BytesIO(await deposit_cards.get(f"ltc:{address}:{ctx.author.name}", generate_qr_code, address, ctx.author.name))
             qr_file = discord.File(qr_buffer, filename="ltc_deposit_qr.png")
         except Exception as qr_err:
              print(f"{Fore.RED}[!] Failed to generate QR code for {address}: {qr_err}{Style.RESET_ALL}")
@@ -831,7 +852,8 @@ class LtcDeposit(commands.Cog):
             message = await ctx.reply(content=msg_content, embed=embed, file=qr_file, view=view)
             # Store active view and message
             view.message = message
-            self.active_deposit_views[user_id] = message # Store message object keyed by user_id
+            self.active_deposit_views[user_id] = view
+            self.watcher.watch(user_id, address)
         except Exception as send_err:
              print(f"{Fore.RED}[!] Failed to send deposit message for user {user_id}: {send_err}{Style.RESET_ALL}")
              await ctx.reply("<:no:1344252518305234987> Failed to send deposit message. Please try again.")
@@ -0,0 +1,223 @@
+import asyncio
+import datetime
+import os
+import time
+import discord
+import psutil
+from aiohttp import web
+from discord.ext import commands, tasks
+from colorama import Fore
+from Cogs.utils.metrics import metrics, current_command
+from Cogs.utils.stall_watchdog import watchdog, task_labels
+from Cogs.utils.gateway import GATEWAY_PROFILE
+
+METRICS_HOST = os.environ.get("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.environ.get("METRICS_PORT", "9108"))
+LOOP_LAG_INTERVAL = 1.0  # seconds
+
+
+class Perf(commands.Cog):
+    """Command/view instrumentation, event-loop lag probe and the metrics endpoint"""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.admin_ids = self.load_admin_ids()
+        self._runner = None
+        self._last_tick = None
+        self._process = psutil.Process()
+
+        bot.before_invoke(self._before_invoke)
+        bot.after_invoke(self._after_invoke)
+
+        # View callbacks don't go through the command hooks, wrap their dispatch instead
+        self._original_scheduled_task = discord.ui.View._scheduled_task
+        original = self._original_scheduled_task
+
+        async def timed_scheduled_task(view, item, interaction):
+            name = type(view).__name__
+            task_labels[asyncio.current_task()] = name
+            token = current_command.set(name)
+            started = time.perf_counter()
+            try:
+                return await original(view, item, interaction)
+            finally:
+                metrics.observe("view", name, time.perf_counter() - started)
+                current_command.reset(token)
+
+        discord.ui.View._scheduled_task = timed_scheduled_task
+
+        self.measure_loop_lag.start()
+        self.bot.loop.create_task(self.start_metrics_server())
+        self.bot.loop.call_soon(watchdog.start, self.bot.loop)
+
+    def cog_unload(self):
+        discord.ui.View._scheduled_task = self._original_scheduled_task
+        watchdog.stop()
+        self.measure_loop_lag.cancel()
+        if self._runner:
+            self.bot.loop.create_task(self._runner.cleanup())
+
+    def load_admin_ids(self):
+        """Load admin IDs from admins.txt file"""
+        admin_ids = []
+        try:
+            with open("admins.txt", "r") as f:
+                for line in f:
+                    line = line.strip()
+                    if line and line.isdigit():
+                        admin_ids.append(int(line))
+        except Exception as e:
+            print(f"Error loading admin IDs: {e}")
+        return admin_ids
+
+    async def _before_invoke(self, ctx):
+        ctx._perf_started = time.perf_counter()
+        task_labels[asyncio.current_task()] = ctx.command.qualified_name
+        ctx._perf_token = current_command.set(ctx.command.qualified_name)
+
+    async def _after_invoke(self, ctx):
+        started = getattr(ctx, "_perf_started", None)
+        if started is None:
+            return
+        metrics.observe("command", ctx.command.qualified_name, time.perf_counter() - started, error=ctx.command_failed)
+        current_command.reset(ctx._perf_token)
+
+    @tasks.loop(seconds=LOOP_LAG_INTERVAL)
+    async def measure_loop_lag(self):
+        """How late this task wakes up is how long something else held the loop"""
+        now = time.perf_counter()
+        if self._last_tick is not None:
+            metrics.observe_loop_lag(max(0.0, now - self._last_tick - LOOP_LAG_INTERVAL))
+        self._last_tick = now
+        metrics.set_gauge("process_rss_bytes", self._process.memory_info().rss)
+
+    @commands.Cog.listener()
+    async def on_socket_event_type(self, event_type):
+        metrics.record_gateway_event(event_type)
+
+    @commands.Cog.listener()
+    async def on_socket_raw_receive(self, msg):
+        metrics.record_gateway_bytes(len(msg))
+
+    async def start_metrics_server(self):
+        async def handle_metrics(request):
+            return web.Response(text=metrics.prometheus_text(), content_type="text/plain")
+
+        try:
+            app = web.Application()
+            app.router.add_get("/metrics", handle_metrics)
+            self._runner = web.AppRunner(app)
+            await self._runner.setup()
+            await web.TCPSite(self._runner, METRICS_HOST, METRICS_PORT).start()
+            print(f"{Fore.GREEN}[+] {Fore.WHITE}Metrics endpoint on {Fore.GREEN}http://{METRICS_HOST}:{METRICS_PORT}/metrics{Fore.WHITE}")
+        except Exception as e:
+            print(f"{Fore.RED}[!] {Fore.WHITE}Could not start metrics endpoint: {Fore.RED}{e}")
+
+    @commands.command(name="perf")
+    async def perf(self, ctx, kind: str = "command"):
+        """Show the slowest commands, their DB usage and loop health (Admin only)
+
+        Usage: !perf [command|view|render|http|tip]
+        """
+        if ctx.author.id not in self.admin_ids:
+            embed = discord.Embed(
+                title="<:no:1344252518305234987> | Access Denied",
+                description="This command is restricted to administrators only.",
+                color=0xFF0000
+            )
+            return await ctx.reply(embed=embed)
+
+        kind = kind.lower()
+        rows = metrics.top_commands(kind)
+        lines = [f"{'name':<16}{'calls':>6}{'p50ms':>7}{'p99ms':>7}{'db/c':>6}{'kB/c':>7}"]
+        for name, histogram in rows:
+            ops, size = metrics.db_per_call(name)
+            lines.append(
+                f"{name[:15]:<16}{histogram.count:>6}"
+                f"{histogram.quantile(0.5) * 1000:>7.0f}{histogram.quantile(0.99) * 1000:>7.0f}"
+                f"{ops:>6.1f}{size / 1024:>7.1f}"
+            )
+
+        embed = discord.Embed(
+            title=f"📊 Performance - {kind}s",
+            description=f"```\n{chr(10).join(lines) if rows else 'No data yet'}```",
+            color=0x00FFAE
+        )
+        embed.add_field(
+            name="⏱️ Event Loop",
+            value=(
+                f"```\nLag now: {metrics.gauges['event_loop_lag_seconds'] * 1000:.1f} ms\n"
+                f"Lag p99: {metrics.loop_lag.quantile(0.99) * 1000:.0f} ms```"
+            ),
+            inline=True
+        )
+        embed.add_field(
+            name="📨 Webhooks",
+            value=f"```\nQueued: {metrics.gauges['webhook_queue_depth']}```",
+            inline=True
+        )
+        embed.add_field(
+            name="🛰️ Gateway",
+            value=(
+                f"```\nProfile: {GATEWAY_PROFILE}\n"
+                f"Events: {metrics.gateway_rate():.0f}/min\n"
+                f"Received: {metrics.gateway_bytes / 1024 / 1024:.1f} MB\n"
+                f"RSS: {metrics.gauges['process_rss_bytes'] / 1024 / 1024:.0f} MB\n"
+                f"Members cached: {sum(len(guild.members) for guild in self.bot.guilds)}```"
+            ),
+            inline=False
+        )
+        embed.set_footer(text=f"Prometheus: http://{METRICS_HOST}:{METRICS_PORT}/metrics")
+        await ctx.reply(embed=embed)
+
+    @commands.command(name="stalls")
+    async def stalls(self, ctx, index: int = None):
+        """Show recent event-loop stalls, or the stack of one of them (Admin only)
+
+        Usage: !stalls [number]
+        """
+        if ctx.author.id not in self.admin_ids:
+            embed = discord.Embed(
+                title="<:no:1344252518305234987> | Access Denied",
+                description="This command is restricted to administrators only.",
+                color=0xFF0000
+            )
+            return await ctx.reply(embed=embed)
+
+        recent = watchdog.recent()
+        if index is not None:
+            if not 1 <= index <= len(recent):
+                embed = discord.Embed(
+                    title="<:no:1344252518305234987> | Not Found",
+                    description=f"There are only {len(recent)} recent stalls.",
+                    color=0xFF0000
+                )
+                return await ctx.reply(embed=embed)
+            stall = recent[index - 1]
+            duration = "ongoing" if stall.duration is None else f"{stall.duration * 1000:.0f} ms"
+            # Keep the innermost frames, that's where the loop was blocked
+            stack = stall.stack[-3900:] or "No stack captured"
+            embed = discord.Embed(
+                title=f"🧊 Stall #{index} - {stall.label} ({duration})",
+                description=f"```py\n{stack}```",
+                color=0xFFA500
+            )
+            return await ctx.reply(embed=embed)
+
+        lines = []
+        for i, stall in enumerate(recent, start=1):
+            when = datetime.datetime.fromtimestamp(stall.started_at).strftime("%X")
+            duration = "ongoing" if stall.duration is None else f"{stall.duration * 1000:.0f}ms"
+            lines.append(f"{i:>2}. {when}  {duration:>8}  {stall.label[:24]}")
+
+        embed = discord.Embed(
+            title="🧊 Recent Event Loop Stalls",
+            description=f"```\n{chr(10).join(lines) if lines else 'No stalls recorded'}```",
+            color=0x00FFAE
+        )
+        embed.set_footer(text=f"Threshold: {watchdog.threshold * 1000:.0f} ms • !stalls <number> for the stack")
+        await ctx.reply(embed=embed)
+
+
+def setup(bot):
+    bot.add_cog(Perf(bot))
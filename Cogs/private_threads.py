@@ -315,6 +315,19 @@ class ChannelControlView(discord.ui.View):
                         member = guild_member
                         break
 
+            # Guilds aren't chunked at startup, ask Discord instead of the partial cache
+            if not member and not interaction.guild.chunked and interaction.client.intents.members:
+                candidates = []
+                if member_text.isdigit():
+                    candidates = await interaction.guild.query_members(user_ids=[int(member_text)])
+                else:
+                    candidates = await interaction.guild.query_members(query=member_text, limit=10)
+                for guild_member in candidates:
+                    if (member_text.isdigit() or guild_member.name.lower() == member_text.lower() or
+                        guild_member.display_name.lower() == member_text.lower()):
+                        member = guild_member
+                        break
+
             if not member:
                 embed = discord.Embed(
                     title="<:no:1344252518305234987> | Member Not Found",
@@ -648,6 +648,18 @@ class ReferralsCog(commands.Cog):
             )
             await ctx.reply(embed=embed)
 
+    @commands.Cog.listener()
+    async def on_ready(self):
+        """Chunk the main server's member list, the only guild that needs one"""
+        guild = self.bot.get_guild(self.main_server_id)
+        if guild is None or guild.chunked or not self.bot.intents.members:
+            return
+        try:
+            await guild.chunk()
+            print(f"[REFERRAL] Cached {len(guild.members)} members of {guild.name}")
+        except Exception as e:
+            print(f"Error chunking main server members: {e}")
+
     @commands.Cog.listener()
     async def on_member_join(self, member):
         """Track when a member joins via invite"""
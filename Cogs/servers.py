@@ -3,8 +3,9 @@ import asyncio
 import time
 import random
 from discord.ext import commands
-from Cogs.utils.mongo import Users, Servers
+from Cogs.utils.mongo import Users, Servers, transfers
 from Cogs.utils.emojis import emoji
+from Cogs.utils.dm_fanout import send_dms, resolve_user
 
 class AirdropButton(discord.ui.Button):
     def __init__(self, airdrop_data):
@@ -497,9 +498,22 @@ class ServersCog(commands.Cog):
         service_fee = amount_value * 0.015
         airdrop_amount = amount_value - service_fee
 
-        # Deduct from user's balance
-        new_balance = user_balance - amount_value
-        db.update_balance(ctx.author.id, new_balance, db_field)
+        # Hold the airdrop amount until it ends, only if the balance still covers it
+        _, error = await asyncio.to_thread(
+            transfers.transfer, "airdrop_escrow",
+            from_id=ctx.author.id,
+            debit={db_field: amount_value},
+            history=({"type": "airdrop_created", "amount": amount_value, "currency": db_field}, None),
+            key=f"airdrop:{ctx.message.id}"
+        )
+        if error:
+            embed = discord.Embed(
+                title="<:no:1344252518305234987> | Insufficient Funds",
+                description=f"You don't have enough {display_currency} for this airdrop.",
+                color=0xFF0000
+            )
+            await loading_message.delete()
+            return await ctx.reply(embed=embed)
 
         # Create airdrop data
         airdrop_data = {
@@ -644,17 +658,17 @@ class ServersCog(commands.Cog):
 
             if participant_count == 0:
                 # No participants - refund the creator (minus fee)
-                db = Users()
-                creator_data = db.fetch_user(airdrop_data["author_id"])
-                if creator_data:
-                    current_balance = creator_data.get(airdrop_data["currency"], 0)
-                    new_balance = current_balance + airdrop_data["amount"]
-                    db.update_balance(airdrop_data["author_id"], new_balance, airdrop_data["currency"])
-
+                _, error = await asyncio.to_thread(
+                    transfers.transfer, "airdrop_refund",
+                    to_id=airdrop_data["author_id"],
+                    credit={airdrop_data["currency"]: airdrop_data["amount"]},
+                    history=(None, {"type": "airdrop_refund", "amount": airdrop_data["amount"], "currency": airdrop_data["currency"]})
+                )
+                if not error:
                     embed.description = f"No one joined the airdrop. The amount has been refunded to {airdrop_data['author_name']}."
 
                     # Notify creator
-                    creator = self.bot.get_user(airdrop_data["author_id"])
+                    creator = await resolve_user(self.bot, airdrop_data["author_id"])
                     if creator:
                         try:
                             refund_embed = discord.Embed(
@@ -676,49 +690,30 @@ class ServersCog(commands.Cog):
                     f"**{participant_count}** participants received **{share_amount:.2f} {airdrop_data['display_currency']}** each."
                 )
 
-                # Distribute shares to participants
-                db = Users()
-                participants_notified = 0
-
-                for participant_id in participants:
-                    participant_data = db.fetch_user(participant_id)
-                    if participant_data:
-                        # Update participant balance
-                        current_balance = participant_data.get(airdrop_data["currency"], 0)
-                        new_balance = current_balance + share_amount
-                        db.update_balance(participant_id, new_balance, airdrop_data["currency"])
-
-                        # Add to history
-                        history_entry = {
-                            "type": "airdrop",
-                            "amount": share_amount,
-                            "currency": airdrop_data["currency"],
-                            "from_id": airdrop_data["author_id"],
-                            "from_name": airdrop_data["author_name"],
-                            "timestamp": int(time.time())
-                        }
-                        db.collection.update_one(
-                            {"discord_id": participant_id},
-                            {"$push": {"history": {"$each": [history_entry], "$slice": -100}}}
-                        )
+                # Distribute shares to participants, one bulk write for everyone
+                history_entry = {
+                    "type": "airdrop",
+                    "amount": share_amount,
+                    "currency": airdrop_data["currency"],
+                    "from_id": airdrop_data["author_id"],
+                    "from_name": airdrop_data["author_name"],
+                    "timestamp": int(time.time())
+                }
+                await asyncio.to_thread(
+                    transfers.payout, "airdrop", airdrop_data["author_id"], participants,
+                    {airdrop_data["currency"]: share_amount}, history_entry
+                )
 
-                        # Notify participant
-                        participant = self.bot.get_user(participant_id)
-                        if participant:
-                            try:
-                                notify_embed = discord.Embed(
-                                    title="🎁 Airdrop Received!",
-                                    description=(
-                                        f"You received **{share_amount:.2f} {airdrop_data['display_currency']}** from "
-                                        f"{airdrop_data['author_name']}'s airdrop!"
-                                    ),
-                                    color=0x00FFAE
-                                )
-                                await participant.send(embed=notify_embed)
-                                participants_notified += 1
-                            except discord.Forbidden:
-                                # Can't DM the user, just continue
-                                pass
+                # Notify participants
+                notify_embed = discord.Embed(
+                    title="🎁 Airdrop Received!",
+                    description=(
+                        f"You received **{share_amount:.2f} {airdrop_data['display_currency']}** from "
+                        f"{airdrop_data['author_name']}'s airdrop!"
+                    ),
+                    color=0x00FFAE
+                )
+                participants_notified = await send_dms(self.bot, participants, notify_embed)
 
                 # Add notification stats to embed
                 if participants_notified < participant_count:
@@ -0,0 +1,43 @@
+import asyncio
+import datetime
+from discord.ext import commands, tasks
+from colorama import Fore, Back, Style
+from Cogs.utils.game_sessions import sessions, SNAPSHOT_INTERVAL
+
+
+class GameSessions(commands.Cog):
+    """Background upkeep for the shared game session manager"""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.maintain_sessions.start()
+
+    def cog_unload(self):
+        self.maintain_sessions.cancel()
+
+    @tasks.loop(seconds=SNAPSHOT_INTERVAL)
+    async def maintain_sessions(self):
+        """Evict expired sessions, snapshot live wagers and refund orphaned ones"""
+        try:
+            evicted = sessions.sweep()
+            if evicted:
+                rn = datetime.datetime.now().strftime("%X")
+                print(f"{Back.YELLOW}  {Style.DIM}SESSIONS{Style.RESET_ALL}{Back.RESET}{Fore.WHITE}    {Fore.LIGHTWHITE_EX}{rn}{Fore.WHITE}    {Style.BRIGHT}evicted {len(evicted)} expired game(s){Style.RESET_ALL}  {Fore.MAGENTA}session_ttl{Fore.WHITE}")
+
+            await asyncio.to_thread(sessions.write_snapshot)
+
+            refunded = await asyncio.to_thread(sessions.recover)
+            if refunded:
+                total = sum(doc["bet"] for doc in refunded)
+                rn = datetime.datetime.now().strftime("%X")
+                print(f"{Back.CYAN}  {Style.DIM}SESSIONS{Style.RESET_ALL}{Back.RESET}{Fore.WHITE}    {Fore.LIGHTWHITE_EX}{rn}{Fore.WHITE}    {Style.BRIGHT}{Fore.GREEN}refunded {len(refunded)} interrupted game(s), {total:.2f} points{Style.RESET_ALL}  {Fore.MAGENTA}session_recovery{Fore.WHITE}")
+        except Exception as e:
+            print(f"{Fore.RED}[!] {Fore.WHITE}Error maintaining game sessions: {Fore.RED}{e}")
+
+    @maintain_sessions.before_loop
+    async def before_maintain_sessions(self):
+        await self.bot.wait_until_ready()
+
+
+def setup(bot):
+    bot.add_cog(GameSessions(bot))
@@ -3,30 +3,26 @@
 import discord
 from discord.ext import commands, tasks
 import os
-import qrcode
 import io
 import asyncio
 import datetime
 import time
-import aiohttp
 import json
 from dotenv import load_dotenv
-from solders.keypair import Keypair
-from solders.pubkey import Pubkey
-from solana.rpc.async_api import AsyncClient
-from solana.rpc.commitment import Finalized
-from solana.exceptions import SolanaRpcException
-from bip_utils import Bip39SeedGenerator, Bip39MnemonicValidator, Bip44, Bip44Coins, Bip44Changes
-from hashlib import sha256
-import base58
 from colorama import Fore, Style
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw
 import traceback
 
-from Cogs.utils.mongo import Users
+from Cogs.utils.mongo import Users, counters, seen_transactions, ledger
+from Cogs.utils.metrics import timed
 from Cogs.utils.notifier import Notifier
 from Cogs.utils.emojis import emoji
 from Cogs.utils.currency_helper import get_crypto_price
+from Cogs.utils.deposit_watcher import DepositWatcher
+from Cogs.utils.address_pool import AddressPool
+from Cogs.utils.render_cache import deposit_cards, deposit_card_fonts
+from Cogs.utils.lazy_imports import lazy_import
+from Cogs.utils.dm_fanout import resolve_user
 
 # Load environment variables
 load_dotenv()
@@ -40,13 +36,25 @@ MONGO_URI = os.environ.get("MONGO")
 # Constants
 SOL_CONVERSION_RATE = 0.0001442
 SOL_LAMPORTS = 1_000_000_000
-REQUIRED_COMMITMENT = Finalized
+REQUIRED_COMMITMENT = "finalized"  # solana.rpc.commitment.Finalized
 ALCHEMY_API_URL = f"https://solana-mainnet.g.alchemy.com/v2/{ALCHEMY_API}" if ALCHEMY_API else "https://api.mainnet-beta.solana.com"
 RPC_URL = ALCHEMY_API_URL
 CHECK_DEPOSIT_COOLDOWN = 15
+WATCH_INTERVAL = 20  # seconds between background checks of a watched address
 EMBED_TIMEOUT = 600
 SOL_DERIVATION_PATH_ACCOUNT_TEMPLATE = "m/44'/501'/0'/0'/{}"  # All addresses under account 0
-
+SIGNATURE_PAGE_SIZE = 100  # signatures per getSignaturesForAddress call
+MAX_SIGNATURE_PAGES = 10  # pages per check; longer backlogs are worked through over several checks
+TX_FETCH_CONCURRENCY = 8  # getTransaction calls in flight per process
+
+# Heavy dependencies are only imported when a deposit is actually made
+qrcode = lazy_import("qrcode")
+bip_utils = lazy_import("bip_utils")
+solders_pubkey = lazy_import("solders.pubkey")
+solders_signature = lazy_import("solders.signature")
+solana_async_api = lazy_import("solana.rpc.async_api")
+
+@timed("render", "sol_deposit_card")
 def generate_qr_code(address: str, username: str):
     """Generates a styled QR code image with text for Solana."""
     qr_data = address
@@ -61,19 +69,7 @@ def generate_qr_code(address: str, username: str):
     qr_img = qr.make_image(fill_color="black", back_color="white").convert('RGB')
     qr_width, qr_height = qr_img.size
 
-    try:
-        title_font = ImageFont.truetype("Helvetica-Bold.ttf", 30)
-        subtitle_font = ImageFont.truetype("Helvetica.ttf", 18)
-        brand_font = ImageFont.truetype("Helvetica-Bold.ttf", 36)
-    except IOError:
-        try:
-            title_font = ImageFont.truetype("arial.ttf", 30)
-            subtitle_font = ImageFont.truetype("arial.ttf", 18)
-            brand_font = ImageFont.truetype("arial.ttf", 36)
-        except IOError:
-            title_font = ImageFont.load_default()
-            subtitle_font = ImageFont.load_default()
-            brand_font = ImageFont.load_default()
+    title_font, subtitle_font, brand_font = deposit_card_fonts()
 
     title_text = f"{username}'s SOL Deposit Address"
     instruction_text = "Only send SOLANA (SOL)"
@@ -159,6 +155,43 @@ class DepositView(discord.ui.View):
             except KeyError:
                 pass
 
+    async def show_success(self, deposits):
+        """Turn the deposit message into a receipt for the credited transactions"""
+        if not self.message:
+            return
+        total_sol = sum(d['amount_crypto'] for d in deposits)
+
+        updated_user = self.cog.users_db.fetch_user(self.user_id)
+        sol_balance = updated_user.get("wallet", {}).get("SOL", 0) if updated_user else 0
+
+        main_embed = self.message.embeds[0]
+        main_embed.title = "<:yes:1355501647538815106> | Deposit Success"
+        main_embed.description = f"<:sol:1340981839497793556> **+{total_sol:,.6f} SOL** from {len(deposits)} transaction(s)"
+        main_embed.clear_fields()
+        main_embed.set_image(url=None)
+
+        for i, deposit in enumerate(deposits, 1):
+            txid = deposit['txid']
+            txid_short = txid[:10] + '...' + txid[-10:] if len(txid) > 20 else txid
+            explorer_url = f"https://solscan.io/tx/{txid}"
+            tx_value = f"[`{txid_short}`]({explorer_url})"
+
+            main_embed.add_field(
+                name=f"Transaction #{i}",
+                value=f"Amount: {deposit['amount_crypto']:,.6f} SOL\nTXID: {tx_value}",
+                inline=False
+            )
+
+        main_embed.add_field(name="New SOL Balance", value=f"<:sol:1340981839497793556> {sol_balance:,.6f} SOL", inline=True)
+
+        for item in self.children:
+            if isinstance(item, discord.ui.Button) and item.custom_id == "check_deposit_button":
+                item.disabled = True
+                item.style = discord.ButtonStyle.grey
+                item.label = "Checked"
+
+        await self.message.edit(embed=main_embed, view=self, attachments=[])
+
     @discord.ui.button(label="Check for New Deposits", style=discord.ButtonStyle.green, custom_id="check_deposit_button", emoji="🔄")
     async def check_deposit_button(self, button: discord.ui.Button, interaction: discord.Interaction):
         now = time.time()
@@ -174,90 +207,12 @@ class DepositView(discord.ui.View):
         await interaction.response.defer(ephemeral=True)
 
         try:
-            status, details = await self.cog._check_for_deposits(self.user_id, self.address)
+            # The watcher keeps this address checked; this is a cache read unless the result is stale
+            status, details = await self.cog.watcher.status(self.user_id, self.address)
 
             if status == "success":
-                deposits = details.get('deposits', [])
-                if not deposits:
-                    await interaction.followup.send("Deposit check successful, but no deposit details found.", ephemeral=True)
-                    return
-
-                total_sol = sum(d['amount_crypto'] for d in deposits)
-
-                updated_user = self.cog.users_db.fetch_user(self.user_id)
-                if not updated_user:
-                    await interaction.followup.send("Deposit processed, but failed to fetch updated balance.", ephemeral=True)
-                    return
-
-                sol_balance = updated_user.get("wallet", {}).get("SOL", 0)
-
-                for deposit in deposits:
-                    sol_price = await get_crypto_price('solana')
-                    usd_value = deposit['amount_crypto'] * sol_price if sol_price else None
-
-                    points_credited = deposit.get('points_credited', 0)
-                    
-                    await self.cog.notifier.deposit_notification(
-                        user_id=self.user_id,
-                        username=interaction.user.name,
-                        amount_crypto=deposit['amount_crypto'],
-                        currency="SOL",
-                        points_credited=points_credited,
-                        usd_value=usd_value,
-                        txid=deposit['txid'],
-                        address=self.address
-                    )
-
-                    history_entry = {
-                        "type": "sol_deposit",
-                        "amount_crypto": deposit['amount_crypto'],
-                        "points_credited": points_credited,
-                        "currency": "SOL",
-                        "usd_value": usd_value,
-                        "txid": deposit['txid'],
-                        "address": self.address,
-                        "status": "confirmed",
-                        "timestamp": datetime.datetime.utcnow().isoformat() + "Z"
-                    }
-                    self.cog.users_db.update_history(self.user_id, history_entry)
-
-                    if usd_value:
-                        self.cog.users_db.collection.update_one(
-                            {"discord_id": self.user_id},
-                            {"$inc": {"total_deposit_amount_usd": usd_value}}
-                        )
-
-                if not self.message:
-                    await interaction.followup.send("Error: Could not find the original deposit message to update.", ephemeral=True)
-                    return
-
-                main_embed = self.message.embeds[0]
-                main_embed.title = "<:yes:1355501647538815106> | Deposit Success"
-                main_embed.description = f"<:sol:1340981839497793556> **+{total_sol:,.6f} SOL** from {len(deposits)} transaction(s)"
-                main_embed.clear_fields()
-                main_embed.set_image(url=None)
-
-                for i, deposit in enumerate(deposits, 1):
-                    txid = deposit['txid']
-                    txid_short = txid[:10] + '...' + txid[-10:] if len(txid) > 20 else txid
-                    explorer_url = f"https://solscan.io/tx/{txid}"
-                    tx_value = f"[`{txid_short}`]({explorer_url})"
-
-                    main_embed.add_field(
-                        name=f"Transaction #{i}",
-                        value=f"Amount: {deposit['amount_crypto']:,.6f} SOL\nTXID: {tx_value}",
-                        inline=False
-                    )
-
-                main_embed.add_field(name="New SOL Balance", value=f"<:sol:1340981839497793556> {sol_balance:,.6f} SOL", inline=True)
-
-                for item in self.children:
-                    if isinstance(item, discord.ui.Button) and item.custom_id == "check_deposit_button":
-                        item.disabled = True
-                        item.style = discord.ButtonStyle.grey
-                        item.label = "Checked"
-
-                await self.message.edit(embed=main_embed, view=self, attachments=[])
+                # Credited and shown on the deposit message by the watcher callback
+                return
 
             elif status == "pending":
                 pending_amount = details.get('amount_crypto', 0)
@@ -323,7 +278,14 @@ class SolDeposit(commands.Cog):
         self.notifier = Notifier()
         self.active_deposit_views = {}
         self.button_cooldowns = {}
-        self.solana_client = AsyncClient(RPC_URL)
+        self._solana_client = None
+        self._tx_semaphore = asyncio.Semaphore(TX_FETCH_CONCURRENCY)
+        self.watcher = DepositWatcher("sol", self._watch_check, WATCH_INTERVAL)
+        self.watcher.start(bot)
+        self._account_ctx = None
+        self.address_pool = AddressPool("sol", self._derive_address, self._reserve_address_indices)
+        if PHANTOM_SEED:
+            self.address_pool.start(bot)
 
         if not PHANTOM_SEED:
             print(f"{Fore.RED}[!] ERROR: PHANTOM_SEED not found in environment variables!{Style.RESET_ALL}")
@@ -332,8 +294,112 @@ class SolDeposit(commands.Cog):
         if not DEPOSIT_WEBHOOK_URL:
             print(f"{Fore.YELLOW}[!] WARNING: DEPOSIT_WEBHOOK_URL not found.{Style.RESET_ALL}")
 
+    @property
+    def solana_client(self):
+        # The RPC client is only built the first time a deposit is checked
+        if self._solana_client is None:
+            self._solana_client = solana_async_api.AsyncClient(RPC_URL)
+        return self._solana_client
+
     async def cog_unload(self):
-        await self.solana_client.close()
+        self.watcher.stop()
+        self.address_pool.stop()
+        if self._solana_client is not None:
+            await self._solana_client.close()
+
+    async def _watch_check(self, user_id: int, address: str) -> tuple[str, dict]:
+        """Watcher check: credit confirmed deposits and tell the user about them"""
+        status, details = await self._check_for_deposits(user_id, address)
+        if status == "success":
+            deposits = details['deposits']
+            await self._record_deposits(user_id, address, deposits)
+            view = self.active_deposit_views.get(user_id)
+            if view and view.address == address and view.message:
+                await view.show_success(deposits)
+            else:
+                await self._dm_deposit(user_id, deposits)
+        return status, details
+
+    async def _record_deposits(self, user_id: int, address: str, deposits: list):
+        """History, USD totals and the deposit webhook for deposits that were just credited"""
+        sol_price = await get_crypto_price('solana')
+        user_data = self.users_db.fetch_user(user_id) or {}
+        balance_after = user_data.get("points", 0)
+        user = self.bot.get_user(user_id)
+        username = user.name if user else f"User_{user_id}"
+
+        for deposit in deposits:
+            usd_value = deposit['amount_crypto'] * sol_price if sol_price else None
+            points_credited = deposit.get('points_credited', 0)
+
+            history_entry = {
+                "type": "sol_deposit",
+                "amount_crypto": deposit['amount_crypto'],
+                "points_credited": points_credited,
+                "currency": "SOL",
+                "usd_value": usd_value,
+                "txid": deposit['txid'],
+                "address": address,
+                "status": "confirmed",
+                "timestamp": datetime.datetime.utcnow().isoformat() + "Z"
+            }
+            self.users_db.update_history(user_id, history_entry)
+
+            if usd_value:
+                self.users_db.collection.update_one(
+                    {"discord_id": user_id},
+                    {"$inc": {"total_deposit_amount_usd": usd_value}}
+                )
+
+            if DEPOSIT_WEBHOOK_URL:
+                asyncio.create_task(self.notifier.deposit_notification(
+                    user_id=user_id,
+                    username=username,
+                    amount_crypto=deposit['amount_crypto'],
+                    currency="SOL",
+                    points_credited=points_credited,
+                    txid=deposit['txid'],
+                    balance_before=balance_after - points_credited,
+                    balance_after=balance_after,
+                    webhook_url=DEPOSIT_WEBHOOK_URL
+                ))
+
+    async def _dm_deposit(self, user_id: int, deposits: list):
+        """Deposit confirmed while the user had no deposit message open"""
+        user = await resolve_user(self.bot, user_id)
+        if not user:
+            return
+        total_sol = sum(d['amount_crypto'] for d in deposits)
+        embed = discord.Embed(
+            title="<:yes:1355501647538815106> | Deposit Success",
+            description=f"<:sol:1340981839497793556> **+{total_sol:,.6f} SOL** has been credited to your balance.",
+            color=0x00FFAE
+        )
+        embed.set_footer(text="BetSync Casino")
+        try:
+            await user.send(embed=embed)
+        except (discord.Forbidden, discord.HTTPException):
+            pass
+
+    def _derive_address(self, index: int) -> str:
+        """Address at m/44'/501'/0'/0/index under account 0, blocking"""
+        # Seed generation is a 2048-round PBKDF2, so the account-level context is built once
+        if self._account_ctx is None:
+            seed_bytes = bip_utils.Bip39SeedGenerator(PHANTOM_SEED).Generate()
+            bip44_mst_ctx = bip_utils.Bip44.FromSeed(seed_bytes, bip_utils.Bip44Coins.SOLANA)
+            self._account_ctx = bip44_mst_ctx.Purpose().Coin().Account(0).Change(bip_utils.Bip44Changes.CHAIN_EXT)
+        return self._account_ctx.AddressIndex(index).PublicKey().ToAddress()
+
+    def _next_address_index(self) -> int:
+        """One past the highest sol_address_index stored, seeds the counter once"""
+        highest_index_user = self.users_db.collection.find_one(
+            {"sol_address_index": {"$exists": True}},
+            sort=[("sol_address_index", -1)]
+        )
+        return highest_index_user['sol_address_index'] + 1 if highest_index_user else 0
+
+    def _reserve_address_indices(self, count: int) -> int:
+        return counters.reserve("sol_address_index", count, floor=self._next_address_index)
 
     async def _generate_sol_address(self, user_id: int) -> tuple[str | None, str | None]:
         """Generate a unique SOL deposit address for the user under account 0."""
@@ -348,20 +414,8 @@ class SolDeposit(commands.Cog):
                 print(f"{Fore.GREEN}[+] Using existing SOL address for user {user_id}: {existing_address}{Style.RESET_ALL}")
                 return existing_address, None
 
-            # Generate unique address under account 0
-            seed_bytes = Bip39SeedGenerator(PHANTOM_SEED).Generate()
-            bip44_mst_ctx = Bip44.FromSeed(seed_bytes, Bip44Coins.SOLANA)
-
-            # Get the next available address index
-            highest_index_user = self.users_db.collection.find_one(
-                {"sol_address_index": {"$exists": True}},
-                sort=[("sol_address_index", -1)]
-            )
-            next_index = highest_index_user['sol_address_index'] + 1 if highest_index_user else 0
-
-            # Generate address under account 0, using address index for uniqueness
-            # Path: m/44'/501'/0'/0/{address_index}
-            deposit_address = bip44_mst_ctx.Purpose().Coin().Account(0).Change(Bip44Changes.CHAIN_EXT).AddressIndex(next_index).PublicKey().ToAddress()
+            # Generate unique address under account 0, using the address index for uniqueness
+            next_index, deposit_address = await self.address_pool.take()
 
             # Store in database
             update_data = {
@@ -389,6 +443,120 @@ class SolDeposit(commands.Cog):
             traceback.print_exc()
             return None, f"Failed to generate deposit address: {e}"
 
+    async def _new_signatures(self, pubkey_address, until, before=None) -> tuple[list, bool]:
+        """
+        Signatures between until and before (both exclusive), newest first,
+        and whether that reached until or the address's oldest signature
+        """
+        signatures = []
+        for _ in range(MAX_SIGNATURE_PAGES):
+            response = await self.solana_client.get_signatures_for_address(
+                pubkey_address,
+                before=before,
+                until=until,
+                limit=SIGNATURE_PAGE_SIZE,
+                commitment=REQUIRED_COMMITMENT
+            )
+            page = response.value if response and response.value else []
+            signatures.extend(page)
+            if len(page) < SIGNATURE_PAGE_SIZE:
+                return signatures, True
+            before = page[-1].signature
+        return signatures, False
+
+    def _advance_scan(self, user_id: int, head: dict, oldest, drained: bool):
+        """
+        Move the signature cursor after a check that settled every signature it fetched.
+
+        The cursor (sol_scan_signature/sol_scan_slot) only moves once the whole
+        window between it and head has been fetched. Until then sol_scan_backfill
+        remembers the window's head and the oldest signature fetched so far, and
+        the next check continues below that. Both updates are conditional on slot,
+        so a slower concurrent check can never move either one backwards.
+        """
+        not_past_head = {"$or": [
+            {"sol_scan_slot": {"$exists": False}},
+            {"sol_scan_slot": {"$lte": head["slot"]}}
+        ]}
+        if drained:
+            self.users_db.collection.update_one(
+                {"discord_id": user_id, **not_past_head},
+                {
+                    "$set": {"sol_scan_signature": head["signature"], "sol_scan_slot": head["slot"]},
+                    "$unset": {"sol_scan_backfill": ""}
+                }
+            )
+            return
+        self.users_db.collection.update_one(
+            {"discord_id": user_id, "$and": [not_past_head, {"$or": [
+                {"sol_scan_backfill": {"$exists": False}},
+                {"sol_scan_backfill.signature": head["signature"], "sol_scan_backfill.before_slot": {"$gte": oldest.slot}}
+            ]}]},
+            {"$set": {"sol_scan_backfill": dict(head, before=str(oldest.signature), before_slot=oldest.slot)}}
+        )
+
+    async def _fetch_transaction(self, tx_hash: str):
+        async with self._tx_semaphore:
+            return await self.solana_client.get_transaction(
+                solders_signature.Signature.from_string(tx_hash),
+                encoding="jsonParsed",
+                max_supported_transaction_version=0,
+                commitment=REQUIRED_COMMITMENT
+            )
+
+    def _lamports_received(self, tx_data, address: str) -> int:
+        """Lamports the transaction added to address"""
+        lamports_received = 0
+        target_pubkey_str = address
+
+        pre_balances = tx_data.transaction.meta.pre_balances
+        post_balances = tx_data.transaction.meta.post_balances
+        
+        # Handle different transaction structures
+        account_keys = []
+        if hasattr(tx_data.transaction, 'message') and tx_data.transaction.message:
+            account_keys = tx_data.transaction.message.account_keys
+        elif hasattr(tx_data, 'transaction') and hasattr(tx_data.transaction, 'message'):
+            # Try alternative access pattern
+            try:
+                account_keys = tx_data.transaction.message.account_keys
+            except AttributeError:
+                # If message doesn't exist, try to get from meta
+                if hasattr(tx_data.transaction.meta, 'loaded_addresses'):
+                    account_keys = getattr(tx_data.transaction.meta, 'loaded_addresses', {}).get('writable', [])
+                    account_keys.extend(getattr(tx_data.transaction.meta, 'loaded_addresses', {}).get('readonly', []))
+
+        # Find balance change for our address
+        for i, key in enumerate(account_keys):
+            if i < len(pre_balances) and i < len(post_balances):
+                key_str = str(key.pubkey) if hasattr(key, 'pubkey') else str(key)
+                if key_str == target_pubkey_str:
+                    balance_change = post_balances[i] - pre_balances[i]
+                    if balance_change > 0:
+                        lamports_received = balance_change
+                        break
+        
+        # If we couldn't find the address in account_keys, check post_token_balances
+        if lamports_received == 0:
+            # Alternative method: check if any balance change happened for our address
+            # by looking at post_token_balances or by examining the transaction more carefully
+            try:
+                # Check if this is a simple SOL transfer by examining instruction data
+                if hasattr(tx_data.transaction, 'message') and hasattr(tx_data.transaction.message, 'instructions'):
+                    instructions = tx_data.transaction.message.instructions
+                    for instruction in instructions:
+                        # SOL transfer typically has program_id as System Program
+                        if hasattr(instruction, 'program_id') and str(instruction.program_id) == "11111111111111111111111111111112":
+                            # This is likely a SOL transfer, check if our address received funds
+                            for i, balance_change in enumerate(zip(pre_balances, post_balances)):
+                                pre_bal, post_bal = balance_change
+                                if post_bal > pre_bal:
+                                    lamports_received = post_bal - pre_bal
+                                    break
+            except Exception as inner_e:
+                print(f"{Fore.YELLOW}[!] Could not process instruction data: {inner_e}{Style.RESET_ALL}")
+        return lamports_received
+
     async def _check_for_deposits(self, user_id: int, address: str) -> tuple[str, dict]:
         """Check for deposits to the address and credit user's wallet."""
         try:
@@ -401,170 +569,105 @@ class SolDeposit(commands.Cog):
 
             # Get address pubkey
             try:
-                pubkey_address = Pubkey.from_string(address)
+                pubkey_address = solders_pubkey.Pubkey.from_string(address)
             except Exception as e:
                 return "error", {"error": f"Invalid address format: {e}"}
 
-            # Get recent transactions for this address
             try:
-                signatures_response = await self.solana_client.get_signatures_for_address(
-                    pubkey_address,
-                    limit=50,
-                    commitment=Finalized
-                )
-
-                if not signatures_response or not signatures_response.value:
-                    return "no_new", {}
-
-                # Process each transaction
-                for sig_info in signatures_response.value:
-                    tx_hash = str(sig_info.signature)
-
-                    # Skip if already processed or transaction failed
-                    if tx_hash in processed_txids or sig_info.err:
-                        continue
-
-                    try:
-                        # Get transaction details
-                        from solders.signature import Signature
-                        signature = Signature.from_string(tx_hash)
-                        tx_detail_response = await self.solana_client.get_transaction(
-                            signature,
-                            encoding="jsonParsed",
-                            max_supported_transaction_version=0,
-                            commitment=Finalized
-                        )
-
-                        if not tx_detail_response or not tx_detail_response.value:
-                            # Mark as processed to avoid checking again
-                            self.users_db.collection.update_one(
-                                {"discord_id": user_id},
-                                {"$addToSet": {"processed_sol_txids": tx_hash}}
-                            )
-                            continue
-
-                        tx_data = tx_detail_response.value
-
-                        # Skip if transaction failed
-                        if not tx_data.transaction or not tx_data.transaction.meta or tx_data.transaction.meta.err:
-                            self.users_db.collection.update_one(
-                                {"discord_id": user_id},
-                                {"$addToSet": {"processed_sol_txids": tx_hash}}
-                            )
-                            continue
-
-                        # Calculate SOL received
-                        lamports_received = 0
-                        target_pubkey_str = address
-
-                        pre_balances = tx_data.transaction.meta.pre_balances
-                        post_balances = tx_data.transaction.meta.post_balances
-                        
-                        # Handle different transaction structures
-                        account_keys = []
-                        if hasattr(tx_data.transaction, 'message') and tx_data.transaction.message:
-                            account_keys = tx_data.transaction.message.account_keys
-                        elif hasattr(tx_data, 'transaction') and hasattr(tx_data.transaction, 'message'):
-                            # Try alternative access pattern
-                            try:
-                                account_keys = tx_data.transaction.message.account_keys
-                            except AttributeError:
-                                # If message doesn't exist, try to get from meta
-                                if hasattr(tx_data.transaction.meta, 'loaded_addresses'):
-                                    account_keys = getattr(tx_data.transaction.meta, 'loaded_addresses', {}).get('writable', [])
-                                    account_keys.extend(getattr(tx_data.transaction.meta, 'loaded_addresses', {}).get('readonly', []))
-
-                        # Find balance change for our address
-                        for i, key in enumerate(account_keys):
-                            if i < len(pre_balances) and i < len(post_balances):
-                                key_str = str(key.pubkey) if hasattr(key, 'pubkey') else str(key)
-                                if key_str == target_pubkey_str:
-                                    balance_change = post_balances[i] - pre_balances[i]
-                                    if balance_change > 0:
-                                        lamports_received = balance_change
-                                        break
-                        
-                        # If we couldn't find the address in account_keys, check post_token_balances
-                        if lamports_received == 0:
-                            # Alternative method: check if any balance change happened for our address
-                            # by looking at post_token_balances or by examining the transaction more carefully
-                            try:
-                                # Check if this is a simple SOL transfer by examining instruction data
-                                if hasattr(tx_data.transaction, 'message') and hasattr(tx_data.transaction.message, 'instructions'):
-                                    instructions = tx_data.transaction.message.instructions
-                                    for instruction in instructions:
-                                        # SOL transfer typically has program_id as System Program
-                                        if hasattr(instruction, 'program_id') and str(instruction.program_id) == "11111111111111111111111111111112":
-                                            # This is likely a SOL transfer, check if our address received funds
-                                            for i, balance_change in enumerate(zip(pre_balances, post_balances)):
-                                                pre_bal, post_bal = balance_change
-                                                if post_bal > pre_bal:
-                                                    lamports_received = post_bal - pre_bal
-                                                    break
-                            except Exception as inner_e:
-                                print(f"{Fore.YELLOW}[!] Could not process instruction data: {inner_e}{Style.RESET_ALL}")
-
-                        if lamports_received <= 0:
-                            # Mark as processed to skip in future
-                            self.users_db.collection.update_one(
-                                {"discord_id": user_id},
-                                {"$addToSet": {"processed_sol_txids": tx_hash}}
-                            )
-                            continue
-
-                        # Convert lamports to SOL
-                        amount_sol = lamports_received / SOL_LAMPORTS
-                        
-                        # Convert SOL to points using the conversion rate
-                        points_to_add = amount_sol / SOL_CONVERSION_RATE
-
-                        # Update user's SOL wallet balance AND points
-                        update_result = self.users_db.collection.update_one(
-                            {"discord_id": user_id},
-                            {
-                                "$inc": {
-                                    "wallet.SOL": amount_sol,
-                                    "points": points_to_add
-                                }
-                            }
-                        )
-
-                        if update_result.matched_count == 0:
-                            print(f"{Fore.RED}[!] Failed to update wallet for user {user_id}{Style.RESET_ALL}")
-                            continue
-
-                        # Mark transaction as processed
-                        self.users_db.collection.update_one(
-                            {"discord_id": user_id},
-                            {"$addToSet": {"processed_sol_txids": tx_hash}}
-                        )
-
-                        processed_deposits.append({
-                            "amount_crypto": amount_sol,
-                            "points_credited": points_to_add,
-                            "txid": tx_hash
-                        })
-
-                        print(f"{Fore.GREEN}[+] Processed SOL deposit: {amount_sol:.6f} SOL for user {user_id} (TX: {tx_hash}){Style.RESET_ALL}")
-
-                    except Exception as e:
-                        print(f"{Fore.RED}[!] Error processing transaction {tx_hash}: {e}{Style.RESET_ALL}")
-                        # Mark as processed to avoid infinite retries
-                        self.users_db.collection.update_one(
-                            {"discord_id": user_id},
-                            {"$addToSet": {"processed_sol_txids": tx_hash}}
-                        )
-                        continue
-
-                if processed_deposits:
-                    return "success", {"deposits": processed_deposits}
-                else:
+                # Only signatures after the newest one a previous check finished with,
+                # continuing below a window that an earlier check couldn't fetch in full
+                cursor = user_data.get('sol_scan_signature')
+                until = solders_signature.Signature.from_string(cursor) if cursor else None
+                backfill = user_data.get('sol_scan_backfill')
+                before = solders_signature.Signature.from_string(backfill['before']) if backfill else None
+                signatures, drained = await self._new_signatures(pubkey_address, until, before)
+                if not signatures:
+                    if backfill and drained:
+                        self._advance_scan(user_id, backfill, None, True)
                     return "no_new", {}
 
+                # Failed transactions never credit; credited and already inspected ones are skipped
+                candidates = [
+                    str(sig_info.signature) for sig_info in signatures
+                    if not sig_info.err and str(sig_info.signature) not in processed_txids
+                ]
+                candidates = seen_transactions.unseen("sol", candidates)
+                responses = await asyncio.gather(
+                    *(self._fetch_transaction(tx_hash) for tx_hash in candidates),
+                    return_exceptions=True
+                )
             except Exception as e:
                 print(f"{Fore.RED}[!] Error checking Solana RPC: {e}{Style.RESET_ALL}")
                 return "error", {"error": f"RPC connection error: {e}"}
 
+            seen = []  # (txid, reason) that will never credit
+            complete = True  # every new signature settled, so the cursor can move
+            for tx_hash, tx_detail_response in zip(candidates, responses):
+                if isinstance(tx_detail_response, Exception) or not tx_detail_response or not tx_detail_response.value:
+                    # RPC error or not served yet, retried by the next check
+                    print(f"{Fore.YELLOW}[!] Could not fetch transaction {tx_hash}: {tx_detail_response if isinstance(tx_detail_response, Exception) else 'not found'}{Style.RESET_ALL}")
+                    complete = False
+                    continue
+
+                tx_data = tx_detail_response.value
+                if not tx_data.transaction or not tx_data.transaction.meta or tx_data.transaction.meta.err:
+                    seen.append((tx_hash, "failed"))
+                    continue
+
+                try:
+                    lamports_received = self._lamports_received(tx_data, address)
+                except Exception as e:
+                    print(f"{Fore.RED}[!] Error processing transaction {tx_hash}: {e}{Style.RESET_ALL}")
+                    # Mark as seen to avoid infinite retries
+                    seen.append((tx_hash, "error"))
+                    continue
+
+                if lamports_received <= 0:
+                    seen.append((tx_hash, "no_deposit"))
+                    continue
+
+                # Convert lamports to SOL
+                amount_sol = lamports_received / SOL_LAMPORTS
+
+                # Convert SOL to points using the conversion rate
+                points_to_add = amount_sol / SOL_CONVERSION_RATE
+
+                # Update user's SOL wallet balance AND points, marking the transaction as
+                # processed in the same update so racing checks only credit it once
+                update_result = self.users_db.collection.update_one(
+                    {"discord_id": user_id, "processed_sol_txids": {"$ne": tx_hash}},
+                    {
+                        "$inc": {
+                            "wallet.SOL": amount_sol,
+                            "points": points_to_add
+                        },
+                        "$addToSet": {"processed_sol_txids": tx_hash}
+                    }
+                )
+
+                if update_result.matched_count == 0:
+                    print(f"{Fore.YELLOW}[!] TX {tx_hash} for user {user_id} was already credited or the user is missing{Style.RESET_ALL}")
+                    continue
+                ledger.record(user_id, points_to_add, "deposit", f"sol:{tx_hash}")
+
+                processed_deposits.append({
+                    "amount_crypto": amount_sol,
+                    "points_credited": points_to_add,
+                    "txid": tx_hash
+                })
+
+                print(f"{Fore.GREEN}[+] Processed SOL deposit: {amount_sol:.6f} SOL for user {user_id} (TX: {tx_hash}){Style.RESET_ALL}")
+
+            seen_transactions.mark("sol", user_id, seen)
+            if complete:
+                head = backfill or {"signature": str(signatures[0].signature), "slot": signatures[0].slot}
+                self._advance_scan(user_id, {"signature": head["signature"], "slot": head["slot"]}, signatures[-1], drained)
+
+            if processed_deposits:
+                return "success", {"deposits": processed_deposits}
+            else:
+                return "no_new", {}
+
         except Exception as e:
             print(f"{Fore.RED}[!] Error in _check_for_deposits: {e}{Style.RESET_ALL}")
             traceback.print_exc()
@@ -615,7 +718,7 @@ class SolDeposit(commands.Cog):
         # Check for existing active view
         if user_id in self.active_deposit_views:
             try:
-                existing_message = self.active_deposit_views[user_id]
+                existing_message = self.active_deposit_views[user_id].message
                 await ctx.reply(f"You already have an active SOL deposit session. {existing_message.jump_url}", delete_after=10)
                 return
             except (discord.NotFound, AttributeError):
@@ -643,7 +746,7 @@ class SolDeposit(commands.Cog):
             return
 
         # Generate QR Code
-        qr_buffer = await asyncio.to_thread(generate_qr_code, address, username)
+        qr_buffer = io.BytesIO(await deposit_cards.get(f"sol:{address}:{username}", generate_qr_code, address, username))
         qr_file = discord.File(qr_buffer, filename=f"sol_deposit_{user_id}.png")
 
         # Create Embed
@@ -668,7 +771,8 @@ class SolDeposit(commands.Cog):
         # Send message
         message = await ctx.reply(embed=embed, file=qr_file, view=view)
         view.message = message
-        self.active_deposit_views[user_id] = message
+        self.active_deposit_views[user_id] = view
+        self.watcher.watch(user_id, address)
 
 def setup(bot):
     if not PHANTOM_SEED:
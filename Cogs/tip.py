@@ -1,7 +1,8 @@
 import discord
-import datetime
+import asyncio
 from discord.ext import commands
-from Cogs.utils.mongo import Users
+from colorama import Fore, Style
+from Cogs.utils.mongo import Users, transfers
 from Cogs.utils.emojis import emoji
 
 
@@ -9,6 +10,17 @@ class Tip(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.point_value = 0.0212  # USD value of 1 point
+        self.bot.loop.create_task(self.recover_transfers())
+
+    async def recover_transfers(self):
+        """Finish transfers a previous run was interrupted in the middle of"""
+        await self.bot.wait_until_ready()
+        try:
+            finished = await asyncio.to_thread(transfers.recover)
+            if finished:
+                print(f"{Fore.GREEN}[+] {Fore.WHITE}Finished {Fore.GREEN}{finished}{Fore.WHITE} interrupted transfers{Style.RESET_ALL}")
+        except Exception as e:
+            print(f"{Fore.RED}[!] Could not recover transfers: {e}{Style.RESET_ALL}")
 
     @commands.command(aliases=["give", "donate"])
     async def tip(self, ctx, user: discord.Member = None, amount=None):
@@ -90,33 +102,9 @@ class Tip(commands.Cog):
             db.register_new_user(dump)
             recipient_data = db.fetch_user(recipient.id)
 
-        # Check if sender has enough balance
-        sender_balance = sender_data.get("points", 0)
-        if sender_balance < amount:
-            embed = discord.Embed(
-                title="<:no:1344252518305234987> | Insufficient Balance",
-                description=f"You don't have enough points. Your balance: **{sender_balance:.2f} points**",
-                color=0xFF0000
-            )
-            return await ctx.reply(embed=embed)
-
-        # Process the tip
         # Get sender's primary currency
         sender_primary_coin = sender_data.get("primary_coin", "BTC")
-        
-        # Deduct from sender
-        db.update_balance(ctx.author.id, sender_balance - amount, "points", "$set")
-        
-        # Instead of adding to recipient's primary currency, add directly to their wallet in sender's currency
-        # First get recipient's wallet
-        recipient_wallet = recipient_data.get("wallet", {
-            "BTC": 0,
-            "SOL": 0,
-            "ETH": 0,
-            "LTC": 0,
-            "USDT": 0
-        })
-        
+
         # Calculate crypto value of the amount
         crypto_values = {
             "BTC": 0.00000024,   # 1 point = 0.00000024 btc
@@ -125,56 +113,45 @@ class Tip(commands.Cog):
             "USDT": 0.0212,      # 1 point = 0.0212 usdt
             "SOL": 0.0001442     # 1 point = 0.0001442 sol
         }
-        
-        # Calculate crypto amount to add to recipient's wallet
-        crypto_amount = amount * crypto_values[sender_primary_coin]
-        
-        # Add to recipient's wallet in sender's currency
-        current_wallet_amount = recipient_wallet.get(sender_primary_coin, 0)
-        new_wallet_amount = current_wallet_amount + crypto_amount
-        
-        # Update recipient's wallet
-        db.collection.update_one(
-            {"discord_id": recipient.id},
-            {"$set": {f"wallet.{sender_primary_coin}": new_wallet_amount}}
-        )
-        
-        # If the recipient's primary coin is the same as the sender's,
-        # we also need to update their points to reflect the new wallet value
-        recipient_primary_coin = recipient_data.get("primary_coin", "BTC")
-        if recipient_primary_coin == sender_primary_coin:
-            recipient_points = recipient_data.get("points", 0)
-            new_recipient_points = recipient_points + amount
-            db.update_balance(recipient.id, new_recipient_points, "points", "$set")
-        
-        # Record in history for both users
-        timestamp = int(datetime.datetime.now().timestamp())
-
-        # Sender history (sent tip)
-        sender_history = {
-            "type": "tip_sent",
-            "amount": amount,
-            "currency": "points",
-            "recipient": recipient.id,
-            "timestamp": timestamp
-        }
-        db.collection.update_one(
-            {"discord_id": ctx.author.id},
-            {"$push": {"history": {"$each": [sender_history], "$slice": -100}}}
-        )
 
-        # Recipient history (received tip)
-        recipient_history = {
-            "type": "tip_received",
-            "amount": amount,
-            "currency": "points",
-            "sender": ctx.author.id,
-            "timestamp": timestamp
-        }
-        db.collection.update_one(
-            {"discord_id": recipient.id},
-            {"$push": {"history": {"$each": [recipient_history], "$slice": -100}}}
+        # The points go to the recipient's wallet in the sender's currency,
+        # and to their points too when that is their primary currency
+        crypto_amount = amount * crypto_values[sender_primary_coin]
+        credit = {f"wallet.{sender_primary_coin}": crypto_amount}
+        if recipient_data.get("primary_coin", "BTC") == sender_primary_coin:
+            credit["points"] = amount
+
+        # Debit and credit in one transfer, the debit only applies if the balance covers it
+        _, error = await asyncio.to_thread(
+            transfers.transfer,
+            "tip",
+            from_id=ctx.author.id,
+            debit={"points": amount},
+            to_id=recipient.id,
+            credit=credit,
+            history=(
+                {"type": "tip_sent", "amount": amount, "currency": "points", "recipient": recipient.id},
+                {"type": "tip_received", "amount": amount, "currency": "points", "sender": ctx.author.id}
+            ),
+            key=str(ctx.message.id)
         )
+        if error == "duplicate":
+            return
+        sender_balance = sender_data.get("points", 0)
+        if error == "insufficient":
+            embed = discord.Embed(
+                title="<:no:1344252518305234987> | Insufficient Balance",
+                description=f"You don't have enough points. Your balance: **{sender_balance:.2f} points**",
+                color=0xFF0000
+            )
+            return await ctx.reply(embed=embed)
+        if error == "missing":
+            embed = discord.Embed(
+                title="<:no:1344252518305234987> | Recipient Not Found",
+                description=f"{recipient.mention}'s account could not be found. Your points were not sent.",
+                color=0xFF0000
+            )
+            return await ctx.reply(embed=embed)
 
         # Send success message
         embed = discord.Embed(
@@ -202,7 +179,6 @@ class Tip(commands.Cog):
 
         # Notify recipient
         try:
-            crypto_amount = amount * crypto_values[sender_primary_coin]
             recipient_embed = discord.Embed(
                 title=":tada: You Received a Tip!",
                 description=f"{ctx.author.mention} sent you **{amount:.2f} points** in **{sender_primary_coin}**!",
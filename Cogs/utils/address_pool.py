@@ -0,0 +1,73 @@
+"""
+Deposit address allocation.
+
+Deriving a deposit address is CPU-bound key math (bitcoinlib is pure Python,
+and a seed phrase costs a 2048-round PBKDF2), which used to run on the event
+loop while the user waited. Each deposit cog derives its master or account
+key once and owns one AddressPool, which does the derivation in a worker
+thread. `start` warms the key in the background by deriving index 0, which
+every wallet already has, so the first signup only pays for one child key.
+That imports bitcoinlib, eth_account or bip_utils, so it only happens with
+WARM_LAZY_IMPORTS set or outside the game-only "minimal" gateway profile.
+
+Address indices come from the chain's counter in the `counters` collection,
+one at a time and only when an address is handed out. Reserving indices
+ahead of demand would skip every unused one on each restart, in every
+cluster process, and the skipped indices soon exceed the wallet's gap limit
+(usually 20), after which the wallet stops seeing deposits to new
+addresses. An index whose derivation failed is kept for the next caller.
+"""
+
+import asyncio
+import collections
+import time
+from colorama import Fore, Style
+from Cogs.utils.metrics import metrics
+from Cogs.utils.gateway import deposits_enabled
+from Cogs.utils.lazy_imports import warm_requested
+
+
+class AddressPool:
+    def __init__(self, chain, derive, reserve):
+        """derive(index) -> address and reserve(count) -> first index are blocking, they run in a thread"""
+        self.chain = chain
+        self.derive = derive
+        self.reserve = reserve
+        self.reserved = collections.deque()  # indices owned by this process whose derivation failed
+        self._task = None
+
+    def start(self, bot):
+        if not (warm_requested() or deposits_enabled()):
+            return
+        if self._task is None:
+            self._task = bot.loop.create_task(self._prime(bot))
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _prime(self, bot):
+        await bot.wait_until_ready()
+        try:
+            await asyncio.to_thread(self.derive, 0)
+            print(f"{Fore.GREEN}[+] {Fore.WHITE}Warmed the {Fore.GREEN}{self.chain.upper()}{Fore.WHITE} deposit key{Style.RESET_ALL}")
+        except Exception as e:
+            print(f"{Fore.YELLOW}[!] Could not warm the {self.chain.upper()} deposit key: {e}{Style.RESET_ALL}")
+
+    async def take(self):
+        """(index, address) that no other caller or process gets"""
+        started = time.perf_counter()
+        if self.reserved:
+            # No await between the check and the pop, so no two callers claim one index
+            index = self.reserved.popleft()
+        else:
+            index = await asyncio.to_thread(self.reserve, 1)
+        try:
+            address = await asyncio.to_thread(self.derive, index)
+        except Exception:
+            self.reserved.appendleft(index)
+            metrics.observe("address", self.chain, time.perf_counter() - started, error=True)
+            raise
+        metrics.observe("address", self.chain, time.perf_counter() - started)
+        return index, address
@@ -0,0 +1,66 @@
+"""
+Chain tip height cache.
+
+Confirmation counts only need the current block height, which changes once
+per block (about 10 minutes on Bitcoin, 2.5 on Litecoin, 12 seconds on
+Ethereum). One cache per chain serves every deposit check; entries live for
+a fraction of the block time, but never less than min_ttl (the deposit
+watcher's poll interval), so a watcher round costs at most one explorer
+call however fast the chain is. Heights are only fetched on read, so an
+idle bot makes no requests. Concurrent misses share one request, and if the
+explorer fails the last height is served for up to one more block time.
+"""
+
+import asyncio
+import time
+from Cogs.utils.metrics import metrics
+
+TTL_FRACTION = 0.1   # of the block time
+MIN_TTL = 1.0        # seconds
+
+
+class TipHeightCache:
+    def __init__(self, chain, fetch, block_time, ttl_fraction=TTL_FRACTION, min_ttl=MIN_TTL):
+        """fetch() -> int, awaited on a miss"""
+        self.chain = chain
+        self.fetch = fetch
+        self.block_time = block_time
+        self.ttl = max(MIN_TTL, min_ttl, block_time * ttl_fraction)
+        self.height = None
+        self.fetched_at = 0.0
+        self.hits = 0
+        self.misses = 0
+        self._inflight = None
+
+    async def get(self):
+        if self.height is not None and time.monotonic() - self.fetched_at < self.ttl:
+            self.hits += 1
+            return self.height
+        self.misses += 1
+        return await self.refresh()
+
+    async def refresh(self):
+        """Fetch the height now, joining a fetch that is already running"""
+        if self._inflight is None:
+            self._inflight = asyncio.ensure_future(self._fetch())
+            self._inflight.add_done_callback(self._clear_inflight)
+        return await asyncio.shield(self._inflight)
+
+    def _clear_inflight(self, _):
+        self._inflight = None
+
+    async def _fetch(self):
+        started = time.perf_counter()
+        try:
+            height = int(await self.fetch())
+        except Exception:
+            metrics.observe("tip", self.chain, time.perf_counter() - started, error=True)
+            # A height one block older than usual is still good enough to count confirmations
+            if self.height is not None and time.monotonic() - self.fetched_at < self.ttl + self.block_time:
+                return self.height
+            raise
+        metrics.observe("tip", self.chain, time.perf_counter() - started)
+        metrics.set_gauge(f"chain_tip_{self.chain}", height)
+        self.height = height
+        self.fetched_at = time.monotonic()
+        return height
@@ -5,6 +5,7 @@ from colorama import Fore, Back, Style
 import os
 import json
 import aiohttp # Add import for http requests
+from Cogs.utils.http_client import http_client
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -245,17 +246,18 @@ async def get_crypto_price(crypto_id: str) -> float | None:
         'vs_currencies': 'usd'
     }
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(COINGECKO_API_URL, params=params) as response:
-                response.raise_for_status() # Raise an exception for bad status codes (4xx or 5xx)
-                data = await response.json()
-                # Example response: {'litecoin': {'usd': 75.5}}
-                price = data.get(crypto_id, {}).get('usd')
-                if price is not None:
-                    return float(price)
-                else:
-                    print(f"{Fore.RED}[!] Could not find USD price for '{crypto_id}' in CoinGecko response.{Style.RESET_ALL}")
-                    return None
+        response = await http_client.get(COINGECKO_API_URL, params=params)
+        if response.status != 200:
+            print(f"{Fore.RED}[!] CoinGecko returned {response.status} fetching price for {crypto_id}{Style.RESET_ALL}")
+            return None
+        data = response.json()
+        # Example response: {'litecoin': {'usd': 75.5}}
+        price = data.get(crypto_id, {}).get('usd')
+        if price is not None:
+            return float(price)
+        else:
+            print(f"{Fore.RED}[!] Could not find USD price for '{crypto_id}' in CoinGecko response.{Style.RESET_ALL}")
+            return None
     except aiohttp.ClientError as e:
         print(f"{Fore.RED}[!] aiohttp error fetching price for {crypto_id}: {e}{Style.RESET_ALL}")
         return None
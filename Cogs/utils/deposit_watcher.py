@@ -0,0 +1,116 @@
+"""
+Background deposit watcher.
+
+Each deposit cog owns one watcher. Showing a user their deposit address
+starts watching it; the watcher re-checks every watched address on the
+chain's interval, a few at a time, and caches the result. The cog's check
+function credits confirmed deposits, so deposits land even if nobody
+presses a button, and "Check for New Deposits" only reads the cached
+result, falling back to a live check when the cache is stale.
+
+Only one check per address runs at a time: a button press that arrives
+while the watcher is checking the same address waits for that check.
+"""
+
+import asyncio
+import os
+import time
+from colorama import Fore, Style
+from Cogs.utils.metrics import metrics
+
+WATCH_TTL = int(os.environ.get("DEPOSIT_WATCH_TTL", "7200"))  # seconds an address is watched after it was shown
+WATCH_CONCURRENCY = 5  # addresses checked at the same time, per chain
+
+
+class WatchedAddress:
+    __slots__ = ("user_id", "address", "until", "result", "checked_at")
+
+    def __init__(self, user_id, address, until):
+        self.user_id = user_id
+        self.address = address
+        self.until = until
+        self.result = None
+        self.checked_at = 0.0
+
+
+class DepositWatcher:
+    def __init__(self, chain, check, interval, concurrency=WATCH_CONCURRENCY):
+        """check(user_id, address) -> (status, details), credits what it finds"""
+        self.chain = chain
+        self.check = check
+        self.interval = interval
+        self.addresses = {}  # address -> WatchedAddress
+        self._inflight = {}  # address -> asyncio.Task
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._task = None
+
+    def watch(self, user_id, address, ttl=WATCH_TTL):
+        watched = self.addresses.get(address)
+        if watched is None:
+            watched = self.addresses[address] = WatchedAddress(user_id, address, 0)
+        watched.until = time.monotonic() + ttl
+        return watched
+
+    def unwatch(self, address):
+        self.addresses.pop(address, None)
+
+    def start(self, bot):
+        if self._task is None:
+            self._task = bot.loop.create_task(self._run(bot))
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self, bot):
+        await bot.wait_until_ready()
+        while True:
+            try:
+                await self.poll()
+            except Exception as e:
+                print(f"{Fore.RED}[!] {self.chain.upper()} deposit watcher error: {e}{Style.RESET_ALL}")
+            await asyncio.sleep(self.interval)
+
+    async def poll(self):
+        """Check every watched address once"""
+        now = time.monotonic()
+        for address in [a for a, w in self.addresses.items() if w.until < now]:
+            del self.addresses[address]
+        watched = list(self.addresses.values())
+        if watched:
+            await asyncio.gather(*(self.refresh(w.user_id, w.address) for w in watched), return_exceptions=True)
+        metrics.set_gauge(f"deposit_watched_{self.chain}", len(self.addresses))
+
+    async def refresh(self, user_id, address):
+        """Check the address now, joining a check that is already running"""
+        task = self._inflight.get(address)
+        if task is None:
+            task = asyncio.ensure_future(self._check(user_id, address))
+            self._inflight[address] = task
+            task.add_done_callback(lambda _: self._inflight.pop(address, None))
+        return await asyncio.shield(task)
+
+    async def status(self, user_id, address, max_age=None):
+        """Cached result for the address, or a fresh check if there is none recent enough"""
+        watched = self.watch(user_id, address)
+        max_age = self.interval if max_age is None else max_age
+        if watched.result is not None and time.monotonic() - watched.checked_at < max_age:
+            return watched.result
+        return await self.refresh(user_id, address)
+
+    async def _check(self, user_id, address):
+        async with self._semaphore:
+            started = time.perf_counter()
+            try:
+                result = await self.check(user_id, address)
+            except Exception as e:
+                print(f"{Fore.RED}[!] Error checking {self.chain.upper()} address {address}: {e}{Style.RESET_ALL}")
+                result = ("error", {"error": "An internal error occurred during check."})
+            metrics.observe("deposit_watch", self.chain, time.perf_counter() - started, error=result[0] == "error")
+
+        watched = self.addresses.get(address)
+        if watched is not None:
+            watched.result = result
+            watched.checked_at = time.monotonic()
+        return result
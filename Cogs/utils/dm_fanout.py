@@ -0,0 +1,82 @@
+"""
+Rate-limited DM fan-out.
+
+Sending one DM is a channel lookup (or creation) plus a message, and sending
+them one after another makes a thousand-user notification take minutes.
+`send_dms` sends DM_CONCURRENCY at a time and starts at most DM_RATE per
+second, well under Discord's global limit of 50 requests per second, so a
+large fan-out neither crawls nor starves the rest of the bot. Users whose
+DMs are closed are skipped.
+
+The member cache is trimmed (see gateway.py), so `bot.get_user` misses most
+users; `resolve_user` falls back to fetching them over the API.
+"""
+
+import asyncio
+import os
+import time
+import discord
+from colorama import Fore, Style
+from Cogs.utils.metrics import metrics
+
+DM_CONCURRENCY = int(os.environ.get("DM_CONCURRENCY", "10"))  # DMs in flight at once
+DM_RATE = float(os.environ.get("DM_RATE", "25"))               # DMs started per second
+
+
+class _RateLimiter:
+    """Spaces out starts to at most rate per second"""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate
+        self.next_slot = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self.lock:
+            now = time.monotonic()
+            if self.next_slot > now:
+                await asyncio.sleep(self.next_slot - now)
+                now = self.next_slot
+            self.next_slot = now + self.interval
+
+
+async def resolve_user(bot, user_id):
+    """Cached user, else fetched from the API; None if the user can't be found"""
+    user = bot.get_user(user_id)
+    if user is not None:
+        return user
+    try:
+        return await bot.fetch_user(user_id)
+    except (discord.NotFound, discord.HTTPException):
+        return None
+
+
+async def send_dms(bot, user_ids, embed, concurrency=DM_CONCURRENCY, rate=DM_RATE):
+    """DM embed to every user in user_ids, returns how many were delivered"""
+    semaphore = asyncio.Semaphore(concurrency)
+    limiter = _RateLimiter(rate)
+    started = time.perf_counter()
+
+    async def send(user_id):
+        async with semaphore:
+            user = bot.get_user(user_id)
+            if user is None:
+                # Fetching is an API request too
+                await limiter.wait()
+                user = await resolve_user(bot, user_id)
+                if user is None:
+                    return False
+            await limiter.wait()
+            try:
+                await user.send(embed=embed)
+                return True
+            except (discord.Forbidden, discord.HTTPException):
+                return False
+            except Exception as e:
+                print(f"{Fore.YELLOW}[!] Could not DM {user_id}: {e}{Style.RESET_ALL}")
+                return False
+
+    results = await asyncio.gather(*(send(user_id) for user_id in user_ids))
+    delivered = sum(results)
+    metrics.observe("dm_fanout", "dm", time.perf_counter() - started, error=delivered < len(results))
+    return delivered
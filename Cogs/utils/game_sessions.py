@@ -0,0 +1,363 @@
+"""
+Shared in-flight game session tracking.
+
+Every game cog used to keep its own `ongoing_games` dict. They now get a
+GameRegistry from `sessions.registry(game)`, which behaves like that dict
+but is backed by one process-wide SessionManager:
+
+- sessions are compact __slots__ records with a TTL, so entries leaked by a
+  skipped `del` are evicted by a single background sweep
+- in-flight wagers are snapshotted to the `active_games` collection, so bets
+  that were debited when the process died can be refunded in bulk on boot.
+  Ending a game that has been snapshotted marks its document settled, so a
+  crash before the next snapshot pass doesn't refund a game that paid out
+- a game's stake must be readable from its registry value (BET_FIELDS as a
+  key or attribute), so every session can be snapshotted and refunded
+- the "already playing" guards call `registry.reserve(key)`, which holds
+  the key for the command that is starting the game. When the bot runs as
+  several cluster processes (CLUSTER_COUNT > 1) that is a conditional
+  insert into `active_games`, so two clusters can never both start the
+  same game for a player. A reservation the command never fills with
+  `registry[key] = data` is dropped when the command returns. Membership
+  (`in`) stays per process.
+"""
+
+import asyncio
+import os
+import time
+import uuid
+from collections.abc import MutableMapping
+from pymongo import DeleteMany, ReplaceOne, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from Cogs.utils.mongo import mongodb, ledger
+
+DEFAULT_TTL = 15 * 60  # seconds; longer than any game view timeout
+# Attributes / keys that hold the amount already debited for a game
+BET_FIELDS = ("tokens_used", "total_bet_amount", "bet_amount", "total_bet", "bet")
+
+SNAPSHOT_INTERVAL = 30  # seconds
+# Snapshots from another process that haven't been refreshed for this long
+# belong to a process that is gone
+STALE_AFTER = SNAPSHOT_INTERVAL * 4
+
+# Identifies snapshots written by this process
+INSTANCE_ID = uuid.uuid4().hex
+
+# Set by launcher.py for every worker process
+CLUSTER_COUNT = int(os.environ.get("CLUSTER_COUNT", "1"))
+
+# A reservation whose command never returned lapses after this long
+RESERVE_TTL = 60  # seconds
+
+# Session data of a key that is reserved but not started yet
+_RESERVED = object()
+
+
+class GameClaimedError(RuntimeError):
+    """The game is already running for this key in another cluster process"""
+
+
+def _lookup(data, field):
+    if isinstance(data, dict):
+        return data.get(field)
+    return getattr(data, field, None)
+
+
+def _extract_bet(data):
+    for field in BET_FIELDS:
+        value = _lookup(data, field)
+        if isinstance(value, (int, float)) and value > 0:
+            return float(value)
+    return 0.0
+
+
+def _extract_user_id(key, data):
+    user_id = _lookup(data, "user_id")
+    if isinstance(user_id, int):
+        return user_id
+    if isinstance(key, int):
+        return key
+    ctx = _lookup(data, "ctx")
+    author = getattr(ctx, "author", None)
+    return getattr(author, "id", None)
+
+
+class GameSession:
+    __slots__ = ("game", "key", "data", "started_at", "expires_at", "persisted")
+
+    def __init__(self, game, key, data, ttl):
+        now = time.monotonic()
+        self.game = game
+        self.key = key
+        self.data = data
+        self.started_at = time.time()
+        self.expires_at = now + ttl
+        # Set once a document for this session may exist in active_games
+        self.persisted = False
+
+    def document(self):
+        return {
+            "_id": f"{self.game}:{self.key}",
+            "instance": INSTANCE_ID,
+            "game": self.game,
+            "user_id": _extract_user_id(self.key, self.data),
+            "bet": _extract_bet(self.data),
+            "started_at": self.started_at,
+            "updated_at": time.time(),
+        }
+
+    def snapshot(self):
+        """Mongo document for this session, or None if there is no wager to protect"""
+        doc = self.document()
+        if not doc["bet"] or doc["user_id"] is None:
+            return None
+        return doc
+
+
+class GameRegistry(MutableMapping):
+    """dict-compatible view of one game's sessions, drop-in for `ongoing_games`"""
+
+    def __init__(self, manager, game, ttl):
+        self._manager = manager
+        self.game = game
+        self.ttl = ttl
+        self._sessions = {}
+
+    def __getitem__(self, key):
+        data = self._sessions[key].data
+        if data is _RESERVED:
+            raise KeyError(key)
+        return data
+
+    def __setitem__(self, key, data):
+        if not _extract_bet(data):
+            raise ValueError(f"{self.game} session for {key!r} has no stake in any of {', '.join(BET_FIELDS)}")
+        session = self._sessions.get(key)
+        if session is None:
+            # Started without reserve(); claim it now and refuse if another process has it
+            session = self._sessions[key] = GameSession(self.game, key, data, self.ttl)
+            if self._manager.shared and not self._manager.claim(session):
+                del self._sessions[key]
+                raise GameClaimedError(f"{self.game}:{key}")
+        else:
+            # Filling a reservation or updating a running game keeps its start time but refreshes the TTL
+            session.data = data
+            session.expires_at = time.monotonic() + self.ttl
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self._manager.release(self._sessions.pop(key))
+
+    def __contains__(self, key):
+        session = self._sessions.get(key)
+        return session is not None and session.data is not _RESERVED
+
+    async def reserve(self, key):
+        """
+        Hold key for the game the current command is starting. False if the
+        game is already running or being started for key, here or in
+        another cluster process.
+        """
+        session = self._sessions.get(key)
+        if session is not None and (session.data is not _RESERVED or session.expires_at > time.monotonic()):
+            return False
+        # Inserted before the first await, so a second command here sees it
+        session = self._sessions[key] = GameSession(self.game, key, _RESERVED, RESERVE_TTL)
+        if self._manager.shared and not await asyncio.to_thread(self._manager.claim, session):
+            if self._sessions.get(key) is session:
+                del self._sessions[key]
+            return False
+        self._manager.track_reservation(self, key, session)
+        return True
+
+    def drop_reservation(self, key, session):
+        """Forget a reservation that was never filled"""
+        if self._sessions.get(key) is session and session.data is _RESERVED:
+            self._manager.release(self._sessions.pop(key))
+
+    def __iter__(self):
+        return iter([key for key, session in self._sessions.items() if session.data is not _RESERVED])
+
+    def __len__(self):
+        return sum(session.data is not _RESERVED for session in self._sessions.values())
+
+    def sessions(self):
+        return list(self._sessions.values())
+
+    def evict_expired(self, now):
+        expired = [key for key, session in self._sessions.items() if session.expires_at <= now]
+        for key in expired:
+            del self._sessions[key]
+        return expired
+
+
+class SessionManager:
+    def __init__(self, shared=CLUSTER_COUNT > 1):
+        self.db = mongodb["BetSync"]
+        self.collection = self.db["active_games"]
+        self.shared = shared
+        self._registries = {}
+        self._reservations = {}  # asyncio task -> [(registry, key, session)]
+
+    def registry(self, game, ttl=DEFAULT_TTL):
+        registry = self._registries.get(game)
+        if registry is None:
+            registry = self._registries[game] = GameRegistry(self, game, ttl)
+        return registry
+
+    def track_reservation(self, registry, key, session):
+        task = asyncio.current_task()
+        if task is not None:
+            self._reservations.setdefault(task, []).append((registry, key, session))
+
+    def drop_reservations(self, task):
+        """Drop the reservations a finished command never filled; called from the bot's after_invoke hook"""
+        for registry, key, session in self._reservations.pop(task, ()):
+            registry.drop_reservation(key, session)
+
+    def active_count(self):
+        return sum(len(registry) for registry in self._registries.values())
+
+    def sweep(self):
+        """Evict sessions past their TTL. Returns a list of (game, key)."""
+        now = time.monotonic()
+        evicted = []
+        for game, registry in self._registries.items():
+            evicted.extend((game, key) for key in registry.evict_expired(now))
+
+        # Reservations of commands that ended without the after_invoke hook
+        for task in [task for task in self._reservations if task.done()]:
+            self.drop_reservations(task)
+        return evicted
+
+    def claim(self, session):
+        """
+        Publish a new session so other cluster processes see it. Returns
+        False if another process already holds the game: the filter only
+        matches documents this process owns or that are settled, so against
+        a foreign claim the upsert becomes an insert of a taken _id. Claims
+        of a dead process are left alone until recover() refunds them.
+        """
+        doc = session.document()
+        doc_id = doc.pop("_id")
+        try:
+            self.collection.update_one(
+                {"_id": doc_id, "$or": [{"instance": INSTANCE_ID}, {"settled": True}]},
+                {"$set": doc, "$unset": {"settled": "", "recovered_by": ""}},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            return False
+        except Exception as e:
+            print(f"Error claiming game session: {e}")
+            return False
+        session.persisted = True
+        return True
+
+    def release(self, session):
+        """
+        Mark an ended session's document settled so recovery never refunds it.
+        The settled document is removed by the next snapshot pass; upserting
+        it also covers a snapshot write still in flight for this session.
+        """
+        if not session.persisted:
+            return
+        try:
+            self.collection.update_one(
+                {"_id": f"{session.game}:{session.key}", "started_at": session.started_at},
+                {"$set": {"instance": INSTANCE_ID, "settled": True, "updated_at": time.time()}},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            pass  # a newer session for this key already replaced the document
+        except Exception as e:
+            print(f"Error releasing game session: {e}")
+
+    def snapshot_operations(self):
+        """Bulk operations that make active_games mirror this process's live sessions"""
+        docs = []
+        for registry in self._registries.values():
+            for session in registry.sessions():
+                # Shared mode also keeps wager-less claims fresh so they don't look orphaned
+                doc = session.document() if self.shared else session.snapshot()
+                if doc:
+                    session.persisted = True
+                    docs.append(doc)
+
+        # Never resurrect a session that was settled while this pass was in flight
+        operations = [
+            ReplaceOne(
+                {"_id": doc["_id"], "$or": [
+                    {"settled": {"$ne": True}},
+                    {"started_at": {"$ne": doc["started_at"]}}
+                ]},
+                doc,
+                upsert=True
+            )
+            for doc in docs
+        ]
+        operations.append(DeleteMany({
+            "instance": INSTANCE_ID,
+            "_id": {"$nin": [doc["_id"] for doc in docs]}
+        }))
+        return operations
+
+    def write_snapshot(self):
+        """Blocking; run in a thread"""
+        try:
+            return self.collection.bulk_write(self.snapshot_operations(), ordered=False)
+        except BulkWriteError as e:
+            # Duplicate keys are upserts skipped over settled documents
+            if any(error.get("code") != 11000 for error in e.details.get("writeErrors", [])):
+                raise
+            return e.details
+
+    def recover(self, stale_after=STALE_AFTER):
+        """
+        Refund every wager left behind by a dead process in one bulk write.
+        Blocking; run in a thread. Returns the refunded snapshot documents.
+        """
+        # Claim the orphans first; each document can only be claimed by one worker
+        self.collection.update_many(
+            {
+                "instance": {"$ne": INSTANCE_ID},
+                "recovered_by": {"$exists": False},
+                "updated_at": {"$lt": time.time() - stale_after}
+            },
+            {"$set": {"recovered_by": INSTANCE_ID}}
+        )
+        orphans = [
+            doc for doc in self.collection.find({"recovered_by": INSTANCE_ID})
+            if doc.get("bet") and doc.get("user_id") is not None and not doc.get("settled")
+        ]
+        if not orphans:
+            self.collection.delete_many({"recovered_by": INSTANCE_ID})
+            return []
+
+        now = int(time.time())
+        operations = [
+            UpdateOne(
+                {"discord_id": doc["user_id"]},
+                {
+                    "$inc": {"points": doc["bet"]},
+                    "$push": {"history": {"$each": [{
+                        "type": "refund",
+                        "game": doc["game"],
+                        "amount": doc["bet"],
+                        "bet": doc["bet"],
+                        "reason": "game interrupted by restart",
+                        "timestamp": now
+                    }], "$slice": -100}}
+                }
+            )
+            for doc in orphans
+        ]
+        self.db["users"].bulk_write(operations, ordered=False)
+        for doc in orphans:
+            ledger.record(doc["user_id"], doc["bet"], "refund", doc["game"])
+        self.collection.delete_many({"recovered_by": INSTANCE_ID})
+        return orphans
+
+
+sessions = SessionManager()
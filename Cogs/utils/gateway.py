@@ -0,0 +1,71 @@
+"""
+Gateway intents and member cache profiles.
+
+Intents.all() makes Discord stream every presence change and the full
+member list of every guild, and the library keeps all of it in memory. The
+bot only needs messages, reactions (mines), member join/leave plus invites
+for referrals, and presences for the !daily status check, so
+GATEWAY_PROFILE picks a smaller set:
+
+    minimal   messages and reactions only, for game-only clusters; deposit
+              keys are not warmed at startup
+    standard  minimal + members and invites, no presences; !daily is
+              unavailable on these processes
+    presence  standard + presences (default)
+    full      Intents.all() with the library's default caching (old behaviour)
+
+Outside of "full" the member cache only keeps members seen through join
+events and explicit chunk requests, and guilds are not chunked at startup.
+The referrals cog chunks the one guild that needs a member list.
+"""
+
+import os
+import discord
+
+GATEWAY_PROFILE = os.environ.get("GATEWAY_PROFILE", "presence").lower()
+PROFILES = ("minimal", "standard", "presence", "full")
+
+
+def build_intents(profile=GATEWAY_PROFILE):
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown GATEWAY_PROFILE {profile!r}, expected one of {', '.join(PROFILES)}")
+    if profile == "full":
+        return discord.Intents.all()
+
+    intents = discord.Intents.none()
+    intents.guilds = True
+    intents.guild_messages = True
+    intents.dm_messages = True
+    intents.message_content = True
+    intents.guild_reactions = True
+    intents.dm_reactions = True
+    if profile in ("standard", "presence"):
+        intents.members = True
+        intents.invites = True
+    if profile == "presence":
+        intents.presences = True
+    return intents
+
+
+def build_member_cache_flags(intents, profile=GATEWAY_PROFILE):
+    if profile == "full":
+        return discord.MemberCacheFlags.from_intents(intents)
+
+    flags = discord.MemberCacheFlags.none()
+    flags.joined = intents.members
+    return flags
+
+
+def client_options(profile=GATEWAY_PROFILE):
+    """Keyword arguments for the Bot constructor"""
+    intents = build_intents(profile)
+    return {
+        "intents": intents,
+        "member_cache_flags": build_member_cache_flags(intents, profile),
+        "chunk_guilds_at_startup": profile == "full",
+    }
+
+
+def deposits_enabled(profile=GATEWAY_PROFILE):
+    """False for game-only processes, which leave the deposit libraries unimported until used"""
+    return profile != "minimal"
@@ -0,0 +1,115 @@
+"""
+Shared outbound HTTP client.
+
+One aiohttp session for the whole process, so deposit checks and price
+lookups reuse warm keep-alive connections to mempool.space, Etherscan and
+CoinGecko instead of paying a TCP and TLS handshake on every call. The
+connector caches DNS and caps connections per host. Requests get timeouts
+and are retried with jittered exponential backoff on connection errors,
+timeouts, 429 and 5xx.
+
+The body is read before the connection goes back to the pool, callers get a
+small Response with the status, headers and body.
+"""
+
+import asyncio
+import json
+import os
+import random
+import time
+from urllib.parse import urlsplit
+import aiohttp
+from Cogs.utils.metrics import metrics
+
+HTTP_LIMIT = int(os.environ.get("HTTP_LIMIT", "100"))                     # connections in total
+HTTP_LIMIT_PER_HOST = int(os.environ.get("HTTP_LIMIT_PER_HOST", "10"))    # connections per host
+DNS_CACHE_TTL = 300           # seconds
+KEEPALIVE_TIMEOUT = 60        # seconds an idle connection stays in the pool
+TOTAL_TIMEOUT = 15            # seconds for a whole request, body included
+CONNECT_TIMEOUT = 5
+RETRIES = 3
+BACKOFF_BASE = 0.5            # seconds, doubled per attempt
+MAX_RETRY_AFTER = 10          # never sleep longer than this on a Retry-After header
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class Response:
+    __slots__ = ("status", "headers", "body")
+
+    def __init__(self, status, headers, body):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    def text(self):
+        return self.body.decode("utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.body)
+
+
+class HttpClient:
+    def __init__(self):
+        self._session = None
+
+    @property
+    def session(self):
+        # Built on first use so it binds to the bot's running loop
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=HTTP_LIMIT,
+                limit_per_host=HTTP_LIMIT_PER_HOST,
+                ttl_dns_cache=DNS_CACHE_TTL,
+                keepalive_timeout=KEEPALIVE_TIMEOUT,
+            )
+            timeout = aiohttp.ClientTimeout(total=TOTAL_TIMEOUT, connect=CONNECT_TIMEOUT)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=timeout, raise_for_status=False)
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def request(self, method, url, retries=RETRIES, **kwargs):
+        """Send a request, retrying transient failures. Returns a Response"""
+        host = urlsplit(url).hostname or "unknown"
+        attempt = 0
+        while True:
+            result = None
+            started = time.perf_counter()
+            try:
+                async with self.session.request(method, url, **kwargs) as response:
+                    body = await response.read()
+                    result = Response(response.status, response.headers, body)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                metrics.observe("http", host, time.perf_counter() - started, error=True)
+                if attempt >= retries:
+                    raise
+            else:
+                failed = result.status in RETRY_STATUSES
+                metrics.observe("http", host, time.perf_counter() - started, error=failed)
+                if not failed or attempt >= retries:
+                    return result
+
+            await asyncio.sleep(self._backoff(attempt, result))
+            attempt += 1
+
+    def _backoff(self, attempt, response=None):
+        # Full jitter keeps retries from many checks from landing together
+        delay = random.uniform(0, BACKOFF_BASE * 2 ** attempt)
+        if response is not None and response.status == 429:
+            try:
+                delay = max(delay, min(float(response.headers.get("Retry-After", 0)), MAX_RETRY_AFTER))
+            except ValueError:
+                pass
+        return delay
+
+    async def get(self, url, **kwargs):
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url, **kwargs):
+        return await self.request("POST", url, **kwargs)
+
+
+http_client = HttpClient()
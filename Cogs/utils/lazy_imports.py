@@ -0,0 +1,101 @@
+"""
+Deferred imports for heavy optional dependencies.
+
+bitcoinlib, web3, solana/solders, bip_utils, qrcode and matplotlib dominate
+import time and resident memory, but only the deposit cogs and admin graphs
+use them. Modules declared with lazy_import() are imported on first attribute
+access, timed, and can be warmed ahead of time from a background thread.
+"""
+
+import importlib
+import os
+import threading
+import time
+from colorama import Fore
+
+_registry = {}
+_import_lock = threading.RLock()
+
+
+class LazyModule:
+    __slots__ = ("_name", "_on_load", "_module", "_import_seconds")
+
+    def __init__(self, name, on_load=None):
+        self._name = name
+        self._on_load = on_load
+        self._module = None
+        self._import_seconds = None
+
+    def _load(self):
+        module = self._module
+        if module is not None:
+            return module
+
+        with _import_lock:
+            if self._module is None:
+                started = time.perf_counter()
+                module = importlib.import_module(self._name)
+                if self._on_load:
+                    self._on_load(module)
+                self._import_seconds = time.perf_counter() - started
+                self._module = module
+        return self._module
+
+    @property
+    def loaded(self):
+        return self._module is not None
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self.loaded else "deferred"
+        return f"<LazyModule {self._name} ({state})>"
+
+
+def lazy_import(name, on_load=None):
+    """Return a proxy for module `name` that imports it on first use"""
+    module = _registry.get(name)
+    if module is None:
+        module = _registry[name] = LazyModule(name, on_load)
+    return module
+
+
+def warm_requested():
+    """True if WARM_LAZY_IMPORTS asks for deferred modules to be imported at startup"""
+    return os.environ.get("WARM_LAZY_IMPORTS", "").lower() in ("1", "true", "yes")
+
+
+def warm(names=None):
+    """Import deferred modules now. Meant to be run from a background thread."""
+    for name, module in list(_registry.items()):
+        if names is not None and name not in names:
+            continue
+        try:
+            module._load()
+        except Exception as e:
+            print(f"{Fore.RED}[!] {Fore.WHITE}Failed to warm import {Fore.RED}{name}{Fore.WHITE}: {e}")
+
+
+def warm_in_background(names=None):
+    thread = threading.Thread(target=warm, args=(names,), name="lazy-import-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def import_profile():
+    """List of (module, seconds or None if still deferred) sorted slowest first"""
+    rows = [(name, module._import_seconds) for name, module in _registry.items()]
+    return sorted(rows, key=lambda row: -1 if row[1] is None else row[1], reverse=True)
+
+
+def report():
+    rows = import_profile()
+    if not rows:
+        return
+    print(f"{Fore.CYAN}[*] {Fore.WHITE}Deferred imports:")
+    for name, seconds in rows:
+        if seconds is None:
+            print(f"{Fore.CYAN}    {Fore.WHITE}{name:<30} {Fore.LIGHTBLACK_EX}deferred{Fore.WHITE}")
+        else:
+            print(f"{Fore.CYAN}    {Fore.WHITE}{name:<30} {Fore.YELLOW}{seconds * 1000:8.1f} ms{Fore.WHITE}")
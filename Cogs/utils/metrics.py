@@ -0,0 +1,240 @@
+"""
+In-process performance metrics.
+
+Collects command and view-callback latency histograms, Mongo operation
+counts and (sampled) bytes attributed to the command that issued them, image render
+times, webhook queue depth, event-loop lag, gateway event volume and
+process memory. Everything is exposed as
+Prometheus text by `metrics.prometheus_text()` and summarised by `!perf`.
+"""
+
+import asyncio
+import functools
+import itertools
+import threading
+import time
+from contextvars import ContextVar
+import bson
+from pymongo import monitoring
+
+# Upper bounds in seconds, Prometheus style
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float("inf"))
+
+# Mongo wire bytes are measured by re-encoding the command and its reply,
+# which costs about as much as the driver's own encoding; only one in this
+# many round trips is measured and counted this many times
+DB_BYTES_SAMPLE = 32
+
+# Name of the command or view callback currently running in this task
+current_command = ContextVar("current_command", default="background")
+
+
+class Histogram:
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.total += value
+        self.count += 1
+
+    def quantile(self, q):
+        """Bucket upper bound containing the q-th observation"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, bucket_count in zip(BUCKETS, self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return bound
+        return BUCKETS[-1]
+
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latency = {}      # (kind, name) -> Histogram; kind is command/view/render
+        self.errors = {}       # (kind, name) -> int
+        self.db_ops = {}       # command name -> int
+        self.db_bytes = {}     # command name -> int
+        self.db_latency = {}   # mongo command name -> Histogram
+        self.gateway_events = {}  # dispatch event type -> int
+        self.gateway_bytes = 0
+        self.gauges = {"webhook_queue_depth": 0, "event_loop_lag_seconds": 0.0, "process_rss_bytes": 0}
+        self.loop_lag = Histogram()
+        self.started_at = time.time()
+
+    def observe(self, kind, name, seconds, error=False):
+        with self._lock:
+            key = (kind, name)
+            histogram = self.latency.get(key)
+            if histogram is None:
+                histogram = self.latency[key] = Histogram()
+            histogram.observe(seconds)
+            if error:
+                self.errors[key] = self.errors.get(key, 0) + 1
+
+    def record_db(self, command, op_name, seconds, size):
+        with self._lock:
+            self.db_ops[command] = self.db_ops.get(command, 0) + 1
+            self.db_bytes[command] = self.db_bytes.get(command, 0) + size
+            histogram = self.db_latency.get(op_name)
+            if histogram is None:
+                histogram = self.db_latency[op_name] = Histogram()
+            histogram.observe(seconds)
+
+    def record_gateway_event(self, event_type):
+        # Only called from the event loop thread
+        self.gateway_events[event_type] = self.gateway_events.get(event_type, 0) + 1
+
+    def record_gateway_bytes(self, size):
+        self.gateway_bytes += size
+
+    def gateway_rate(self):
+        """Gateway dispatch events per minute since start"""
+        minutes = max((time.time() - self.started_at) / 60, 1 / 60)
+        return sum(self.gateway_events.values()) / minutes
+
+    def set_gauge(self, name, value):
+        self.gauges[name] = value
+
+    def add_gauge(self, name, delta):
+        with self._lock:
+            self.gauges[name] = self.gauges.get(name, 0) + delta
+
+    def observe_loop_lag(self, seconds):
+        self.gauges["event_loop_lag_seconds"] = seconds
+        self.loop_lag.observe(seconds)
+
+    def top_commands(self, kind="command", limit=10):
+        """[(name, Histogram)] sorted by total time spent"""
+        rows = [(name, h) for (k, name), h in self.latency.items() if k == kind]
+        rows.sort(key=lambda row: row[1].total, reverse=True)
+        return rows[:limit]
+
+    def db_per_call(self, name):
+        histogram = self.latency.get(("command", name)) or self.latency.get(("view", name))
+        calls = histogram.count if histogram else 0
+        if not calls:
+            return 0.0, 0.0
+        return self.db_ops.get(name, 0) / calls, self.db_bytes.get(name, 0) / calls
+
+    def prometheus_text(self):
+        lines = []
+
+        def histogram_lines(metric, labels, histogram):
+            cumulative = 0
+            for bound, bucket_count in zip(BUCKETS, histogram.counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{metric}_bucket{{{labels},le="{le}"}} {cumulative}')
+            lines.append(f"{metric}_sum{{{labels}}} {histogram.total}")
+            lines.append(f"{metric}_count{{{labels}}} {histogram.count}")
+
+        with self._lock:
+            lines.append("# TYPE betsync_latency_seconds histogram")
+            for (kind, name), histogram in sorted(self.latency.items()):
+                histogram_lines("betsync_latency_seconds", f'kind="{kind}",name="{name}"', histogram)
+
+            lines.append("# TYPE betsync_errors_total counter")
+            for (kind, name), count in sorted(self.errors.items()):
+                lines.append(f'betsync_errors_total{{kind="{kind}",name="{name}"}} {count}')
+
+            lines.append("# TYPE betsync_mongo_ops_total counter")
+            for name, count in sorted(self.db_ops.items()):
+                lines.append(f'betsync_mongo_ops_total{{command="{name}"}} {count}')
+
+            lines.append("# TYPE betsync_mongo_bytes_total counter")
+            for name, size in sorted(self.db_bytes.items()):
+                lines.append(f'betsync_mongo_bytes_total{{command="{name}"}} {size}')
+
+            lines.append("# TYPE betsync_mongo_latency_seconds histogram")
+            for op_name, histogram in sorted(self.db_latency.items()):
+                histogram_lines("betsync_mongo_latency_seconds", f'op="{op_name}"', histogram)
+
+            lines.append("# TYPE betsync_gateway_events_total counter")
+            for event_type, count in sorted(self.gateway_events.items()):
+                lines.append(f'betsync_gateway_events_total{{type="{event_type}"}} {count}')
+            lines.append("# TYPE betsync_gateway_bytes_total counter")
+            lines.append(f"betsync_gateway_bytes_total {self.gateway_bytes}")
+
+            lines.append("# TYPE betsync_event_loop_lag_seconds histogram")
+            histogram_lines("betsync_event_loop_lag_seconds", 'loop="main"', self.loop_lag)
+
+            for name, value in sorted(self.gauges.items()):
+                lines.append(f"# TYPE betsync_{name} gauge")
+                lines.append(f"betsync_{name} {value}")
+
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    """Counts Mongo round trips and estimates wire bytes per bot command"""
+
+    def __init__(self, sample=DB_BYTES_SAMPLE):
+        self.sample = sample
+        self._counter = itertools.count()
+        self._pending = {}
+
+    def _size(self, document):
+        try:
+            return len(bson.encode(document)) * self.sample
+        except Exception:
+            return 0
+
+    def started(self, event):
+        sampled = next(self._counter) % self.sample == 0
+        size = self._size(event.command) if sampled else 0
+        self._pending[event.request_id] = (current_command.get(), sampled, size)
+
+    def succeeded(self, event):
+        command, sampled, size = self._pending.pop(event.request_id, (current_command.get(), False, 0))
+        if sampled:
+            size += self._size(event.reply)
+        metrics.record_db(command, event.command_name, event.duration_micros / 1_000_000, size)
+
+    def failed(self, event):
+        command, _, size = self._pending.pop(event.request_id, (current_command.get(), False, 0))
+        metrics.record_db(command, event.command_name, event.duration_micros / 1_000_000, size)
+
+
+def timed(kind, name=None):
+    """Decorator recording the wall time of a sync or async function"""
+
+    def decorator(func):
+        label = name or func.__name__
+
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    metrics.observe(kind, label, time.perf_counter() - started)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                metrics.observe(kind, label, time.perf_counter() - started)
+        return wrapper
+
+    return decorator
@@ -1,14 +1,263 @@
-from pymongo import MongoClient
+from pymongo import MongoClient, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from bson import ObjectId
 import os
+import time
 import datetime
+import threading
+from collections import OrderedDict
 import asyncio # Added for create_task
 from colorama import Back, Fore, Style
 from dotenv import load_dotenv
 from Cogs.utils.notifier import Notifier # Import Notifier
+from Cogs.utils.metrics import MongoCommandListener, metrics
 
 load_dotenv()
 
-mongodb = MongoClient(os.environ["MONGO"])
+mongodb = MongoClient(os.environ["MONGO"], event_listeners=[MongoCommandListener()])
+
+
+class KnownUsers:
+    """
+    Bounded in-memory set of discord ids that are known to be registered.
+
+    Lets on_command skip the database entirely for returning users. Once
+    full, the least recently seen ids are dropped; a dropped id only costs
+    one idempotent upsert the next time that user runs a command.
+    """
+
+    def __init__(self, max_size=250_000):
+        self.max_size = max_size
+        self._ids = OrderedDict()
+
+    def __contains__(self, user_id):
+        if user_id in self._ids:
+            self._ids.move_to_end(user_id)
+            return True
+        return False
+
+    def __len__(self):
+        return len(self._ids)
+
+    def add(self, user_id):
+        self._ids[user_id] = None
+        self._ids.move_to_end(user_id)
+        if len(self._ids) > self.max_size:
+            self._ids.popitem(last=False)
+
+    def discard(self, user_id):
+        self._ids.pop(user_id, None)
+
+    def warm(self, collection):
+        """Fill from an id-only projection, most recently created users last"""
+        cursor = collection.find({}, {"discord_id": 1, "_id": 0}).sort("_id", -1).limit(self.max_size)
+        ids = [doc["discord_id"] for doc in cursor if "discord_id" in doc]
+        for user_id in reversed(ids):
+            self.add(user_id)
+        return len(ids)
+
+
+known_users = KnownUsers()
+
+LEDGER_FLUSH_INTERVAL = 1.0      # seconds between ledger bulk inserts
+LEDGER_FLUSH_SIZE = 500          # entries that trigger an early flush
+LEDGER_COMPACT_INTERVAL = int(os.environ.get("LEDGER_COMPACT_INTERVAL", "3600"))  # seconds, 0 turns compaction off
+LEDGER_COMPACT_LAG = 60          # never compact entries younger than this, other processes may still be flushing them
+LEDGER_COMPACT_LEASE = 600       # seconds one process holds the compaction lease
+_LEDGER_START = ObjectId("0" * 24)
+
+
+class Ledger:
+    """
+    Append-only ledger of points movements, in the `ledger` collection.
+
+    Every change to a user's points is recorded as an entry {user_id, delta,
+    kind, ref}. Entries are buffered and written with one unordered
+    insert_many per second, so the hot path only appends to a list. The
+    _id is an ObjectId taken when the entry is written, not when the change
+    is made, so an entry whose flush was retried after a long outage still
+    lands above the compaction watermark. A unique entry_id taken when the
+    change is made keeps retries from writing an entry twice.
+
+    compact() periodically folds entries older than LEDGER_COMPACT_LAG into
+    one `ledger_balances` document per user {balance, through}, under a lease
+    so one process compacts at a time. audit() recomputes a user's balance
+    as their snapshot plus the entries after it, one indexed aggregation,
+    and compares it with the points on the user document. reconcile()
+    records the difference as an adjustment; run on every user it is also
+    how balances from before the ledger existed are opened.
+    """
+
+    def __init__(self):
+        self.collection = mongodb["BetSync"]["ledger"]
+        self.balances = mongodb["BetSync"]["ledger_balances"]
+        self.state = mongodb["BetSync"]["ledger_state"]
+        self.users = mongodb["BetSync"]["users"]
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._indexed = False
+
+    def record(self, user_id, delta, kind, ref=None):
+        """Queue a points movement for the next flush"""
+        if not delta:
+            return
+        entry = {"entry_id": ObjectId(), "user_id": user_id, "delta": delta, "kind": kind}
+        if ref is not None:
+            entry["ref"] = ref
+        with self._lock:
+            self._buffer.append(entry)
+            full = len(self._buffer) >= LEDGER_FLUSH_SIZE
+        if self._thread is None:
+            self._start()
+        if full:
+            self._wake.set()
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="ledger", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        next_compaction = time.monotonic() + LEDGER_COMPACT_INTERVAL
+        while True:
+            self._wake.wait(LEDGER_FLUSH_INTERVAL)
+            self._wake.clear()
+            self.flush()
+            if LEDGER_COMPACT_INTERVAL and time.monotonic() >= next_compaction:
+                next_compaction = time.monotonic() + LEDGER_COMPACT_INTERVAL
+                try:
+                    compacted = self.compact()
+                    if compacted:
+                        print(f"{Fore.GREEN}[+] {Fore.WHITE}Compacted ledger for {Fore.GREEN}{compacted}{Fore.WHITE} users{Style.RESET_ALL}")
+                except Exception as e:
+                    print(f"{Fore.RED}[!] Ledger compaction failed: {e}{Style.RESET_ALL}")
+
+    def _ensure_indexes(self):
+        if not self._indexed:
+            self.collection.create_index([("user_id", 1), ("_id", 1)])
+            self.collection.create_index(
+                "entry_id", unique=True, partialFilterExpression={"entry_id": {"$exists": True}}
+            )
+            self._indexed = True
+
+    def flush(self):
+        """Write every queued entry, returns how many were written"""
+        with self._lock:
+            entries, self._buffer = self._buffer, []
+        if not entries:
+            return 0
+        # Compaction windows are ranges of _id, so it is taken as close to the write as possible
+        for entry in entries:
+            entry["_id"] = ObjectId()
+        try:
+            self._ensure_indexes()
+            self.collection.insert_many(entries, ordered=False)
+        except BulkWriteError as e:
+            # Entries already written by an earlier, partly failed flush are duplicate entry_ids
+            failed = {error["op"]["entry_id"] for error in e.details["writeErrors"] if error["code"] != 11000}
+            if failed:
+                self._requeue([entry for entry in entries if entry["entry_id"] in failed])
+                print(f"{Fore.RED}[!] Ledger flush failed for {len(failed)} entries, retrying: {e}{Style.RESET_ALL}")
+        except Exception as e:
+            self._requeue(entries)
+            print(f"{Fore.RED}[!] Ledger flush failed, retrying: {e}{Style.RESET_ALL}")
+            return 0
+        metrics.set_gauge("ledger_buffered", len(self._buffer))
+        return len(entries)
+
+    def _requeue(self, entries):
+        with self._lock:
+            self._buffer[:0] = entries
+
+    def compact(self, lag=LEDGER_COMPACT_LAG):
+        """Fold entries older than lag seconds into the per-user snapshots, returns the users updated"""
+        now = datetime.datetime.utcnow()
+        self.state.update_one({"_id": "compaction"}, {"$setOnInsert": {"through": _LEDGER_START}}, upsert=True)
+        state = self.state.find_one_and_update(
+            {"_id": "compaction", "lease_until": {"$not": {"$gt": now}}},
+            {"$set": {"lease_until": now + datetime.timedelta(seconds=LEDGER_COMPACT_LEASE)}},
+            return_document=ReturnDocument.AFTER
+        )
+        if state is None:
+            return 0  # another process is compacting
+
+        # An interrupted run left its window in `pending`; finishing that same
+        # window keeps the snapshots it already moved from counting twice
+        upper = state.get("pending") or ObjectId.from_datetime(now - datetime.timedelta(seconds=lag))
+        self.state.update_one({"_id": "compaction"}, {"$set": {"pending": upper}})
+        sums = list(self.collection.aggregate([
+            {"$match": {"_id": {"$gt": state["through"], "$lte": upper}}},
+            {"$group": {"_id": "$user_id", "delta": {"$sum": "$delta"}, "entries": {"$sum": 1}}}
+        ], allowDiskUse=True))
+
+        for i in range(0, len(sums), 1000):
+            try:
+                self.balances.bulk_write([
+                    UpdateOne(
+                        {"_id": row["_id"], "through": {"$not": {"$gte": upper}}},
+                        {"$inc": {"balance": row["delta"], "entries": row["entries"]}, "$set": {"through": upper}},
+                        upsert=True
+                    )
+                    for row in sums[i:i + 1000]
+                ], ordered=False)
+            except BulkWriteError as e:
+                # A duplicate key is a snapshot this window already reached
+                if any(error["code"] != 11000 for error in e.details["writeErrors"]):
+                    raise
+
+        self.state.update_one(
+            {"_id": "compaction"},
+            {"$set": {"through": upper, "compacted_at": now}, "$unset": {"pending": "", "lease_until": ""}}
+        )
+        return len(sums)
+
+    def audit(self, user_id):
+        """Points on the user document against the balance the ledger adds up to"""
+        snapshot = self.balances.find_one({"_id": user_id}) or {}
+        pending = list(self.collection.aggregate([
+            {"$match": {"user_id": user_id, "_id": {"$gt": snapshot.get("through", _LEDGER_START)}}},
+            {"$group": {"_id": None, "delta": {"$sum": "$delta"}, "entries": {"$sum": 1}}}
+        ]))
+        pending = pending[0] if pending else {"delta": 0, "entries": 0}
+        user = self.users.find_one({"discord_id": user_id}, {"points": 1}) or {}
+        balance = user.get("points", 0)
+        ledger_balance = snapshot.get("balance", 0) + pending["delta"]
+        return {
+            "user_id": user_id,
+            "balance": balance,
+            "ledger_balance": ledger_balance,
+            "drift": round(balance - ledger_balance, 6),
+            "snapshot": snapshot.get("balance", 0),
+            "uncompacted_entries": pending["entries"],
+            "entries": snapshot.get("entries", 0) + pending["entries"]
+        }
+
+    def reconcile(self, user_id, reason="adjustment"):
+        """Record a user's drift as an adjustment entry, returns the drift"""
+        self.flush()
+        drift = self.audit(user_id)["drift"]
+        if drift:
+            self.record(user_id, drift, reason)
+            self.flush()
+        return drift
+
+    def reconcile_all(self):
+        """reconcile() every user, returns (users checked, users adjusted)"""
+        checked = adjusted = 0
+        for user in self.users.find({}, {"discord_id": 1}):
+            checked += 1
+            adjusted += bool(self.reconcile(user["discord_id"]))
+        return checked, adjusted
+
+
+ledger = Ledger()
+
+
+# discord id -> time of the last wallet sync from this process, shared by every Users()
+_last_save_times = {}
 
 
 class Users:
@@ -16,18 +265,26 @@ class Users:
     def __init__(self):
         self.db = mongodb["BetSync"]
         self.collection = self.db["users"]
-        self._last_save_times = {}  # Track last save time per user
 
     def get_all_users(self):
         return self.collection.find()
 
     def register_new_user(self, user_data):
+        """Idempotent upsert. Returns the new _id, or False if the user already existed."""
         discordid = user_data["discord_id"]
-        if self.collection.count_documents({"discord_id": discordid}):
+        result = self.collection.update_one(
+            {"discord_id": discordid},
+            {"$setOnInsert": user_data},
+            upsert=True
+        )
+        known_users.add(discordid)
+        if result.upserted_id is None:
             return False
-        else:
-            new_user = self.collection.insert_one(user_data)
-            return new_user.inserted_id
+        ledger.record(discordid, user_data.get("points", 0), "opening")
+        return result.upserted_id
+
+    def warm_known_users(self):
+        return known_users.warm(self.collection)
 
     def fetch_user(self, user_id):
         if self.collection.count_documents({"discord_id": user_id}):
@@ -38,11 +295,23 @@ class Users:
 
     def update_balance(self, user_id, amount, currency="points", operation="$inc"):
         try:
+            if currency == "points" and operation == "$set":
+                # The ledger needs the change, not the new value
+                before = self.collection.find_one_and_update(
+                    {"discord_id": user_id},
+                    {"$set": {currency: amount}},
+                    projection={"points": 1},
+                    upsert=True
+                )
+                ledger.record(user_id, amount - (before or {}).get("points", 0), "balance")
+                return True
             result = self.collection.update_one(
                 {"discord_id": user_id},
                 {operation: {currency: amount}},
                 upsert=True
             )
+            if currency == "points" and operation == "$inc":
+                ledger.record(user_id, amount, "balance")
             return result
         except Exception as e:
             print(f"Error updating balance: {e}")
@@ -90,11 +359,11 @@ class Users:
 
         # Rate limiting: only save once per second per user
         current_time = time.time()
-        last_save_time = self._last_save_times.get(user_id, 0)
+        last_save_time = _last_save_times.get(user_id, 0)
         if current_time - last_save_time < 1.0:  # Less than 1 second since last save
             return True  # Skip this save operation
 
-        self._last_save_times[user_id] = current_time
+        _last_save_times[user_id] = current_time
 
         try:
             # Get user data
@@ -129,15 +398,19 @@ class Users:
             # Update wallet with current coin value
             wallet[current_primary_coin] = current_coin_amount
 
-            # Update database with the wallet value
+            # Update database with the wallet value. The wallet_synced_at filter
+            # applies the same once-per-second limit across bot processes.
             update_result = self.collection.update_one(
-                {"discord_id": user_id},
+                {"discord_id": user_id, "wallet_synced_at": {"$not": {"$gt": current_time - 1.0}}},
                 {
                     "$set": {
-                        f"wallet.{current_primary_coin}": current_coin_amount
+                        f"wallet.{current_primary_coin}": current_coin_amount,
+                        "wallet_synced_at": current_time
                     }
                 }
             )
+            if update_result.matched_count == 0:
+                return True  # Another process synced this user within the last second
 
             # Log the action with timestamp
             rn = datetime.datetime.now().strftime("%X")
@@ -151,6 +424,517 @@ class Users:
             return False
 
 
+class GuildSettingsCache:
+    """
+    Small per-guild config (disabled channels, admins, giveaway channel) kept
+    in memory so global command checks don't fetch the whole server document.
+
+    Entries expire after `ttl` seconds and are invalidated by the commands
+    that change them.
+    """
+
+    FIELDS = ("disabled_channels", "server_admins", "giveaway_channel")
+
+    def __init__(self, ttl=60):
+        self.ttl = ttl
+        self._entries = {}
+
+    def get(self, server_id):
+        entry = self._entries.get(server_id)
+        if entry is None:
+            return None
+        settings, expires_at = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[server_id]
+            return None
+        return settings
+
+    def set(self, server_id, settings):
+        self._entries[server_id] = (settings, time.monotonic() + self.ttl)
+
+    def invalidate(self, server_id):
+        self._entries.pop(server_id, None)
+
+
+guild_settings = GuildSettingsCache()
+
+
+class Blacklist:
+    """
+    Blacklisted discord ids, stored in the `blacklist` collection so every
+    bot process sees the same list.
+
+    Membership checks run on every command, so they are answered from a local
+    set that is reloaded at most every `ttl` seconds. A change made on one
+    cluster reaches the others within that window.
+    """
+
+    def __init__(self, ttl=30):
+        self.ttl = ttl
+        self.collection = mongodb["BetSync"]["blacklist"]
+        self._ids = set()
+        self._loaded_at = None
+
+    def _refresh(self):
+        if self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl:
+            return
+        try:
+            self._ids = {doc["_id"] for doc in self.collection.find({}, {"_id": 1})}
+        except Exception as e:
+            print(f"{Fore.RED}[!] {Fore.WHITE}Error loading blacklist: {Fore.RED}{e}")
+        # Also on failure, so a Mongo outage doesn't turn every command into a query
+        self._loaded_at = time.monotonic()
+
+    def __contains__(self, user_id):
+        self._refresh()
+        return user_id in self._ids
+
+    def __iter__(self):
+        self._refresh()
+        return iter(list(self._ids))
+
+    def __len__(self):
+        self._refresh()
+        return len(self._ids)
+
+    def add(self, user_id):
+        try:
+            self.collection.update_one(
+                {"_id": user_id},
+                {"$setOnInsert": {"added_at": int(time.time())}},
+                upsert=True
+            )
+        except Exception as e:
+            print(f"Error saving blacklisted ID: {e}")
+            return False
+        self._ids.add(user_id)
+        return True
+
+    def remove(self, user_id):
+        try:
+            self.collection.delete_one({"_id": user_id})
+        except Exception as e:
+            print(f"Error removing blacklisted ID: {e}")
+            return False
+        self._ids.discard(user_id)
+        return True
+
+    def import_ids(self, user_ids):
+        """One-off migration of ids from the old blacklist.txt"""
+        for user_id in user_ids:
+            self.add(user_id)
+
+
+blacklist = Blacklist()
+
+
+class Counters:
+    """
+    Named counters in the `counters` collection, one document per name.
+
+    reserve() claims a block of consecutive values with one
+    find_one_and_update($inc), so two processes never get the same value and
+    nothing has to scan for the current maximum. A counter that does not
+    exist yet starts at `floor()`, for values handed out before it existed.
+    """
+
+    def __init__(self):
+        self.collection = mongodb["BetSync"]["counters"]
+        self._seeded = set()
+
+    def _seed(self, name, floor):
+        if self.collection.find_one({"_id": name}, {"_id": 1}) is None:
+            # $max, so a process seeding late never moves a counter backwards
+            self.collection.update_one({"_id": name}, {"$max": {"next": floor()}}, upsert=True)
+        self._seeded.add(name)
+
+    def reserve(self, name, count=1, floor=None):
+        """First of `count` consecutive values that nobody else will get"""
+        if floor is not None and name not in self._seeded:
+            self._seed(name, floor)
+        doc = self.collection.find_one_and_update(
+            {"_id": name},
+            {"$inc": {"next": count}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return doc["next"] - count
+
+
+counters = Counters()
+
+
+class SeenTransactions:
+    """
+    Transactions a deposit scanner has already looked at and will never
+    credit, in the `seen_transactions` collection. Keys are "<chain>:<txid>",
+    so lookups and inserts go through the _id index and the user document
+    stays the same size however many transactions an address receives.
+    Credited transactions stay in the user's processed_<chain>_txids, where
+    the credit itself guards against crediting twice.
+    """
+
+    def __init__(self):
+        self.collection = mongodb["BetSync"]["seen_transactions"]
+
+    def unseen(self, chain, txids):
+        """txids not marked seen yet, in their original order"""
+        if not txids:
+            return []
+        keys = {f"{chain}:{txid}": txid for txid in txids}
+        seen = {doc["_id"] for doc in self.collection.find({"_id": {"$in": list(keys)}}, {"_id": 1})}
+        return [txid for key, txid in keys.items() if key not in seen]
+
+    def mark(self, chain, user_id, entries):
+        """entries: (txid, reason) pairs"""
+        if not entries:
+            return
+        now = datetime.datetime.utcnow()
+        self.collection.bulk_write([
+            UpdateOne(
+                {"_id": f"{chain}:{txid}"},
+                {"$setOnInsert": {"chain": chain, "user_id": user_id, "reason": reason, "seen_at": now}},
+                upsert=True
+            )
+            for txid, reason in entries
+        ], ordered=False)
+
+
+seen_transactions = SeenTransactions()
+
+
+class Withdrawals:
+    """
+    Withdrawal requests in the `withdrawals` collection.
+
+    A request's _id is an idempotency key (the id of the command message), so
+    a command handled twice queues one request and deducts once. Requests
+    move pending -> approved, in a batch with that batch's price, -> sent,
+    with the batch's txid. A pending or approved request can be denied,
+    which refunds its points, and a batch that was never broadcast can be
+    released back to pending.
+    """
+
+    OPEN_STATES = ["pending", "approved"]
+
+    def __init__(self):
+        self.collection = mongodb["BetSync"]["withdrawals"]
+        self.users = mongodb["BetSync"]["users"]
+
+    def open_request(self, user_id):
+        return self.collection.find_one({"user_id": user_id, "state": {"$in": self.OPEN_STATES}})
+
+    def submit(self, key, user_id, coin, points, amount_crypto, address):
+        """Queue a request and deduct its points. Returns (request, error)"""
+        request = {
+            "_id": key,
+            "user_id": user_id,
+            "coin": coin,
+            "points": points,
+            "amount_crypto": amount_crypto,
+            "address": address,
+            "state": "pending",
+            "created_at": datetime.datetime.utcnow()
+        }
+        try:
+            self.collection.insert_one(request)
+        except DuplicateKeyError:
+            return self.collection.find_one({"_id": key}), "duplicate"
+
+        deducted = self.users.update_one(
+            {"discord_id": user_id, "points": {"$gte": points}},
+            {"$inc": {"points": -points}}
+        )
+        if deducted.modified_count == 0:
+            self.collection.delete_one({"_id": key})
+            return None, "insufficient"
+        ledger.record(user_id, -points, "withdrawal", key)
+        return request, None
+
+    def pending(self, coin, limit):
+        """Oldest pending requests for coin"""
+        return list(self.collection.find({"coin": coin, "state": "pending"}).sort("created_at", 1).limit(limit))
+
+    def approve(self, keys, batch_id, price_usd, admin_id):
+        """Move pending requests into a batch, returns the batch"""
+        self.collection.update_many(
+            {"_id": {"$in": keys}, "state": "pending"},
+            {"$set": {
+                "state": "approved",
+                "batch_id": batch_id,
+                "price_usd": price_usd,
+                "approved_by": admin_id,
+                "approved_at": datetime.datetime.utcnow()
+            }}
+        )
+        return list(self.collection.find({"batch_id": batch_id, "state": "approved"}))
+
+    def mark_sent(self, batch_id, txid):
+        """Record the batch's transaction, returns the requests this call marked"""
+        requests = list(self.collection.find({"batch_id": batch_id, "state": "approved"}))
+        if not requests:
+            return []
+        result = self.collection.update_many(
+            {"_id": {"$in": [r["_id"] for r in requests]}, "state": "approved"},
+            {"$set": {"state": "sent", "txid": txid, "sent_at": datetime.datetime.utcnow()}}
+        )
+        if result.modified_count == 0:
+            return []
+        self.users.bulk_write([
+            UpdateOne({"discord_id": r["user_id"]}, {"$inc": {"total_withdraw_amount": r["points"]}})
+            for r in requests
+        ], ordered=False)
+        return requests
+
+    def release(self, batch_id):
+        """Put an approved batch that was never broadcast back in the queue"""
+        result = self.collection.update_many(
+            {"batch_id": batch_id, "state": "approved"},
+            {"$set": {"state": "pending"}, "$unset": {"batch_id": "", "price_usd": "", "approved_by": "", "approved_at": ""}}
+        )
+        return result.modified_count
+
+    def deny(self, key, admin_id):
+        """Deny an open request and refund it, returns the request or None"""
+        request = self.collection.find_one_and_update(
+            {"_id": key, "state": {"$in": self.OPEN_STATES}},
+            {"$set": {"state": "denied", "denied_by": admin_id, "denied_at": datetime.datetime.utcnow()}}
+        )
+        if request:
+            self.users.update_one({"discord_id": request["user_id"]}, {"$inc": {"points": request["points"]}})
+            ledger.record(request["user_id"], request["points"], "withdrawal_refund", key)
+        return request
+
+
+withdrawals = Withdrawals()
+
+
+class Transfers:
+    """
+    Balance transfers, each recorded in the `transfers` collection.
+
+    A transfer debits one user and credits another (or the same) user with
+    one update per side: the debit is conditional on every debited field
+    covering its amount, so two concurrent transfers can never spend the same
+    balance, and each side pushes its history entry in the same update. A
+    transfer is written as pending first, then marked debited and completed,
+    so recover() can finish one the process died in the middle of. Each side
+    adds the transfer id to the user's `pending_transfers` and only applies
+    if it is not there yet, which makes retrying a side harmless. History is
+    capped at 100 entries, so it can't serve as that marker. The ids are
+    pulled again once the transfer is completed or failed, since it is never
+    retried after that.
+
+    A credit to a user that doesn't exist fails the transfer and refunds the
+    debit to the sender.
+
+    Either side may be left out: a credit with no debit is money coming from
+    the house (admin grants), a debit with no credit is money going into
+    escrow (an airdrop until it ends).
+    """
+
+    def __init__(self):
+        self.collection = mongodb["BetSync"]["transfers"]
+        self.users = mongodb["BetSync"]["users"]
+        self._indexed = False
+
+    def _ensure_indexes(self):
+        if not self._indexed:
+            self.collection.create_index([("from_id", 1), ("created_at", -1)])
+            self.collection.create_index([("to_id", 1), ("created_at", -1)])
+            self.collection.create_index([("state", 1), ("created_at", 1)])
+            self._indexed = True
+
+    def transfer(self, kind, from_id=None, debit=None, to_id=None, credit=None, history=(None, None), key=None):
+        """Move balances, debit/credit are {field: amount}. Returns (transfer, error)
+
+        history is (sender entry, recipient entry); missing entries default
+        to {"type": kind}. error is None, "duplicate", "insufficient" or
+        "missing" (the recipient doesn't exist, the sender was refunded).
+        """
+        self._ensure_indexes()
+        now = datetime.datetime.utcnow()
+        doc = {
+            "_id": key or str(ObjectId()),
+            "kind": kind,
+            "from_id": from_id if debit else None,
+            "debit": debit or {},
+            "to_id": to_id if credit else None,
+            "credit": credit or {},
+            "history": [self._entry(kind, history[0], now), self._entry(kind, history[1], now)],
+            "state": "pending",
+            "created_at": now
+        }
+        try:
+            self.collection.insert_one(doc)
+        except DuplicateKeyError:
+            return self.collection.find_one({"_id": doc["_id"]}), "duplicate"
+        return self._apply(doc)
+
+    def _entry(self, kind, entry, now):
+        entry = dict(entry or {"type": kind})
+        entry.setdefault("timestamp", int(now.timestamp()))
+        return entry
+
+    def _apply(self, doc):
+        tid = doc["_id"]
+        sender_entry, recipient_entry = ({**entry, "transfer_id": tid} for entry in doc["history"])
+        not_applied = {"pending_transfers": {"$ne": tid}}
+
+        if doc["debit"] and doc["from_id"] == doc["to_id"]:
+            # Both sides on one document: one conditional update and one history entry
+            update = {
+                "$inc": {**{f: -a for f, a in doc["debit"].items()}, **doc["credit"]},
+                "$push": {"history": {"$each": [recipient_entry], "$slice": -100}, "pending_transfers": tid}
+            }
+            debited = self._debit(doc, update, not_applied)
+            if debited is None:
+                return None, "insufficient"
+            if debited == "applied":
+                self._record(doc, doc["from_id"], doc["credit"].get("points", 0) - doc["debit"].get("points", 0))
+        else:
+            if doc["debit"]:
+                update = {
+                    "$inc": {f: -a for f, a in doc["debit"].items()},
+                    "$push": {"history": {"$each": [sender_entry], "$slice": -100}, "pending_transfers": tid}
+                }
+                debited = self._debit(doc, update, not_applied)
+                if debited is None:
+                    return None, "insufficient"
+                if debited == "applied":
+                    self._record(doc, doc["from_id"], -doc["debit"].get("points", 0))
+                self.collection.update_one({"_id": tid}, {"$set": {"state": "debited"}})
+            if doc["credit"]:
+                credited = self.users.update_one(
+                    {"discord_id": doc["to_id"], **not_applied},
+                    {
+                        "$inc": doc["credit"],
+                        "$push": {"history": {"$each": [recipient_entry], "$slice": -100}, "pending_transfers": tid}
+                    }
+                )
+                if credited.modified_count:
+                    self._record(doc, doc["to_id"], doc["credit"].get("points", 0))
+                elif not self.users.count_documents({"discord_id": doc["to_id"]}, limit=1):
+                    self._fail_missing(doc)
+                    return None, "missing"
+
+        self.collection.update_one({"_id": tid}, {"$set": {"state": "completed", "completed_at": datetime.datetime.utcnow()}})
+        self._forget(tid, [doc["from_id"], doc["to_id"]])
+        doc["state"] = "completed"
+        return doc, None
+
+    def _debit(self, doc, update, not_applied):
+        """"applied", "already" if an earlier attempt applied it, or None if the balance is short"""
+        covered = {f: {"$gte": a} for f, a in doc["debit"].items()}
+        result = self.users.update_one({"discord_id": doc["from_id"], **covered, **not_applied}, update)
+        if result.modified_count:
+            return "applied"
+        # Not applied now: either it was applied before (a retry) or the balance is short
+        if self.users.count_documents({"discord_id": doc["from_id"], "pending_transfers": doc["_id"]}, limit=1):
+            return "already"
+        self.collection.update_one({"_id": doc["_id"]}, {"$set": {"state": "failed", "reason": "insufficient"}})
+        return None
+
+    def _fail_missing(self, doc):
+        """The recipient doesn't exist: give the sender back what was debited and fail the transfer"""
+        tid = doc["_id"]
+        if doc["debit"]:
+            # Only undoes a debit that was applied, and only once: the refund pulls the marker
+            refunded = self.users.update_one(
+                {"discord_id": doc["from_id"], "pending_transfers": tid},
+                {
+                    "$inc": doc["debit"],
+                    "$pull": {"pending_transfers": tid},
+                    "$push": {"history": {"$each": [{
+                        "type": "transfer_refund",
+                        "transfer_id": tid,
+                        "reason": "recipient not found",
+                        "timestamp": int(datetime.datetime.utcnow().timestamp())
+                    }], "$slice": -100}}
+                }
+            )
+            if refunded.modified_count:
+                ledger.record(doc["from_id"], doc["debit"].get("points", 0), f"{doc['kind']}_refund", tid)
+        self.collection.update_one(
+            {"_id": tid},
+            {"$set": {"state": "failed", "reason": "recipient_missing", "completed_at": datetime.datetime.utcnow()}}
+        )
+        print(f"{Fore.YELLOW}[!] Transfer {tid} failed: user {doc['to_id']} not found{Style.RESET_ALL}")
+
+    def _forget(self, tid, user_ids):
+        """Drop the idempotency marker of a finished transfer, it is never applied again"""
+        user_ids = [user_id for user_id in set(user_ids) if user_id is not None]
+        if user_ids:
+            self.users.update_many({"discord_id": {"$in": user_ids}}, {"$pull": {"pending_transfers": tid}})
+
+    def _record(self, doc, user_id, delta):
+        ledger.record(user_id, delta, doc["kind"], doc["_id"])
+
+    def payout(self, kind, from_id, to_ids, credit, history_entry=None, key=None):
+        """Credit every user in to_ids with one bulk write, returns how many were credited"""
+        self._ensure_indexes()
+        if not to_ids:
+            return 0
+        now = datetime.datetime.utcnow()
+        doc = {
+            "_id": key or str(ObjectId()),
+            "kind": kind,
+            "from_id": from_id,
+            "to_ids": list(to_ids),
+            "credit": credit,
+            "history": [self._entry(kind, history_entry, now)],
+            "state": "pending",
+            "created_at": now
+        }
+        self.collection.insert_one(doc)
+        return self._apply_payout(doc)
+
+    def _apply_payout(self, doc):
+        """Credit the users in doc that exist and aren't credited yet, and record only those"""
+        tid = doc["_id"]
+        entry = {**doc["history"][0], "transfer_id": tid}
+        # Only this call works on tid, so these are exactly the users the bulk write will match
+        user_ids = [
+            user["discord_id"] for user in self.users.find(
+                {"discord_id": {"$in": doc["to_ids"]}, "pending_transfers": {"$ne": tid}},
+                {"discord_id": 1, "_id": 0}
+            )
+        ]
+        credited = 0
+        if user_ids:
+            result = self.users.bulk_write([
+                UpdateOne(
+                    {"discord_id": user_id, "pending_transfers": {"$ne": tid}},
+                    {"$inc": doc["credit"], "$push": {"history": {"$each": [entry], "$slice": -100}, "pending_transfers": tid}}
+                )
+                for user_id in user_ids
+            ], ordered=False)
+            credited = result.matched_count
+            for user_id in user_ids:
+                self._record(doc, user_id, doc["credit"].get("points", 0))
+        self.collection.update_one({"_id": tid}, {"$set": {"state": "completed", "completed_at": datetime.datetime.utcnow()}})
+        self._forget(tid, doc["to_ids"])
+        return credited
+
+    def recover(self, older_than=60):
+        """Finish transfers left pending or debited for more than older_than seconds"""
+        cutoff = datetime.datetime.utcnow() - datetime.timedelta(seconds=older_than)
+        finished = 0
+        for doc in self.collection.find({"state": {"$in": ["pending", "debited"]}, "created_at": {"$lt": cutoff}}):
+            if "to_ids" in doc:
+                # Users the first attempt credited are skipped; if it died before recording
+                # their ledger entries, ledger.reconcile() settles them
+                self._apply_payout(doc)
+                finished += 1
+                continue
+            _, error = self._apply(doc)
+            finished += error is None
+        return finished
+
+
+transfers = Transfers()
+
+
 class Servers:
 
     def __init__(self):
@@ -166,6 +950,7 @@ class Servers:
             return False
         else:
             new_server_ = self.collection.insert_one(dump) 
+            guild_settings.invalidate(server_id)
             return self.collection.find_one({"server_id": server_id})
 
     def update_server_profit(self, ctx, server_id, amount, game=None):
@@ -216,7 +1001,7 @@ class Servers:
 
             # Update daily profit data
             PD = ProfitData()
-            PD.update_daily_profit(primary_coin, crypto_value_change)
+            PD.update_daily_profit(primary_coin, crypto_value_change, points=amount)
 
             # Log the update
             rn = datetime.datetime.now().strftime("%X")
@@ -271,6 +1056,29 @@ class Servers:
         else:
             return False
 
+    def fetch_settings(self, server_id):
+        """
+        Cached config fields for a server, or False if it isn't registered.
+        One projected query on a miss, a dict lookup otherwise.
+        """
+        settings = guild_settings.get(server_id)
+        if settings is None:
+            settings = self._load_settings(server_id)
+        return settings if settings["registered"] else False
+
+    def _load_settings(self, server_id):
+        projection = {field: 1 for field in GuildSettingsCache.FIELDS}
+        projection["_id"] = 0
+        doc = self.collection.find_one({"server_id": server_id}, projection)
+        settings = {
+            "registered": doc is not None,
+            "disabled_channels": set((doc or {}).get("disabled_channels", [])),
+            "server_admins": set((doc or {}).get("server_admins", [])),
+            "giveaway_channel": (doc or {}).get("giveaway_channel"),
+        }
+        guild_settings.set(server_id, settings)
+        return settings
+
 
 class ServerProfit:
     def __init__(self):
@@ -346,13 +1154,45 @@ class ServerProfit:
 
 
 class ProfitData:
+    """
+    House profit per day in `profit_data`, one document per "YYYY-MM-DD".
+
+    Each document keeps the profit per coin (`wallet.<coin>`) and in points
+    (`total_profit`), both incremented at write time. `priced.<coin>` is the
+    part of `wallet.<coin>` that total_profit already covers, so on the day
+    total_profit was introduced the profit made before it is still converted
+    from the wallet and added on top. Graphs read rollups:
+    the last days straight from the `date` index, months from a $group over
+    the daily documents, so neither loads or parses the whole history.
+    """
+
+    # Points per unit of each coin, for profit recorded before total_profit existed
+    POINT_RATES = {
+        "BTC": 0.00000024,
+        "LTC": 0.00023,
+        "ETH": 0.000010,
+        "USDT": 0.0212,
+        "SOL": 0.0001442
+    }
+
+    _indexed = False
+
     def __init__(self):
         self.db = mongodb["BetSync"]
         self.collection = self.db["profit_data"]
 
-    def update_daily_profit(self, coin, amount, game=None):
+    def _ensure_index(self):
+        if not ProfitData._indexed:
+            self.collection.create_index("date")
+            ProfitData._indexed = True
+
+    def update_daily_profit(self, coin, amount, game=None, points=None):
         # Convert datetime.date to string format (YYYY-MM-DD)
         today = datetime.date.today().strftime("%Y-%m-%d")
+        increments = {f"wallet.{coin}": amount}
+        if points is not None:
+            increments["total_profit"] = points
+            increments[f"priced.{coin}"] = amount
         try:
             # Use upsert to handle both document creation and updating
             # This creates the document if it doesn't exist, or updates it if it does
@@ -360,7 +1200,7 @@ class ProfitData:
             result = self.collection.update_one(
                 {"date": today},
                 {
-                    "$inc": {f"wallet.{coin}": amount},
+                    "$inc": increments,
                     "$setOnInsert": {
                         "date": today,
                         #"games": {}  # Initialize games object if needed
@@ -382,4 +1222,41 @@ class ProfitData:
                 date = date.strftime("%Y-%m-%d")
             return self.collection.find_one({"date": date})
         else:
-            return list(self.collection.find())
\ No newline at end of file
+            return list(self.collection.find())
+
+    def _points(self):
+        """Aggregation expression for a day's profit in points"""
+        # Wallet profit that total_profit doesn't cover, converted at the fixed rates
+        unpriced = [
+            {"$divide": [
+                {"$subtract": [{"$ifNull": [f"$wallet.{coin}", 0]}, {"$ifNull": [f"$priced.{coin}", 0]}]},
+                rate
+            ]}
+            for coin, rate in self.POINT_RATES.items()
+        ]
+        return {"$add": [{"$ifNull": ["$total_profit", 0]}, *unpriced]}
+
+    def daily_profit(self, days=30):
+        """{date: points} for the last `days` days that have profit recorded"""
+        self._ensure_index()
+        start = (datetime.date.today() - datetime.timedelta(days=days)).strftime("%Y-%m-%d")
+        rows = self.collection.aggregate([
+            {"$match": {"date": {"$gte": start}}},
+            {"$project": {"_id": 0, "date": 1, "profit": self._points()}}
+        ])
+        return {datetime.date.fromisoformat(row["date"]): row["profit"] for row in rows}
+
+    def monthly_profit(self, months=None):
+        """[(first day of month, points)] oldest first, for the last `months` months or all of them"""
+        self._ensure_index()
+        match = {"date": {"$type": "string"}}
+        if months:
+            today = datetime.date.today()
+            year, month = divmod(today.year * 12 + today.month - 1 - (months - 1), 12)
+            match["date"]["$gte"] = f"{year:04d}-{month + 1:02d}"
+        rows = self.collection.aggregate([
+            {"$match": match},
+            {"$group": {"_id": {"$substrBytes": ["$date", 0, 7]}, "profit": {"$sum": self._points()}}},
+            {"$sort": {"_id": 1}}
+        ])
+        return [(datetime.date.fromisoformat(f"{row['_id']}-01"), row["profit"]) for row in rows]
@@ -6,6 +6,7 @@ import asyncio
 import os
 import datetime # Needed for timestamp
 from dotenv import load_dotenv
+from Cogs.utils.metrics import metrics
 
 load_dotenv() # Load environment variables
 
@@ -14,6 +15,15 @@ class Notifier:
     Utility class for sending notifications via Discord webhooks
     """
 
+    async def _execute(self, webhook):
+        """Run a blocking webhook send in the executor, tracking how many are queued"""
+        metrics.add_gauge("webhook_queue_depth", 1)
+        try:
+            loop = asyncio.get_event_loop()
+            return await loop.run_in_executor(None, webhook.execute)
+        finally:
+            metrics.add_gauge("webhook_queue_depth", -1)
+
     #@staticmethod # Keep methods as instance methods if they might need self later
     async def bet_event(self, webhook_url, user_id, bet_amount):
         """
@@ -78,8 +88,7 @@ class Notifier:
             webhook.add_embed(embed)
 
             # Send webhook (async)
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(None, webhook.execute)
+            response = await self._execute(webhook)
             # Check response status if needed
             return True
 
@@ -151,8 +160,7 @@ class Notifier:
             webhook.add_embed(embed)
 
             # Send webhook (async)
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(None, webhook.execute)
+            response = await self._execute(webhook)
             # Check response status if needed
             return True
 
@@ -225,8 +233,7 @@ class Notifier:
             webhook.add_embed(embed)
 
             # Send webhook asynchronously
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(None, webhook.execute)
+            response = await self._execute(webhook)
             # Optionally check response.status_code
             return True
 
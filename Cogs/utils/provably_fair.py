@@ -0,0 +1,201 @@
+"""
+Provably fair outcomes.
+
+Every user has their own random server seed, generated with `secrets` and
+stored with their pair. Only sha256(server seed) is shown while the seed is
+active; rotating reveals it and starts a new, independent one, so a seed
+revealed to one user says nothing about anyone else's.
+
+Every bet costs exactly one HMAC:
+    digest = HMAC_SHA256(server_seed, f"{client_seed}:{nonce}")
+and the game outcome is derived from that digest only.
+"""
+
+import hashlib
+import hmac
+import random
+import secrets
+from pymongo import ReturnDocument
+from Cogs.utils.mongo import mongodb
+
+SEED_SIZE = 32
+# Pairs created before per-user seeds point into the old shared hash chains
+LEGACY_CHAIN_LENGTH = 100_000
+
+
+def derive_digest(server_seed, client_seed, nonce):
+    """Single HMAC per bet. server_seed may be raw bytes or a hex string."""
+    if isinstance(server_seed, str):
+        server_seed = bytes.fromhex(server_seed)
+    return hmac.new(server_seed, f"{client_seed}:{nonce}".encode(), hashlib.sha256).digest()
+
+
+def digest_to_float(digest):
+    """Map the first 52 bits of a digest to a float in [0, 1)"""
+    return (int.from_bytes(digest[:7], "big") >> 4) / float(1 << 52)
+
+
+def digest_to_rng(digest):
+    """Deterministic RNG for games that need more than one draw per bet"""
+    return random.Random(digest)
+
+
+def hash_seed(server_seed):
+    if isinstance(server_seed, str):
+        server_seed = bytes.fromhex(server_seed)
+    return hashlib.sha256(server_seed).hexdigest()
+
+
+# Outcome functions shared by the games and by !verify
+
+def coinflip_outcome(digest):
+    return "heads" if digest_to_float(digest) < 0.5 else "tails"
+
+
+def dice_outcome(digest):
+    rng = digest_to_rng(digest)
+    return rng.randint(1, 6), rng.randint(1, 6)
+
+
+def limbo_outcome(digest):
+    # rolled_mult = 1.0 / (1.0 - R) where R is [0, 0.85)
+    r = digest_to_float(digest) * 0.85
+    return round(1.0 / (1.0 - r), 2)
+
+
+OUTCOMES = {
+    "coinflip": coinflip_outcome,
+    "dice": dice_outcome,
+    "limbo": limbo_outcome,
+}
+
+
+def new_server_seed():
+    return secrets.token_bytes(SEED_SIZE).hex()
+
+
+class FairBet:
+    __slots__ = ("server_seed", "client_seed", "nonce", "digest")
+
+    def __init__(self, server_seed, client_seed, nonce):
+        self.server_seed = server_seed
+        self.client_seed = client_seed
+        self.nonce = nonce
+        self.digest = derive_digest(server_seed, client_seed, nonce)
+
+    def float(self):
+        return digest_to_float(self.digest)
+
+    def rng(self):
+        return digest_to_rng(self.digest)
+
+    def proof(self):
+        """Small dict stored with the history entry so !verify needs no lookups"""
+        return {
+            "server_seed_hash": hash_seed(self.server_seed),
+            "client_seed": self.client_seed,
+            "nonce": self.nonce,
+        }
+
+
+class ProvablyFair:
+    """
+    Per-user server seed / client seed / nonce state.
+
+    The active server seed is kept secret (only its hash is shown) until the
+    user rotates it, at which point it is revealed, kept as the user's
+    previous pair, and bets made with it can be checked with !verify.
+    """
+
+    def __init__(self):
+        self.db = mongodb["BetSync"]
+        self.collection = self.db["fair_seeds"]
+
+    def _new_pair(self, user_id, client_seed=None, previous=None):
+        pair = {
+            "discord_id": user_id,
+            "server_seed": new_server_seed(),
+            "client_seed": client_seed or secrets.token_hex(8),
+            "nonce": 0,
+        }
+        update = {"$set": pair, "$unset": {"seed_index": ""}}
+        if previous is not None:
+            update["$set"]["previous"] = previous
+        self.collection.update_one({"discord_id": user_id}, update, upsert=True)
+        return pair
+
+    def _legacy_seed(self, index):
+        """Seed of a pair from the old shared hash chains, only ever used to reveal it"""
+        chain_id, position = divmod(index, LEGACY_CHAIN_LENGTH)
+        doc = self.db["seed_chains"].find_one({"chain_id": chain_id}, {"seeds": 1})
+        if not doc:
+            return None
+        offset = (LEGACY_CHAIN_LENGTH - 1 - position) * SEED_SIZE
+        return bytes(doc["seeds"])[offset:offset + SEED_SIZE].hex()
+
+    def get_pair(self, user_id):
+        pair = self.collection.find_one({"discord_id": user_id})
+        if not pair or "server_seed" not in pair:
+            # A pair on the shared chain is retired: its seed is revealed and replaced
+            pair = self._retire_legacy(user_id, pair)
+        return pair
+
+    def _retire_legacy(self, user_id, legacy):
+        if not legacy:
+            return self._new_pair(user_id)
+        previous = {
+            "server_seed": self._legacy_seed(legacy["seed_index"]),
+            "client_seed": legacy["client_seed"],
+            "nonce": legacy["nonce"],
+        }
+        return self._new_pair(user_id, legacy["client_seed"], previous)
+
+    def next_bet(self, user_id):
+        """Consume one nonce and return the FairBet for it (one DB round trip)"""
+        pair = self.collection.find_one_and_update(
+            {"discord_id": user_id, "server_seed": {"$exists": True}},
+            {"$inc": {"nonce": 1}},
+            return_document=ReturnDocument.BEFORE
+        )
+        if not pair:
+            self.get_pair(user_id)
+            pair = self.collection.find_one_and_update(
+                {"discord_id": user_id},
+                {"$inc": {"nonce": 1}},
+                return_document=ReturnDocument.BEFORE
+            )
+        return FairBet(pair["server_seed"], pair["client_seed"], pair["nonce"])
+
+    def rotate(self, user_id, client_seed=None):
+        """Reveal the current server seed and start a new pair. Returns (old, new)."""
+        current = self.get_pair(user_id)
+        old = {
+            "server_seed": current["server_seed"],
+            "client_seed": current["client_seed"],
+            "nonce": current["nonce"],
+        }
+        new = self._new_pair(user_id, client_seed or old["client_seed"], old)
+        return old, new
+
+    def server_seed_hash(self, pair):
+        return hash_seed(pair["server_seed"])
+
+
+def verify(game, server_seed, client_seed, nonce):
+    """Recompute a historical bet. Pure function - no database access."""
+    outcome = OUTCOMES.get(game)
+    if outcome is None:
+        raise ValueError(f"Unknown game '{game}'")
+    digest = derive_digest(server_seed, client_seed, int(nonce))
+    return outcome(digest), digest.hex()
+
+
+_fair = None
+
+
+def get_fair():
+    """Shared ProvablyFair instance"""
+    global _fair
+    if _fair is None:
+        _fair = ProvablyFair()
+    return _fair
@@ -0,0 +1,108 @@
+"""
+Deposit card render cache.
+
+A deposit card only depends on the chain, the address and the username
+printed on it, and a user's address never changes, so the PNG is rendered
+once and reused. Encoded bytes are kept in a small in-memory LRU and in
+GridFS (`render_cache` bucket), so restarts and the other clusters reuse
+them too. Misses render on a single worker thread, which keeps PIL and the
+shared font objects off the event loop and away from each other; two
+requests for the same card wait for one render.
+"""
+
+import asyncio
+import functools
+import io
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from colorama import Fore, Style
+import gridfs
+from PIL import ImageFont
+from Cogs.utils.mongo import mongodb
+from Cogs.utils.metrics import metrics
+
+MEMORY_ENTRIES = 256  # cards kept in memory
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="render")
+
+
+@functools.lru_cache(maxsize=None)
+def deposit_card_fonts():
+    """(title, subtitle, brand) fonts for the deposit cards, loaded once"""
+    try:
+        return (
+            ImageFont.truetype("Helvetica-Bold.ttf", 30),
+            ImageFont.truetype("Helvetica.ttf", 18),
+            ImageFont.truetype("Helvetica-Bold.ttf", 36),
+        )
+    except IOError:
+        print(f"{Fore.YELLOW}[!] Warning: Font files not found. Using default font.{Style.RESET_ALL}")
+    try:
+        return (
+            ImageFont.truetype("arial.ttf", 30),
+            ImageFont.truetype("arial.ttf", 18),
+            ImageFont.truetype("arial.ttf", 36),
+        )
+    except IOError:
+        default = ImageFont.load_default()
+        return default, default, default
+
+
+class RenderCache:
+    def __init__(self, bucket="render_cache", max_entries=MEMORY_ENTRIES):
+        self.bucket = bucket
+        self.max_entries = max_entries
+        self.memory = OrderedDict()  # key -> PNG bytes
+        self.hits = 0
+        self.misses = 0
+        self._store = None
+        self._inflight = {}  # key -> Future
+
+    @property
+    def store(self):
+        if self._store is None:
+            self._store = gridfs.GridFS(mongodb["BetSync"], collection=self.bucket)
+        return self._store
+
+    async def get(self, key, render, *args):
+        """PNG bytes for key, from memory, GridFS, or render(*args) on the worker thread"""
+        data = self.memory.get(key)
+        if data is not None:
+            self.memory.move_to_end(key)
+            self.hits += 1
+            return data
+
+        self.misses += 1
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.get_running_loop().run_in_executor(_executor, self._load_or_render, key, render, args)
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        data = await asyncio.shield(future)
+
+        self.memory[key] = data
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_entries:
+            self.memory.popitem(last=False)
+        metrics.set_gauge("render_cache_entries", len(self.memory))
+        return data
+
+    def _load_or_render(self, key, render, args):
+        try:
+            stored = self.store.find_one({"filename": key})
+            if stored is not None:
+                return stored.read()
+        except Exception as e:
+            print(f"{Fore.YELLOW}[!] Could not read cached render {key}: {e}{Style.RESET_ALL}")
+
+        data = render(*args)
+        if isinstance(data, io.BytesIO):
+            data = data.getvalue()
+        try:
+            self.store.put(data, filename=key, content_type="image/png")
+        except Exception as e:
+            print(f"{Fore.YELLOW}[!] Could not store render {key}: {e}{Style.RESET_ALL}")
+        return data
+
+
+deposit_cards = RenderCache()
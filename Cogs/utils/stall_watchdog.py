@@ -0,0 +1,112 @@
+"""
+Event-loop stall detector.
+
+The loop bumps a heartbeat every HEARTBEAT_INTERVAL seconds. A watchdog
+thread checks the heartbeat; when it is older than the threshold, the loop
+is blocked, so the watchdog grabs the loop thread's Python stack and the
+task that is running, and records them as a stall.
+"""
+
+import asyncio
+import collections
+import sys
+import threading
+import time
+import traceback
+import weakref
+from colorama import Fore
+from Cogs.utils.metrics import metrics
+
+HEARTBEAT_INTERVAL = 0.05  # seconds
+STALL_THRESHOLD = 0.25     # seconds the loop may be unresponsive before we capture
+MAX_STALLS = 50
+MAX_STACK_FRAMES = 25
+
+# asyncio.Task -> command / view name, filled in by the Perf cog hooks
+task_labels = weakref.WeakKeyDictionary()
+
+
+class Stall:
+    __slots__ = ("started_at", "duration", "label", "task_name", "stack")
+
+    def __init__(self, started_at, label, task_name, stack):
+        self.started_at = started_at
+        self.duration = None
+        self.label = label
+        self.task_name = task_name
+        self.stack = stack
+
+
+class StallWatchdog:
+    def __init__(self, threshold=STALL_THRESHOLD):
+        self.threshold = threshold
+        self.stalls = collections.deque(maxlen=MAX_STALLS)
+        self._loop = None
+        self._loop_thread_id = None
+        self._heartbeat = time.monotonic()
+        self._current = None
+        self._current_started = 0.0
+        self._thread = None
+        self._stopped = threading.Event()
+
+    def start(self, loop):
+        """Call from the loop thread"""
+        if self._thread is not None:
+            return
+        self._loop = loop
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        loop.call_soon(self._beat)
+        self._thread = threading.Thread(target=self._watch, name="loop-stall-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def _beat(self):
+        self._heartbeat = time.monotonic()
+        if not self._stopped.is_set():
+            self._loop.call_later(HEARTBEAT_INTERVAL, self._beat)
+
+    def _watch(self):
+        while not self._stopped.wait(HEARTBEAT_INTERVAL):
+            age = time.monotonic() - self._heartbeat
+
+            if age < self.threshold:
+                if self._current is not None:
+                    # Loop is responsive again, close the stall we were tracking
+                    self._current.duration = time.monotonic() - self._current_started
+                    metrics.observe("stall", self._current.label, self._current.duration)
+                    self._log(self._current)
+                    self._current = None
+                continue
+
+            if self._current is None:
+                self._current_started = self._heartbeat
+                self._current = self._capture()
+                self.stalls.append(self._current)
+
+    def _capture(self):
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack = traceback.format_stack(frame, limit=MAX_STACK_FRAMES) if frame else []
+
+        label = "unknown"
+        task_name = None
+        try:
+            task = asyncio.current_task(self._loop)
+        except RuntimeError:
+            task = None
+        if task is not None:
+            task_name = task.get_name()
+            label = task_labels.get(task) or task_name
+
+        return Stall(time.time(), label, task_name, "".join(stack))
+
+    def recent(self, limit=10):
+        return list(self.stalls)[-limit:][::-1]
+
+    def _log(self, stall):
+        print(f"{Fore.RED}[!] {Fore.WHITE}Event loop stalled {Fore.RED}{stall.duration * 1000:.0f} ms{Fore.WHITE} in {Fore.YELLOW}{stall.label}{Fore.WHITE}")
+
+
+watchdog = StallWatchdog()
@@ -0,0 +1,39 @@
+import time
+from colorama import Fore
+
+
+class StartupTimer:
+    """
+    Records how long each boot phase takes so slow restarts can be traced
+    back to a phase (imports, cog loading, gateway login) or a single cog.
+    """
+
+    def __init__(self, started=None):
+        self.started = started if started is not None else time.perf_counter()
+        self._last = self.started
+        self.phases = []
+        self.cog_times = []
+
+    def mark(self, phase):
+        """Close the current phase and return its duration in seconds"""
+        now = time.perf_counter()
+        duration = now - self._last
+        self.phases.append((phase, duration))
+        self._last = now
+        return duration
+
+    def time_cog(self, name, duration):
+        self.cog_times.append((name, duration))
+
+    def total(self):
+        return time.perf_counter() - self.started
+
+    def report(self, slowest=5):
+        print(f"{Fore.CYAN}[*] {Fore.WHITE}Startup timings:")
+        for phase, duration in self.phases:
+            print(f"{Fore.CYAN}    {Fore.WHITE}{phase:<20} {Fore.YELLOW}{duration * 1000:8.1f} ms{Fore.WHITE}")
+        if self.cog_times:
+            print(f"{Fore.CYAN}    {Fore.WHITE}Slowest cogs:")
+            for name, duration in sorted(self.cog_times, key=lambda x: x[1], reverse=True)[:slowest]:
+                print(f"{Fore.CYAN}      {Fore.WHITE}{name:<30} {Fore.YELLOW}{duration * 1000:8.1f} ms{Fore.WHITE}")
+        print(f"{Fore.GREEN}[+] {Fore.WHITE}Process start to ready: {Fore.GREEN}{self.total():.2f}s{Fore.WHITE}")
@@ -1,12 +1,128 @@
 
 import discord
 from discord.ext import commands
-from Cogs.utils.mongo import Users
+import os
+import io
+import json
+import datetime
+import uuid
+from Cogs.utils.mongo import Users, withdrawals
+from Cogs.utils.currency_helper import get_crypto_price
+from Cogs.utils.dm_fanout import resolve_user
+
+BATCH_SIZE = 25  # requests per batch unless the admin asks for another size
+MAX_BATCH_SIZE = 100
+BATCH_COINS = {
+    "BTC": {"price_id": "bitcoin", "explorer": "https://blockstream.info/tx/"},
+    "LTC": {"price_id": "litecoin", "explorer": "https://litecoinspace.org/tx/"},
+}
+
+
+def batch_outputs(requests):
+    """address -> amount, requests to the same address share one output"""
+    outputs = {}
+    for request in requests:
+        outputs[request["address"]] = round(outputs.get(request["address"], 0) + request["amount_crypto"], 8)
+    return outputs
+
+
+def batch_exports(batch_id, outputs):
+    """Pay-to-many CSV (Electrum, Sparrow) and a sendmany JSON object (Bitcoin/Litecoin Core)"""
+    csv = "\n".join(f"{address},{amount:.8f}" for address, amount in outputs.items())
+    sendmany = json.dumps({address: round(amount, 8) for address, amount in outputs.items()}, indent=2)
+    return [
+        discord.File(io.BytesIO(csv.encode()), filename=f"{batch_id}.csv"),
+        discord.File(io.BytesIO(sendmany.encode()), filename=f"{batch_id}_sendmany.json"),
+    ]
+
+
+class BatchView(discord.ui.View):
+    def __init__(self, cog, admin_id: int, coin: str, requests: list):
+        super().__init__(timeout=300)
+        self.cog = cog
+        self.admin_id = admin_id
+        self.coin = coin
+        self.requests = requests
+        self.message = None
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.admin_id:
+            await interaction.response.send_message("You cannot use these controls.", ephemeral=True)
+            return False
+        return True
+
+    async def on_timeout(self):
+        if self.message:
+            for item in self.children:
+                item.disabled = True
+            try:
+                await self.message.edit(view=self)
+            except discord.HTTPException:
+                pass
+
+    @discord.ui.button(label="Approve Batch", style=discord.ButtonStyle.green, emoji="✅")
+    async def approve_button(self, button: discord.ui.Button, interaction: discord.Interaction):
+        await interaction.response.defer()
+        for item in self.children:
+            item.disabled = True
+        self.stop()
+
+        # One price for the whole batch
+        price = await get_crypto_price(BATCH_COINS[self.coin]["price_id"])
+        # Readable, with a random suffix so two batches approved in the same second never merge
+        batch_id = f"{self.coin.lower()}-{datetime.datetime.utcnow():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:6]}"
+        approved = self.cog.withdrawals.approve([r["_id"] for r in self.requests], batch_id, price, interaction.user.id)
+        if not approved:
+            embed = discord.Embed(
+                title="<:no:1344252518305234987> | Nothing Approved",
+                description="These requests were already approved or denied.",
+                color=0xFF0000
+            )
+            return await self.message.edit(embed=embed, view=self)
+
+        outputs = batch_outputs(approved)
+        total = sum(outputs.values())
+        usd = f" (${total * price:,.2f} at ${price:,.2f})" if price else ""
+        embed = discord.Embed(
+            title=f"<:yes:1355501647538815106> | Batch `{batch_id}` Approved",
+            description=f"**Requests:** {len(approved)}\n"
+                      f"**Outputs:** {len(outputs)}\n"
+                      f"**Total:** {total:.8f} {self.coin}{usd}\n\n"
+                      f"Broadcast the attached outputs as one transaction, then run\n"
+                      f"`!withdrawals sent {batch_id} <txid>`",
+            color=0x00FFAE
+        )
+        embed.set_footer(text="BetSync Casino")
+        await self.message.edit(embed=embed, view=self)
+        await interaction.followup.send(files=batch_exports(batch_id, outputs))
+
+    @discord.ui.button(label="Cancel", style=discord.ButtonStyle.grey, emoji="✖️")
+    async def cancel_button(self, button: discord.ui.Button, interaction: discord.Interaction):
+        for item in self.children:
+            item.disabled = True
+        self.stop()
+        await interaction.response.edit_message(view=self)
+
 
 class Withdraw(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.users_db = Users()
+        self.withdrawals = withdrawals
+        self.admin_ids = self.load_admin_ids()
+
+    def load_admin_ids(self):
+        """Load admin IDs from admins.txt file"""
+        admin_ids = []
+        try:
+            with open("admins.txt", "r") as f:
+                for line in f:
+                    line = line.strip()
+                    if line and line.isdigit():
+                        admin_ids.append(int(line))
+        except Exception as e:
+            print(f"Error loading admin IDs: {e}")
+        return admin_ids
 
     @commands.command(name="withdraw", aliases=["w"])
     async def withdraw(self, ctx, *, args: str = None):
@@ -59,5 +175,161 @@ class Withdraw(commands.Cog):
             )
             await ctx.reply(embed=embed)
 
+    @commands.command(name="withdrawals", aliases=["wq"])
+    async def withdrawals_command(self, ctx, action: str = None, target: str = None, txid: str = None):
+        """Batch withdrawal processing (Admin only)
+
+        Usage: !withdrawals <BTC|LTC> [count]
+               !withdrawals sent <batch> <txid>
+               !withdrawals release <batch>
+               !withdrawals deny <request>
+        """
+        if ctx.author.id not in self.admin_ids:
+            embed = discord.Embed(
+                title="<:no:1344252518305234987> | Access Denied",
+                description="This command is restricted to administrators only.",
+                color=0xFF0000
+            )
+            return await ctx.reply(embed=embed)
+
+        action = (action or "").lower()
+        if action == "sent" and target and txid:
+            return await self._mark_sent(ctx, target, txid)
+        if action == "release" and target:
+            released = self.withdrawals.release(target)
+            embed = discord.Embed(
+                title="<:yes:1355501647538815106> | Batch Released",
+                description=f"{released} request(s) from `{target}` are back in the queue.",
+                color=0x00FFAE
+            )
+            return await ctx.reply(embed=embed)
+        if action == "deny" and target:
+            return await self._deny(ctx, target)
+        if action.upper() in BATCH_COINS:
+            return await self._show_batch(ctx, action.upper(), target)
+
+        embed = discord.Embed(
+            title="<:no:1344252518305234987> | Invalid Usage",
+            description="`!withdrawals <BTC|LTC> [count]` - review and approve a batch\n"
+                      "`!withdrawals sent <batch> <txid>` - record the broadcast transaction\n"
+                      "`!withdrawals release <batch>` - put an unsent batch back in the queue\n"
+                      "`!withdrawals deny <request>` - deny and refund one request",
+            color=0xFF0000
+        )
+        await ctx.reply(embed=embed)
+
+    async def _show_batch(self, ctx, coin: str, count: str = None):
+        try:
+            limit = max(1, min(int(count), MAX_BATCH_SIZE)) if count else BATCH_SIZE
+        except ValueError:
+            limit = BATCH_SIZE
+        requests = self.withdrawals.pending(coin, limit)
+        if not requests:
+            embed = discord.Embed(
+                title="<:yes:1355501647538815106> | Queue Empty",
+                description=f"No pending {coin} withdrawals.",
+                color=0x00FFAE
+            )
+            return await ctx.reply(embed=embed)
+
+        # Only the requests that fit in the embed are shown, and only those get approved
+        lines = []
+        length = 0
+        for r in requests:
+            line = f"`{r['_id']}` <@{r['user_id']}> {r['amount_crypto']:.8f} {coin} → `{r['address']}`"
+            if lines and length + len(line) + 1 > 3800:
+                break
+            lines.append(line)
+            length += len(line) + 1
+        hidden = len(requests) - len(lines)
+        requests = requests[:len(lines)]
+        total = sum(r["amount_crypto"] for r in requests)
+        description = "\n".join(lines)
+        if hidden:
+            description += f"\n\n…and {hidden} more, left in the queue for the next batch"
+        embed = discord.Embed(
+            title=f"⏳ | {len(requests)} Pending {coin} Withdrawal(s)",
+            description=description,
+            color=0x00FFAE
+        )
+        embed.add_field(name="Total", value=f"{total:.8f} {coin}", inline=True)
+        embed.add_field(name="Outputs", value=str(len(batch_outputs(requests))), inline=True)
+        embed.set_footer(text="BetSync Casino")
+        view = BatchView(self, ctx.author.id, coin, requests)
+        view.message = await ctx.reply(embed=embed, view=view)
+
+    async def _mark_sent(self, ctx, batch_id: str, txid: str):
+        sent = self.withdrawals.mark_sent(batch_id, txid)
+        if not sent:
+            embed = discord.Embed(
+                title="<:no:1344252518305234987> | Batch Not Found",
+                description=f"No approved requests in `{batch_id}`.",
+                color=0xFF0000
+            )
+            return await ctx.reply(embed=embed)
+
+        coin = sent[0]["coin"]
+        link = f"{BATCH_COINS[coin]['explorer']}{txid}"
+        total = sum(r["amount_crypto"] for r in sent)
+        embed = discord.Embed(
+            title="<:yes:1355501647538815106> | Withdrawal Batch Completed",
+            description=f"**Batch:** `{batch_id}`\n"
+                      f"**Requests:** {len(sent)}\n"
+                      f"**{coin}:** {total:.8f}\n"
+                      f"**TXID:** [{txid[:12]}...]({link})",
+            color=discord.Color.green()
+        )
+        embed.set_footer(text=f"Sent by {ctx.author.name}")
+        await ctx.reply(embed=embed)
+        logs = self.bot.get_channel(int(os.environ.get("LOGS", 0)))
+        if logs:
+            await logs.send(embed=embed)
+
+        for request in sent:
+            user = await resolve_user(self.bot, request["user_id"])
+            if not user:
+                continue
+            embed = discord.Embed(
+                title="<:yes:1355501647538815106> | Withdrawal Completed",
+                description=f"Your withdrawal of {request['points']:,.2f} points is complete!",
+                color=discord.Color.green()
+            )
+            embed.add_field(name="Amount Sent", value=f"{request['amount_crypto']:.8f} {coin}")
+            embed.add_field(name="Transaction", value=f"[View on Explorer]({link})")
+            try:
+                await user.send(embed=embed)
+            except (discord.Forbidden, discord.HTTPException):
+                pass
+
+    async def _deny(self, ctx, request_id: str):
+        request = self.withdrawals.deny(request_id, ctx.author.id)
+        if not request:
+            embed = discord.Embed(
+                title="<:no:1344252518305234987> | Request Not Found",
+                description=f"No open withdrawal `{request_id}`.",
+                color=0xFF0000
+            )
+            return await ctx.reply(embed=embed)
+
+        embed = discord.Embed(
+            title="<:no:1344252518305234987> | Withdrawal Denied",
+            description=f"Denied `{request_id}` for <@{request['user_id']}>. {request['points']:,.2f} points refunded.",
+            color=discord.Color.red()
+        )
+        await ctx.reply(embed=embed)
+
+        user = await resolve_user(self.bot, request["user_id"])
+        if user:
+            embed = discord.Embed(
+                title="<:no:1344252518305234987> | Withdrawal Denied",
+                description=f"Your withdrawal of {request['points']:,.2f} points was denied.",
+                color=discord.Color.red()
+            )
+            embed.add_field(name="Status", value="Points have been refunded to your account")
+            try:
+                await user.send(embed=embed)
+            except (discord.Forbidden, discord.HTTPException):
+                pass
+
 def setup(bot):
     bot.add_cog(Withdraw(bot))
@@ -0,0 +1,572 @@
+"""
+Offline load test for the game and deposit cogs.
+
+Loads the real cogs into a `commands.Bot` that never logs in, and drives them
+with fake contexts, messages and interactions on behalf of thousands of
+concurrent players. The database is either mongomock (default, nothing to
+install besides `pip install mongomock`) or a local mongod given with
+--mongo. Never point --mongo at production: the run writes to the BetSync
+database of that server.
+
+For every scenario it reports bets/sec, p50/p99 latency of one full bet
+(command plus the button presses that finish it), Mongo operations per bet
+and peak RSS. Results can be saved as JSON and compared against a previous
+run, which makes the script usable as a regression gate:
+
+    python benchmarks/loadtest.py --players 2000 --save baseline.json
+    python benchmarks/loadtest.py --players 2000 --compare baseline.json
+
+Run it from the repository root.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import itertools
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# Nothing in the cogs may reach the real webhooks while we hammer them
+for _var in ("DEPOSIT_WEBHOOK", "PROFIT_WEBHOOK_URL", "USER_WEBHOOK", "LOGS"):
+    os.environ[_var] = ""
+os.environ.setdefault("BTC_XPUB", "loadtest")
+
+FIRST_PLAYER_ID = 900_000_000_000_000_000
+GUILD_ID = 900_000_000_000_000_000
+BOT_USER_ID = 899_999_999_999_999_999
+STARTING_POINTS = 10_000_000
+BET = "10"
+# Addresses served by the stub explorer, never derived from BTC_XPUB
+DEPOSIT_ADDRESS = "bc1qloadtest{:030d}"
+
+# The harness keeps real delays even when the games' animations are skipped
+real_sleep = asyncio.sleep
+
+
+def install_mongomock():
+    """Swap pymongo's client for mongomock before Cogs.utils.mongo creates it"""
+    import mongomock
+    import pymongo
+
+    pymongo.MongoClient = mongomock.MongoClient
+    os.environ["MONGO"] = "mongodb://mongomock"
+
+    # mongomock doesn't emit command monitoring events, count operations here instead
+    from Cogs.utils.metrics import metrics, current_command
+
+    def counted(name, method):
+        def wrapper(self, *args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                metrics.record_db(current_command.get(), name, time.perf_counter() - started, 0)
+        return wrapper
+
+    for name in ("find", "find_one", "count_documents", "insert_one", "insert_many",
+                 "update_one", "update_many", "replace_one", "delete_one", "delete_many",
+                 "find_one_and_update", "bulk_write", "aggregate"):
+        setattr(mongomock.Collection, name, counted(name, getattr(mongomock.Collection, name)))
+
+
+# ---------------------------------------------------------------------------
+# Fake Discord objects. Only what the cogs under test actually touch.
+# ---------------------------------------------------------------------------
+
+_message_ids = itertools.count(1)
+
+
+class FakeAsset:
+    url = "https://cdn.discordapp.com/embed/avatars/0.png"
+
+
+class FakeUser:
+    def __init__(self, user_id, name):
+        self.id = user_id
+        self.name = name
+        self.display_name = name
+        self.global_name = name
+        self.mention = f"<@{user_id}>"
+        self.bot = False
+        self.avatar = FakeAsset()
+        self.display_avatar = self.avatar
+
+    async def send(self, content=None, **kwargs):
+        return FakeMessage(None, self, content, **kwargs)
+
+
+class FakeGuild:
+    def __init__(self, guild_id, name):
+        self.id = guild_id
+        self.name = name
+        self.icon = FakeAsset()
+
+
+class FakeChannel:
+    def __init__(self, channel_id, guild):
+        self.id = channel_id
+        self.guild = guild
+        self.name = f"loadtest-{channel_id}"
+        self.messages = []
+
+    async def send(self, content=None, author=None, **kwargs):
+        message = FakeMessage(self, author, content, **kwargs)
+        self.messages.append(message)
+        del self.messages[:-10]
+        return message
+
+    def find_view(self, view_type=None):
+        """Latest message whose view is still attached, optionally of one class"""
+        for message in reversed(self.messages):
+            view = message.view
+            if view is not None and (view_type is None or type(view).__name__ == view_type):
+                return message, view
+        return None, None
+
+
+class FakeMessage:
+    def __init__(self, channel, author, content=None, embed=None, embeds=None, view=None, **kwargs):
+        self.id = next(_message_ids)
+        self.channel = channel
+        self.guild = channel.guild if channel else None
+        self.author = author
+        self.content = content
+        self.embeds = [embed] if embed else list(embeds or [])
+        self.view = view
+        self.attachments = []
+        self.reactions = []
+
+    async def edit(self, content=None, embed=None, embeds=None, view=..., **kwargs):
+        if content is not None:
+            self.content = content
+        if embed is not None:
+            self.embeds = [embed]
+        elif embeds is not None:
+            self.embeds = list(embeds)
+        if view is not ...:
+            self.view = view
+        return self
+
+    async def delete(self, delay=None):
+        if self.channel and self in self.channel.messages:
+            self.channel.messages.remove(self)
+
+    async def add_reaction(self, emoji):
+        self.reactions.append(emoji)
+
+    async def clear_reactions(self):
+        self.reactions.clear()
+
+    async def reply(self, content=None, **kwargs):
+        return await self.channel.send(content, **kwargs)
+
+
+class FakeContext:
+    def __init__(self, bot, command, author, guild, channel, content):
+        self.bot = bot
+        self.command = command
+        self.invoked_with = command.name
+        self.prefix = "!"
+        self.author = author
+        self.guild = guild
+        self.channel = channel
+        self.message = FakeMessage(channel, author, content)
+
+    async def send(self, content=None, **kwargs):
+        kwargs.pop("delete_after", None)
+        return await self.channel.send(content, author=self.bot.user, **kwargs)
+
+    async def reply(self, content=None, **kwargs):
+        kwargs.pop("mention_author", None)
+        return await self.send(content, **kwargs)
+
+
+class FakeResponse:
+    def __init__(self, interaction):
+        self._interaction = interaction
+        self._done = False
+
+    def is_done(self):
+        return self._done
+
+    async def defer(self, **kwargs):
+        self._done = True
+
+    async def send_message(self, content=None, **kwargs):
+        self._done = True
+
+    async def edit_message(self, **kwargs):
+        self._done = True
+        await self._interaction.message.edit(**kwargs)
+
+
+class FakeFollowup:
+    def __init__(self, interaction):
+        self._interaction = interaction
+
+    async def send(self, content=None, ephemeral=False, **kwargs):
+        kwargs.pop("delete_after", None)
+        return await self._interaction.channel.send(content, **kwargs)
+
+    async def edit_message(self, message_id, **kwargs):
+        return await self._interaction.message.edit(**kwargs)
+
+
+class FakeInteraction:
+    def __init__(self, user, message):
+        self.user = user
+        self.message = message
+        self.channel = message.channel
+        self.guild = message.guild
+        self.response = FakeResponse(self)
+        self.followup = FakeFollowup(self)
+
+    async def original_response(self):
+        return self.message
+
+    async def edit_original_response(self, **kwargs):
+        return await self.message.edit(**kwargs)
+
+
+class FakeReaction:
+    def __init__(self, message, emoji):
+        self.message = message
+        self.emoji = emoji
+
+
+async def press(player, view_type, custom_id=None, item_type=None):
+    """Click a button on the player's latest view. Returns False if there was nothing to click."""
+    message, view = player.channel.find_view(view_type)
+    if view is None:
+        return False
+    for item in view.children:
+        if getattr(item, "disabled", False):
+            continue
+        if custom_id is not None and getattr(item, "custom_id", None) != custom_id:
+            continue
+        if item_type is not None and type(item).__name__ != item_type:
+            continue
+        await item.callback(FakeInteraction(player.user, message))
+        return True
+    return False
+
+
+# ---------------------------------------------------------------------------
+# Scenarios. Each one is a complete bet from the player's point of view.
+# ---------------------------------------------------------------------------
+
+class Player:
+    def __init__(self, bot, index, guild):
+        self.bot = bot
+        self.user = FakeUser(FIRST_PLAYER_ID + index, f"player{index}")
+        self.guild = guild
+        self.channel = FakeChannel(FIRST_PLAYER_ID + index, guild)
+
+    async def run(self, command_name, *args):
+        """Invoke the command callback directly; arguments must already be converted"""
+        from Cogs.utils.game_sessions import sessions
+        command = self.bot.get_command(command_name)
+        ctx = FakeContext(self.bot, command, self.user, self.guild, self.channel, f"!{command_name} {' '.join(map(str, args))}")
+        try:
+            await command(ctx, *args)
+        finally:
+            # What main.py's after_invoke hook does; calling the command directly skips hooks
+            sessions.drop_reservations(asyncio.current_task())
+
+
+async def coinflip(player):
+    await player.run("coinflip", BET, random.choice(["heads", "tails"]))
+
+
+async def limbo(player):
+    await player.run("limbo", BET, "2")
+
+
+async def mines(player):
+    await player.run("mines", BET, 3)
+    if await press(player, "MinesTileView", item_type="MineButton"):
+        message, view = player.channel.find_view("MinesTileView")
+        if view is not None and not view.game_over and not view.cashed_out:
+            cog = player.bot.get_cog("MinesCog")
+            await cog.on_reaction_add(FakeReaction(message, "💰"), player.user)
+
+
+async def plinko(player):
+    await player.run("plinko", BET, "low", "8")
+    await press(player, "PlinkoView", custom_id="drop_ball")
+    message, view = player.channel.find_view("PlinkoView")
+    if view is not None:
+        await view.stop_callback(FakeInteraction(player.user, message))
+
+
+async def blackjack(player):
+    await player.run("blackjack", BET)
+    await press(player, "BlackjackView", custom_id="stand")
+
+
+async def deposit_check(player):
+    await player.run("deposit_btc", "btc")
+    # The button has a per-user cooldown; the load test plays a patient user
+    player.bot.get_cog("BtcDeposit").button_cooldowns.pop(f"{player.user.id}_check_deposit", None)
+    await press(player, "DepositView", custom_id="check_deposit_button")
+
+
+SCENARIOS = {
+    "coinflip": (coinflip, "Cogs.games.coinflip"),
+    "limbo": (limbo, "Cogs.games.limbo"),
+    "mines": (mines, "Cogs.games.mines"),
+    "plinko": (plinko, "Cogs.games.plinko"),
+    "blackjack": (blackjack, "Cogs.games.blackjack"),
+    "deposit_check": (deposit_check, "Cogs.btc_deposit"),
+}
+
+
+# ---------------------------------------------------------------------------
+# Harness
+# ---------------------------------------------------------------------------
+
+async def start_fake_mempool():
+    """Local stand-in for mempool.space with no payments in it"""
+    from stub_explorer import StubExplorer
+
+    explorer = StubExplorer()
+    await explorer.start()
+    return explorer, explorer.url
+
+
+def seed_database(players):
+    from Cogs.utils.mongo import mongodb
+
+    db = mongodb["BetSync"]
+    ids = [FIRST_PLAYER_ID + i for i in range(players)]
+    db["users"].delete_many({"discord_id": {"$in": ids}})
+    db["users"].insert_many([
+        {
+            "discord_id": user_id,
+            "name": f"player{user_id - FIRST_PLAYER_ID}",
+            "points": STARTING_POINTS,
+            "primary_coin": "BTC",
+            "wallet": {"BTC": 0, "SOL": 0, "ETH": 0, "LTC": 0, "USDT": 0},
+            "btc_address": DEPOSIT_ADDRESS.format(user_id - FIRST_PLAYER_ID),
+            "btc_address_index": user_id - FIRST_PLAYER_ID,
+            "history": [],
+            "total_deposit_amount": 0,
+            "total_withdraw_amount": 0,
+            "total_spent": 0,
+            "total_earned": 0,
+            "total_played": 0,
+        }
+        for user_id in ids
+    ])
+    db["servers"].update_one(
+        {"server_id": GUILD_ID},
+        {"$setOnInsert": {
+            "server_id": GUILD_ID,
+            "server_name": "loadtest",
+            "wallet": {"BTC": 0, "LTC": 0, "ETH": 0, "SOL": 0, "USDT": 0},
+            "giveaway_channel": None,
+            "server_admins": [],
+            "server_bet_history": [],
+        }},
+        upsert=True
+    )
+    return ids
+
+
+def clean_database(ids):
+    from Cogs.utils.mongo import mongodb
+
+    db = mongodb["BetSync"]
+    db["users"].delete_many({"discord_id": {"$in": ids}})
+    db["fair_seeds"].delete_many({"discord_id": {"$in": ids}})
+    db["servers"].delete_one({"server_id": GUILD_ID})
+
+
+def percentile(samples, q):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def sample_rss(process, peak, stop):
+    while not stop.is_set():
+        peak[0] = max(peak[0], process.memory_info().rss)
+        await real_sleep(0.05)
+
+
+async def run_scenario(bot, name, flow, players, rounds):
+    import psutil
+    from Cogs.utils.metrics import metrics, current_command
+
+    guild = FakeGuild(GUILD_ID, "loadtest")
+    roster = [Player(bot, i, guild) for i in range(players)]
+    latencies = []
+    errors = []
+    ops_before = metrics.db_ops.get(name, 0)
+
+    async def play(player):
+        current_command.set(name)
+        for _ in range(rounds):
+            started = time.perf_counter()
+            try:
+                await flow(player)
+            except Exception as e:
+                errors.append(f"{type(e).__name__}: {e}")
+            latencies.append(time.perf_counter() - started)
+
+    process = psutil.Process()
+    peak = [process.memory_info().rss]
+    stop = asyncio.Event()
+    sampler = asyncio.create_task(sample_rss(process, peak, stop))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(play(player) for player in roster))
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await sampler
+
+    bets = len(latencies)
+    return {
+        "bets": bets,
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+        "seconds": round(elapsed, 3),
+        "bets_per_sec": round(bets / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 0.5) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+        "db_ops_per_bet": round((metrics.db_ops.get(name, 0) - ops_before) / bets, 2) if bets else 0.0,
+        "peak_rss_mb": round(peak[0] / 1024 / 1024, 1),
+    }
+
+
+async def main(args):
+    if args.mongo:
+        os.environ["MONGO"] = args.mongo
+    else:
+        install_mongomock()
+
+    import discord
+    from discord.ext import commands
+
+    if not args.keep_sleeps:
+        # Animation delays would only measure asyncio.sleep; still yield so scheduling stays realistic
+        async def no_sleep(delay, result=None):
+            return await real_sleep(0, result)
+        asyncio.sleep = no_sleep
+
+    bot = commands.Bot(command_prefix="!", intents=discord.Intents.default(), help_command=None)
+    bot._connection.user = FakeUser(BOT_USER_ID, "BetSync")
+
+    selected = args.scenario or list(SCENARIOS)
+    for name in selected:
+        bot.load_extension(SCENARIOS[name][1])
+    bot.load_extension("Cogs.fairness")
+
+    mempool_runner = None
+    if "deposit_check" in selected:
+        import Cogs.btc_deposit
+        mempool_runner, Cogs.btc_deposit.MEMPOOL_API_URL = await start_fake_mempool()
+
+    ids = await asyncio.to_thread(seed_database, args.players)
+
+    results = {}
+    try:
+        for name in selected:
+            print(f"Running {name}: {args.players} players x {args.rounds} rounds", file=sys.stderr)
+            log = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+            with log:
+                results[name] = await run_scenario(bot, name, SCENARIOS[name][0], args.players, args.rounds)
+    finally:
+        asyncio.sleep = real_sleep
+        if mempool_runner:
+            from Cogs.utils.http_client import http_client
+            await http_client.close()
+            await mempool_runner.stop()
+        await asyncio.to_thread(clean_database, ids)
+
+    return results
+
+
+def print_report(results, baseline=None):
+    from colorama import Fore
+
+    header = f"{'scenario':<15}{'bets':>7}{'err':>5}{'bets/s':>9}{'p50ms':>8}{'p99ms':>8}{'db/bet':>8}{'rssMB':>8}"
+    print(header)
+    print("-" * len(header))
+    for name, r in results.items():
+        print(
+            f"{name:<15}{r['bets']:>7}{r['errors']:>5}{r['bets_per_sec']:>9.1f}"
+            f"{r['p50_ms']:>8.1f}{r['p99_ms']:>8.1f}{r['db_ops_per_bet']:>8.2f}{r['peak_rss_mb']:>8.1f}"
+        )
+        if r["first_error"]:
+            print(f"  {Fore.RED}first error: {r['first_error']}{Fore.RESET}")
+        if baseline and name in baseline:
+            b = baseline[name]
+            print(
+                f"  {Fore.LIGHTBLACK_EX}baseline: {b['bets_per_sec']:.1f} bets/s, "
+                f"p99 {b['p99_ms']:.1f} ms, {b['db_ops_per_bet']:.2f} db/bet{Fore.RESET}"
+            )
+
+
+def regressions(results, baseline, tolerance):
+    """Human readable list of metrics that got worse than baseline by more than tolerance"""
+    found = []
+    for name, r in results.items():
+        b = baseline.get(name)
+        if not b:
+            continue
+        if r["bets_per_sec"] < b["bets_per_sec"] * (1 - tolerance):
+            found.append(f"{name}: throughput {b['bets_per_sec']} -> {r['bets_per_sec']} bets/s")
+        if r["p99_ms"] > b["p99_ms"] * (1 + tolerance):
+            found.append(f"{name}: p99 {b['p99_ms']} -> {r['p99_ms']} ms")
+        if r["db_ops_per_bet"] > b["db_ops_per_bet"] + 0.5:
+            found.append(f"{name}: db ops/bet {b['db_ops_per_bet']} -> {r['db_ops_per_bet']}")
+        if r["errors"] > b["errors"]:
+            found.append(f"{name}: errors {b['errors']} -> {r['errors']}")
+    return found
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Offline load test for BetSync cogs")
+    parser.add_argument("--players", type=int, default=1000, help="concurrent players per scenario")
+    parser.add_argument("--rounds", type=int, default=3, help="bets per player per scenario")
+    parser.add_argument("--scenario", action="append", choices=list(SCENARIOS), help="repeatable; default is all")
+    parser.add_argument("--mongo", help="URI of a throwaway mongod; mongomock is used when omitted")
+    parser.add_argument("--keep-sleeps", action="store_true", help="keep the games' animation delays")
+    parser.add_argument("--save", help="write results to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON to compare against; exits 1 on regression")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression (default 0.2)")
+    parser.add_argument("--seed", type=int, default=1234, help="random seed for player choices")
+    parser.add_argument("--verbose", action="store_true", help="keep the cogs' console output")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    random.seed(args.seed)
+    results = asyncio.run(main(args))
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+
+    print_report(results, baseline)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({"players": args.players, "rounds": args.rounds, "mongo": "mongod" if args.mongo else "mongomock", "results": results}, f, indent=2)
+
+    if baseline:
+        found = regressions(results, baseline, args.tolerance)
+        for line in found:
+            print(f"REGRESSION {line}")
+        sys.exit(1 if found else 0)
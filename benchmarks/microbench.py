@@ -0,0 +1,425 @@
+"""
+Micro-benchmarks for hot helpers and image renderers.
+
+Every benchmark runs against fixed, seeded inputs so two runs of the same
+tree are comparable. For each one the script records wall time per call
+(min / median / mean over --repeat calls) and, in a separate pass under
+tracemalloc so the tracing overhead doesn't skew the timings, the peak and
+retained bytes allocated by one call.
+
+    python benchmarks/microbench.py --save baseline.json
+    python benchmarks/microbench.py --compare baseline.json
+    python benchmarks/microbench.py --filter render
+
+--compare exits 1 when a benchmark's median time or peak allocation grew by
+more than --tolerance. Database-backed helpers run against mongomock unless
+--mongo points at a throwaway local mongod. Run it from the repository root.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import inspect
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+from loadtest import install_mongomock, FakeUser, FakeGuild, FIRST_PLAYER_ID
+
+BENCH_USER_ID = FIRST_PLAYER_ID + 999_999
+HELPER_REPEAT = 2000
+RENDER_REPEAT = 20
+ALLOC_RUNS = 5
+
+# name -> (async setup returning a zero-argument callable, default repeat)
+BENCHMARKS = {}
+
+
+def benchmark(name, repeat=HELPER_REPEAT):
+    def decorator(setup):
+        BENCHMARKS[name] = (setup, repeat)
+        return setup
+    return decorator
+
+
+def bench_ctx():
+    return SimpleNamespace(
+        author=FakeUser(BENCH_USER_ID, "bench"),
+        guild=FakeGuild(FIRST_PLAYER_ID, "bench"),
+        bot=SimpleNamespace(user=FakeUser(FIRST_PLAYER_ID - 1, "BetSync")),
+    )
+
+
+def seed_user():
+    from Cogs.utils.mongo import Users
+
+    Users().collection.replace_one(
+        {"discord_id": BENCH_USER_ID},
+        {
+            "discord_id": BENCH_USER_ID,
+            "name": "bench",
+            "points": 10 ** 12,
+            "primary_coin": "BTC",
+            "wallet": {"BTC": 0, "SOL": 0, "ETH": 0, "LTC": 0, "USDT": 0},
+            "history": [],
+            "xp": 0,
+            "level": 1,
+            "rank": 0,
+        },
+        upsert=True
+    )
+
+
+def mixed_history(count=100):
+    """History entries with every timestamp shape _get_filtered_history has to parse"""
+    types = ["win", "loss", "push", "draw", "deposit", "withdraw", "btc_deposit"]
+    start = 1_700_000_000
+    entries = []
+    for i in range(count):
+        ts = start + i * 3600
+        shape = i % 4
+        if shape == 0:
+            timestamp = ts
+        elif shape == 1:
+            timestamp = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(ts)) + "Z"
+        elif shape == 2:
+            timestamp = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(ts)) + ".123456+00:00"
+        else:
+            timestamp = str(ts)
+        entries.append({"type": types[i % len(types)], "amount": 10, "timestamp": timestamp})
+    random.shuffle(entries)
+    return entries
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+@benchmark("process_bet_amount", repeat=500)
+async def bench_process_bet_amount():
+    from Cogs.utils.currency_helper import process_bet_amount
+
+    seed_user()
+    ctx = bench_ctx()
+    return lambda: process_bet_amount(ctx, "10")
+
+
+@benchmark("Users.save", repeat=500)
+async def bench_users_save():
+    from Cogs.utils import mongo
+
+    seed_user()
+    users = mongo.Users()
+
+    def call():
+        # save() skips users this process synced within the last second; measure the database path
+        mongo._last_save_times.clear()
+        return users.save(BENCH_USER_ID)
+    return call
+
+
+@benchmark("PlinkoGame.simulate_ball_path")
+async def bench_simulate_ball_path():
+    from Cogs.games.plinko import PlinkoGame
+
+    game = PlinkoGame(None, bench_ctx(), 10, "high", 16, BENCH_USER_ID)
+    return game.simulate_ball_path
+
+
+@benchmark("SlotsCog.calculate_winnings")
+async def bench_calculate_winnings():
+    from Cogs.games.slots import SlotsCog
+
+    cog = SlotsCog(None)
+    symbols = cog.generate_slot_result()
+    return lambda: cog.calculate_winnings(symbols, 10)
+
+
+@benchmark("HiLoView.calculate_probability")
+async def bench_calculate_probability():
+    from Cogs.games.hilo import HiLo, HiLoView
+
+    deck = HiLo(None).create_deck()
+    current_card = deck.pop()
+    view = HiLoView(None, bench_ctx(), 10, deck, current_card)
+    return lambda: view.calculate_probability("high")
+
+
+@benchmark("HistoryView._get_filtered_history")
+async def bench_filtered_history():
+    from Cogs.history import HistoryView
+
+    ctx = bench_ctx()
+    view = HistoryView(None, ctx.author, mixed_history(), BENCH_USER_ID)
+    return lambda: view._get_filtered_history(full=True)
+
+
+# ---------------------------------------------------------------------------
+# Renderers
+# ---------------------------------------------------------------------------
+
+@benchmark("render.plinko_board", repeat=RENDER_REPEAT)
+async def bench_plinko_board():
+    from Cogs.games.plinko import PlinkoGame
+
+    game = PlinkoGame(None, bench_ctx(), 10, "high", 16, BENCH_USER_ID)
+    path, position = game.simulate_ball_path()
+    game.ball_paths = [path]
+    game.ball_results = [position]
+    return game.generate_board_image
+
+
+@benchmark("render.keno_paytable", repeat=RENDER_REPEAT)
+async def bench_keno_paytable():
+    from Cogs.games.keno import generate_paytable_image
+
+    return generate_paytable_image
+
+
+@benchmark("render.keno_board", repeat=RENDER_REPEAT)
+async def bench_keno_board():
+    from Cogs.games.keno import Keno
+
+    cog = Keno(None)
+    selected = random.sample(range(1, 41), 10)
+    winning = random.sample(range(1, 41), 10)
+    return lambda: cog.generate_keno_image(selected, winning, True)
+
+
+@benchmark("render.limbo_multiplier", repeat=RENDER_REPEAT)
+async def bench_limbo_multiplier():
+    from Cogs.games.limbo import LimboGame
+
+    game = LimboGame(None, bench_ctx(), 10, 2.0, BENCH_USER_ID, rolls=1)
+    return lambda: game.generate_multiplier_image(3.27, True)
+
+
+@benchmark("render.carddraw_table", repeat=RENDER_REPEAT)
+async def bench_carddraw_table():
+    from Cogs.games.carddraw import CardDraw
+
+    cog = CardDraw(None)
+    player1, player2 = FakeUser(1, "player one"), FakeUser(2, "player two")
+    return lambda: cog.generate_game_image(player1, player2, ("K", "hearts"), ("7", "spades"))
+
+
+@benchmark("render.blackjack_table", repeat=RENDER_REPEAT)
+async def bench_blackjack_table():
+    from Cogs.games.blackjack import Blackjack
+
+    cog = Blackjack(None)
+    player = [("A", "spades"), ("7", "hearts"), ("3", "clubs")]
+    dealer = [("K", "diamonds"), ("9", "spades")]
+    return lambda: cog.generate_game_image(player, dealer, True)
+
+
+@benchmark("render.cases_result", repeat=RENDER_REPEAT)
+async def bench_cases_result():
+    from Cogs.games.cases import CasesCog
+
+    cog = CasesCog(None)
+    multiplier = cog.multipliers[2]
+    return lambda: cog.generate_result_image(multiplier)
+
+
+@benchmark("render.cases_case", repeat=RENDER_REPEAT)
+async def bench_cases_case():
+    from Cogs.games.cases import CasesCog
+
+    cog = CasesCog(None)
+    # Drawn after the seed is set, so every run renders the same case
+    multiplier = cog.get_case_result()["multiplier"]
+    return lambda: cog.generate_case_image(multiplier)
+
+
+@benchmark("render.poker_hand", repeat=RENDER_REPEAT)
+async def bench_poker_hand():
+    from Cogs.games.poker import Poker
+
+    cog = Poker(None)
+    cards = [("10", "hearts"), ("J", "hearts"), ("Q", "hearts"), ("K", "hearts"), ("A", "hearts")]
+    return lambda: cog.generate_game_image(cards, [True, False, True, False, True], is_final=True, win_type="Royal Flush")
+
+
+@benchmark("render.hilo_table", repeat=RENDER_REPEAT)
+async def bench_hilo_table():
+    from Cogs.games.hilo import HiLo
+
+    cog = HiLo(None)
+    previous = [(3, "clubs"), (9, "diamonds")]
+    return lambda: cog.create_game_image((7, "hearts"), previous, 4.1, 5.3, 12.5, current_winnings=12.5)
+
+
+@benchmark("render.btc_deposit_card", repeat=RENDER_REPEAT)
+async def bench_btc_deposit_card():
+    from Cogs.btc_deposit import generate_qr_code
+
+    return lambda: generate_qr_code("bc1qar0srrr7xfkvy5l643lydnw9re59gtzzwf5mdq", "bench")
+
+
+@benchmark("render.ltc_deposit_card", repeat=RENDER_REPEAT)
+async def bench_ltc_deposit_card():
+    from Cogs.ltc_deposit import generate_qr_code
+
+    return lambda: generate_qr_code("ltc1qg82vxq5rg3dnsscxx5r4s0lnvhvx8ke0fqeyxl", "bench")
+
+
+@benchmark("render.eth_deposit_card", repeat=RENDER_REPEAT)
+async def bench_eth_deposit_card():
+    from Cogs.eth_usdt_deposit import generate_qr_code
+
+    return lambda: generate_qr_code("0x52908400098527886E0F7030069857D2E4169EE7", "bench", "eth")
+
+
+@benchmark("render.sol_deposit_card", repeat=RENDER_REPEAT)
+async def bench_sol_deposit_card():
+    from Cogs.sol_deposit import generate_qr_code
+
+    return lambda: generate_qr_code("7EcDhSYGxXyscszYEp35KHN8vvw3svAuLKTzXwCFLtV", "bench")
+
+
+# ---------------------------------------------------------------------------
+# Runner
+# ---------------------------------------------------------------------------
+
+async def call(fn):
+    result = fn()
+    if inspect.isawaitable(result):
+        result = await result
+    return result
+
+
+async def measure(setup, repeat, seed):
+    random.seed(seed)
+    fn = await setup()
+    await call(fn)  # warm caches, fonts and lazy imports
+
+    random.seed(seed)
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter_ns()
+        await call(fn)
+        samples.append(time.perf_counter_ns() - started)
+
+    peaks, retained = [], []
+    tracemalloc.start()
+    try:
+        for _ in range(min(ALLOC_RUNS, repeat)):
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            result = await call(fn)
+            current, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before)
+            retained.append(current - before)
+            del result
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "repeat": repeat,
+        "min_us": round(min(samples) / 1000, 2),
+        "median_us": round(statistics.median(samples) / 1000, 2),
+        "mean_us": round(statistics.fmean(samples) / 1000, 2),
+        "peak_alloc_kb": round(statistics.median(peaks) / 1024, 1),
+        "retained_kb": round(statistics.median(retained) / 1024, 1),
+    }
+
+
+async def main(args):
+    if args.mongo:
+        os.environ["MONGO"] = args.mongo
+    else:
+        install_mongomock()
+
+    results = {}
+    for name, (setup, repeat) in BENCHMARKS.items():
+        if args.filter and args.filter not in name:
+            continue
+        print(f"Running {name}", file=sys.stderr)
+        log = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+        try:
+            with log:
+                results[name] = await measure(setup, args.repeat or repeat, args.seed)
+        except Exception as e:
+            results[name] = {"error": f"{type(e).__name__}: {e}"}
+    return results
+
+
+def print_report(results, baseline=None):
+    header = f"{'benchmark':<36}{'median us':>11}{'min us':>11}{'peak kB':>10}{'kept kB':>9}{'vs base':>9}"
+    print(header)
+    print("-" * len(header))
+    for name, r in results.items():
+        if "error" in r:
+            print(f"{name:<36}  {r['error']}")
+            continue
+        ratio = ""
+        if baseline and "median_us" in baseline.get(name, {}):
+            ratio = f"{r['median_us'] / baseline[name]['median_us']:.2f}x"
+        print(
+            f"{name:<36}{r['median_us']:>11.1f}{r['min_us']:>11.1f}"
+            f"{r['peak_alloc_kb']:>10.1f}{r['retained_kb']:>9.1f}{ratio:>9}"
+        )
+
+
+def regressions(results, baseline, tolerance):
+    found = []
+    for name, r in results.items():
+        b = baseline.get(name)
+        if not b or "error" in b:
+            continue
+        if "error" in r:
+            found.append(f"{name}: {r['error']}")
+            continue
+        if r["median_us"] > b["median_us"] * (1 + tolerance):
+            found.append(f"{name}: median {b['median_us']} -> {r['median_us']} us")
+        if r["peak_alloc_kb"] > b["peak_alloc_kb"] * (1 + tolerance) + 1:
+            found.append(f"{name}: peak allocation {b['peak_alloc_kb']} -> {r['peak_alloc_kb']} kB")
+    return found
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for BetSync helpers and renderers")
+    parser.add_argument("--filter", help="only run benchmarks whose name contains this")
+    parser.add_argument("--repeat", type=int, help="calls per benchmark (default depends on the benchmark)")
+    parser.add_argument("--mongo", help="URI of a throwaway mongod; mongomock is used when omitted")
+    parser.add_argument("--save", help="write results to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON to compare against; exits 1 on regression")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative regression (default 0.25)")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--verbose", action="store_true", help="keep the benchmarked code's console output")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    results = asyncio.run(main(args))
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+
+    print_report(results, baseline)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "mongo": "mongod" if args.mongo else "mongomock",
+                "results": results,
+            }, f, indent=2)
+
+    if baseline:
+        found = regressions(results, baseline, args.tolerance)
+        for line in found:
+            print(f"REGRESSION {line}")
+        sys.exit(1 if found else 0)
@@ -0,0 +1,277 @@
+"""
+Local block explorer for offline deposit testing.
+
+Serves the part of the Esplora API (mempool.space, litecoinspace.org) that
+the BTC and LTC deposit cogs use, backed by an in-memory chain that the
+test drives: `pay()` puts a transaction in the mempool, `mine()` confirms
+everything pending and moves the tip. Every request is counted per route so
+a run can show how many explorer calls a flow costs.
+
+Run on its own it checks the deposit watcher end to end against mongomock:
+a payment is reported as pending, credited exactly once after enough
+blocks, a button press afterwards is answered from the watcher cache, and
+repeated checks reuse the cached tip height. StubEtherscan does the same
+for the account endpoints the ETH/USDT cog uses, and the ETH check makes
+sure only successful incoming transfers are credited: an outgoing and a
+reverted transaction to the same address must be ignored.
+
+    python benchmarks/stub_explorer.py
+
+Run it from the repository root.
+"""
+
+import asyncio
+import collections
+import itertools
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+class StubExplorer:
+    def __init__(self, tip_height=850_000):
+        self.tip_height = tip_height
+        self.txs = collections.defaultdict(list)  # address -> [tx]
+        self.requests = collections.Counter()     # route -> count
+        self._txids = itertools.count(1)
+        self._runner = None
+        self.url = None
+
+    def pay(self, address, satoshis):
+        """Add an unconfirmed payment to address, returns its txid"""
+        txid = f"{next(self._txids):064x}"
+        self.txs[address].insert(0, {
+            "txid": txid,
+            "status": {"confirmed": False},
+            "vout": [{"scriptpubkey_address": address, "value": satoshis}],
+        })
+        return txid
+
+    def mine(self, blocks=1):
+        """Confirm every pending transaction in the next block and advance the tip"""
+        for txs in self.txs.values():
+            for tx in txs:
+                if not tx["status"]["confirmed"]:
+                    tx["status"] = {"confirmed": True, "block_height": self.tip_height + 1}
+        self.tip_height += blocks
+
+    async def start(self):
+        from aiohttp import web
+
+        async def address_txs(request):
+            self.requests["address_txs"] += 1
+            return web.json_response(self.txs.get(request.match_info["address"], []))
+
+        async def tip_height(request):
+            self.requests["tip_height"] += 1
+            return web.Response(text=str(self.tip_height))
+
+        app = web.Application()
+        app.router.add_get("/api/address/{address}/txs", address_txs)
+        app.router.add_get("/api/blocks/tip/height", tip_height)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}/api"
+        return self.url
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+
+
+class StubEtherscan:
+    """The txlist/tokentx part of the Etherscan account API"""
+
+    def __init__(self):
+        self.txs = collections.defaultdict(list)  # action -> [tx]
+        self.requests = collections.Counter()     # action -> count
+        self._hashes = itertools.count(1)
+        self._runner = None
+        self.url = None
+
+    def add(self, action, block, sender, recipient, value, **fields):
+        """Record a transaction in the given list, returns its hash"""
+        tx_hash = f"0x{next(self._hashes):064x}"
+        tx = {"hash": tx_hash, "blockNumber": str(block), "from": sender, "to": recipient, "value": str(value)}
+        tx.update(fields)
+        self.txs[action].insert(0, tx)
+        return tx_hash
+
+    async def start(self):
+        from aiohttp import web
+
+        async def account(request):
+            action = request.query.get("action")
+            self.requests[action] += 1
+            txs = self.txs.get(action, [])
+            if not txs:
+                return web.json_response({"status": "0", "message": "No transactions found", "result": []})
+            return web.json_response({"status": "1", "message": "OK", "result": txs})
+
+        app = web.Application()
+        app.router.add_get("/api", account)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}/api"
+        return self.url
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+
+
+def _expect(failures):
+    def expect(label, actual, expected):
+        ok = actual == expected
+        print(f"{'ok  ' if ok else 'FAIL'} {label}: {actual!r}")
+        if not ok:
+            failures.append(label)
+    return expect
+
+
+async def self_check():
+    from loadtest import install_mongomock, FakeUser, BOT_USER_ID, FIRST_PLAYER_ID
+
+    install_mongomock()
+    import discord
+    from discord.ext import commands
+    import Cogs.btc_deposit as btc_deposit
+    from Cogs.utils.mongo import mongodb
+    from Cogs.utils.http_client import http_client
+
+    explorer = StubExplorer()
+    btc_deposit.MEMPOOL_API_URL = await explorer.start()
+
+    async def fixed_price(crypto_id):
+        return 60_000.0
+    btc_deposit.get_crypto_price = fixed_price  # keep CoinGecko out of an offline run
+
+    bot = commands.Bot(command_prefix="!", intents=discord.Intents.default(), help_command=None)
+    bot._connection.user = FakeUser(BOT_USER_ID, "BetSync")
+    bot.load_extension("Cogs.btc_deposit")
+    cog = bot.get_cog("BtcDeposit")
+    cog.watcher.stop()  # polled by hand below
+
+    user_id = FIRST_PLAYER_ID
+    address = "bc1qstubexplorer000000000000000000000000000"
+    users = mongodb["BetSync"]["users"]
+    users.delete_one({"discord_id": user_id})
+    users.insert_one({
+        "discord_id": user_id, "name": "stub", "points": 0, "primary_coin": "BTC",
+        "wallet": {"BTC": 0, "SOL": 0, "ETH": 0, "LTC": 0, "USDT": 0},
+        "btc_address": address, "btc_address_index": 0, "history": [],
+    })
+
+    failures = []
+    expect = _expect(failures)
+
+    try:
+        cog.watcher.watch(user_id, address)
+        explorer.pay(address, 50_000)
+
+        await cog.watcher.poll()
+        expect("unconfirmed payment", (await cog.watcher.status(user_id, address))[0], "pending")
+
+        explorer.mine(btc_deposit.REQUIRED_CONFIRMATIONS)
+        await cog.tip_height.refresh()
+        await cog.watcher.poll()
+        expect("credited after confirmations", users.find_one({"discord_id": user_id})["wallet"]["BTC"], 0.0005)
+
+        calls_before = sum(explorer.requests.values())
+        expect("button press served from cache", (await cog.watcher.status(user_id, address))[0], "success")
+        expect("explorer calls for the press", sum(explorer.requests.values()) - calls_before, 0)
+
+        tip_before = explorer.requests["tip_height"]
+        for _ in range(3):
+            await cog.watcher.poll()
+        expect("credited once", users.find_one({"discord_id": user_id})["wallet"]["BTC"], 0.0005)
+        expect("tip height served from cache", explorer.requests["tip_height"] - tip_before, 0)
+
+        print(f"explorer requests: {dict(explorer.requests)}")
+    finally:
+        users.delete_one({"discord_id": user_id})
+        await explorer.stop()
+
+    return 1 if failures else 0
+
+
+async def eth_self_check():
+    from loadtest import install_mongomock, FakeUser, BOT_USER_ID, FIRST_PLAYER_ID
+
+    install_mongomock()
+    import discord
+    from discord.ext import commands
+    import Cogs.eth_usdt_deposit as eth_deposit
+    from Cogs.utils.mongo import mongodb
+
+    etherscan = StubEtherscan()
+    eth_deposit.ETHERSCAN_API_URL = await etherscan.start()
+
+    bot = commands.Bot(command_prefix="!", intents=discord.Intents.default(), help_command=None)
+    bot._connection.user = FakeUser(BOT_USER_ID, "BetSync")
+    bot.load_extension("Cogs.eth_usdt_deposit")
+    cog = bot.get_cog("EthUsdtDeposit")
+    for watcher in cog.watchers.values():
+        watcher.stop()
+
+    tip = 20_000_000
+    async def fixed_tip():
+        return tip
+    cog.tip_height.get = fixed_tip
+
+    user_id = FIRST_PLAYER_ID + 1
+    address = "0x52908400098527886E0F7030069857D2E4169EE7"
+    other = "0x000000000000000000000000000000000000dEaD"
+    users = mongodb["BetSync"]["users"]
+    users.delete_one({"discord_id": user_id})
+    users.insert_one({
+        "discord_id": user_id, "name": "stub", "points": 0, "primary_coin": "ETH",
+        "wallet": {"BTC": 0, "SOL": 0, "ETH": 0, "LTC": 0, "USDT": 0},
+        "eth_address": address, "history": [],
+    })
+
+    failures = []
+    expect = _expect(failures)
+    confirmed = tip - eth_deposit.REQUIRED_CONFIRMATIONS
+
+    try:
+        # Etherscan lowercases addresses, the stored address is checksummed
+        incoming = etherscan.add("txlist", confirmed, other, address.lower(), 10**17, isError="0", txreceipt_status="1")
+        etherscan.add("txlist", confirmed, address.lower(), other, 10**18, isError="0", txreceipt_status="1")
+        etherscan.add("txlist", confirmed, other, address.lower(), 10**18, isError="1", txreceipt_status="0")
+        status, details = await cog._check_for_deposits(user_id, address, "eth")
+        expect("eth status", status, "success")
+        expect("eth deposits credited", [d["txid"] for d in details["deposits"]], [incoming])
+
+        contract = eth_deposit.USDT_CONTRACT_ADDRESS.lower()
+        incoming = etherscan.add("tokentx", confirmed, other, address.lower(), 25 * 10**6, contractAddress=contract)
+        etherscan.add("tokentx", confirmed, address.lower(), other, 500 * 10**6, contractAddress=contract)
+        status, details = await cog._check_for_deposits(user_id, address, "usdt")
+        expect("usdt status", status, "success")
+        expect("usdt deposits credited", [d["txid"] for d in details["deposits"]], [incoming])
+
+        print(f"etherscan requests: {dict(etherscan.requests)}")
+    finally:
+        users.delete_one({"discord_id": user_id})
+        await etherscan.stop()
+
+    return 1 if failures else 0
+
+
+async def main():
+    from Cogs.utils.http_client import http_client
+    try:
+        return await self_check() | await eth_self_check()
+    finally:
+        await http_client.close()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
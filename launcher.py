@@ -0,0 +1,152 @@
+"""
+Cluster launcher.
+
+Runs the bot as several worker processes on one host, each an
+AutoShardedBot that owns a slice of the shards, so gateway traffic, image
+rendering and database calls spread over every core instead of one.
+
+    python launcher.py
+
+Environment:
+    TOKEN          bot token (also used to ask Discord for the shard count)
+    SHARD_COUNT    total shards; defaults to Discord's recommendation
+    CLUSTERS       worker processes; defaults to the number of CPU cores
+    METRICS_PORT   first cluster's metrics port, the others count up from it
+
+Workers that crash are restarted with exponential backoff. State that has
+to be shared between workers lives in Mongo (game session claims, the
+blacklist, lottery draws, wallet sync rate limits).
+"""
+
+import os
+import signal
+import subprocess
+import sys
+import time
+import requests
+from colorama import Fore
+from dotenv import load_dotenv
+
+GATEWAY_URL = "https://discord.com/api/v10/gateway/bot"
+IDENTIFY_INTERVAL = 5  # seconds Discord wants between identifies per rate limit bucket
+MAX_BACKOFF = 60
+HEALTHY_AFTER = 300  # a worker that ran this long before dying restarts without backoff
+
+
+def gateway_info(token):
+    response = requests.get(GATEWAY_URL, headers={"Authorization": f"Bot {token}"}, timeout=10)
+    response.raise_for_status()
+    data = response.json()
+    return data["shards"], data.get("session_start_limit", {}).get("max_concurrency", 1)
+
+
+def plan_clusters(shard_count, clusters):
+    """Split shard ids into contiguous, evenly sized groups"""
+    clusters = max(1, min(clusters, shard_count))
+    size, extra = divmod(shard_count, clusters)
+    plan, start = [], 0
+    for cluster_id in range(clusters):
+        end = start + size + (1 if cluster_id < extra else 0)
+        plan.append(list(range(start, end)))
+        start = end
+    return plan
+
+
+class Cluster:
+    def __init__(self, cluster_id, shard_ids, shard_count, cluster_count, metrics_port):
+        self.cluster_id = cluster_id
+        self.shard_ids = shard_ids
+        self.env = dict(
+            os.environ,
+            SHARD_COUNT=str(shard_count),
+            SHARD_IDS=",".join(map(str, shard_ids)),
+            CLUSTER_ID=str(cluster_id),
+            CLUSTER_COUNT=str(cluster_count),
+            METRICS_PORT=str(metrics_port + cluster_id),
+        )
+        self.process = None
+        self.started_at = None
+        self.restarts = 0
+        self.restart_at = None
+
+    def start(self):
+        self.process = subprocess.Popen([sys.executable, "main.py"], env=self.env)
+        self.started_at = time.monotonic()
+        print(f"{Fore.GREEN}[+] {Fore.WHITE}Cluster {Fore.GREEN}{self.cluster_id}{Fore.WHITE} started (pid {self.process.pid}) with shards {Fore.GREEN}{self.shard_ids}{Fore.WHITE}")
+
+    def stop(self):
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+
+    def check(self, now):
+        """Restart the worker if it died, backing off if it keeps dying"""
+        if self.restart_at is not None:
+            if now >= self.restart_at:
+                self.restart_at = None
+                self.start()
+            return
+
+        code = self.process.poll()
+        if code is None:
+            return
+        if now - self.started_at >= HEALTHY_AFTER:
+            self.restarts = 0
+        delay = min(MAX_BACKOFF, 2 ** self.restarts)
+        self.restarts += 1
+        self.restart_at = now + delay
+        print(f"{Fore.RED}[!] {Fore.WHITE}Cluster {Fore.RED}{self.cluster_id}{Fore.WHITE} exited with code {code}, restarting in {delay}s")
+
+
+def main():
+    load_dotenv()
+    token = os.environ.get("TOKEN")
+    if not token:
+        print(f"{Fore.RED}[!] {Fore.WHITE}ERROR: Discord token not found in environment variables!")
+        sys.exit(1)
+
+    recommended, max_concurrency = gateway_info(token)
+    shard_count = int(os.environ.get("SHARD_COUNT") or recommended)
+    clusters = int(os.environ.get("CLUSTERS") or os.cpu_count() or 1)
+    metrics_port = int(os.environ.get("METRICS_PORT", "9108"))
+
+    plan = plan_clusters(shard_count, clusters)
+    print(f"{Fore.CYAN}[*] {Fore.WHITE}Launching {Fore.CYAN}{shard_count}{Fore.WHITE} shards over {Fore.CYAN}{len(plan)}{Fore.WHITE} clusters")
+
+    workers = [Cluster(i, shard_ids, shard_count, len(plan), metrics_port) for i, shard_ids in enumerate(plan)]
+
+    stopping = False
+
+    def shutdown(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGINT, shutdown)
+    signal.signal(signal.SIGTERM, shutdown)
+
+    # Each process identifies its own shards; stagger the clusters so together
+    # they stay within the identify rate limit
+    for worker in workers:
+        if stopping:
+            break
+        worker.start()
+        time.sleep(IDENTIFY_INTERVAL * len(worker.shard_ids) / max_concurrency)
+
+    while not stopping:
+        now = time.monotonic()
+        for worker in workers:
+            worker.check(now)
+        time.sleep(1)
+
+    print(f"{Fore.CYAN}[*] {Fore.WHITE}Stopping clusters...")
+    for worker in workers:
+        worker.stop()
+    for worker in workers:
+        if worker.process:
+            try:
+                worker.process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                worker.process.kill()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,19 @@
+import time
+BOOT_STARTED = time.perf_counter()
 import datetime
 import os
-import time
-os.system("pip uninstall discord.py discord py-cord -y && pip install py-cord")
-time.sleep(3)
-os.system("clear")
 import discord
 import asyncio
 from colorama import Fore, Back, Style
 from discord.ext import commands
 from pymongo import ReturnDocument
-from Cogs.utils.mongo import Users, Servers
+from Cogs.utils.mongo import Users, Servers, known_users, ledger
+from Cogs.utils.game_sessions import sessions
 from Cogs.utils.emojis import emoji
+from Cogs.utils.startup import StartupTimer
+from Cogs.utils.gateway import GATEWAY_PROFILE, client_options
+from Cogs.utils.http_client import http_client
+from Cogs.utils import lazy_imports
 from dotenv import load_dotenv
 
 
@@ -22,6 +25,9 @@ from dotenv import load_dotenv
 1 point = 0.0001442 sol
 """
 
+startup = StartupTimer(BOOT_STARTED)
+startup.mark("imports")
+
 # Load environment variables
 load_dotenv()
 
@@ -34,11 +40,39 @@ if not os.environ.get('TOKEN'):
     print(f"{Fore.YELLOW}[*] {Fore.WHITE}Please make sure you have added a TOKEN secret in the Secrets tab.")
     exit(1)
 
-# Initialize bot with intents
-intents = discord.Intents.all()
-bot = commands.Bot(command_prefix=["!", "."], intents=intents, case_insensitive=True)
+# Initialize bot with the intents and member cache of the configured gateway profile
+gateway_options = client_options()
+
+# Sharding. launcher.py runs one process per cluster and sets these for each;
+# SHARD_COUNT alone ("auto" or a number) runs every shard in this process.
+SHARD_COUNT = os.environ.get("SHARD_COUNT")
+SHARD_IDS = os.environ.get("SHARD_IDS")
+CLUSTER_ID = int(os.environ.get("CLUSTER_ID", "0"))
+
+if SHARD_COUNT:
+    bot = commands.AutoShardedBot(
+        command_prefix=["!", "."],
+        case_insensitive=True,
+        shard_count=None if SHARD_COUNT == "auto" else int(SHARD_COUNT),
+        shard_ids=[int(shard_id) for shard_id in SHARD_IDS.split(",")] if SHARD_IDS else None,
+        **gateway_options
+    )
+else:
+    bot = commands.Bot(command_prefix=["!", "."], case_insensitive=True, **gateway_options)
 bot.remove_command("help")
 
+# One pooled HTTP session for every cog; it lives on the bot's loop, so close it with the bot
+bot.http_client = http_client
+_close_bot = bot.close
+
+
+async def close_bot():
+    await http_client.close()
+    await asyncio.to_thread(ledger.flush)
+    await _close_bot()
+
+bot.close = close_bot
+
 # List of cogs to load
 print("DEBUG: Loading cogs...")
 cogs = [
@@ -52,7 +86,7 @@ cogs = [
     "Cogs.games.race", "Cogs.games.cases",
     "Cogs.games.hilo", "Cogs.games.poker", "Cogs.games.plinko", 
     "Cogs.games.keno", "Cogs.games.blackjack", "Cogs.games.baccarat",
-    "Cogs.games.match", "Cogs.sol_deposit", "Cogs.games.slots", "Cogs.games.build" , "Cogs.referrals", "Cogs.channel_management" , "Cogs.daily", "Cogs.private_threads" , "Cogs.admin_curse"
+    "Cogs.games.match", "Cogs.sol_deposit", "Cogs.games.slots", "Cogs.games.build" , "Cogs.referrals", "Cogs.channel_management" , "Cogs.daily", "Cogs.private_threads" , "Cogs.admin_curse", "Cogs.fairness", "Cogs.sessions", "Cogs.perf"
 ]
 
 @bot.event
@@ -95,8 +129,29 @@ async def on_guild_join(guild):
     except Exception as e:
         print(f"{Fore.RED}[!] {Fore.WHITE}Error registering server: {Fore.RED}{e}")
 
+# Registration tasks started from on_command. asyncio only keeps weak references
+# to tasks, so they are held here until they finish.
+_background_tasks = set()
+
+
+def _background_task_done(task):
+    _background_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        print(f"{Fore.RED}[!] {Fore.WHITE}Background registration failed: {Fore.RED}{task.exception()!r}")
+
+
+@bot.after_invoke
+async def release_game_reservations(ctx):
+    # Games a command reserved but never started don't block the player's next command
+    sessions.drop_reservations(asyncio.current_task())
+
+
 @bot.event
 async def on_command(ctx):
+    # Returning users cost a set lookup, no database round trip
+    if ctx.author.id in known_users:
+        return
+
     # Check if user is blacklisted
     async def bg():
         try:
@@ -112,8 +167,7 @@ async def on_command(ctx):
 
         # Register new user if needed
             db = Users()
-            if not db.fetch_user(ctx.author.id):
-                dump = {
+            dump = {
                 "discord_id": ctx.author.id,
                 "name": ctx.author.name,
                 "points": 0,
@@ -137,8 +191,9 @@ async def on_command(ctx):
                 'level': 1,
                 'rank': 0,
                 'rakeback_tokens': 0
-                }
-                db.register_new_user(dump)
+            }
+            # Idempotent upsert, returns False if the user was already registered
+            if await asyncio.to_thread(db.register_new_user, dump):
                 rn = datetime.datetime.now().strftime("%X")
                 print(f"{Back.CYAN}  {Style.DIM}{ctx.author.id}{Style.RESET_ALL}{Back.RESET}{Fore.CYAN}{Fore.WHITE}    {Fore.LIGHTWHITE_EX}{rn}{Fore.WHITE}    {Style.BRIGHT}{Fore.GREEN}{dump}{Style.RESET_ALL}  {Fore.MAGENTA}new_user{Fore.WHITE}")
                 #print(f"{Fore.GREEN}[+] {Fore.WHITE}New User Registered: {Fore.GREEN}{ctx.author.name} ({ctx.author.id}){Fore.WHITE}")
@@ -158,8 +213,10 @@ async def on_command(ctx):
         except Exception as e:
             #print(f"{Fore.RED}[!] {Fore.WHITE}Error in on_command: {Fore.RED}{e}")
             pass
-    bg_task = asyncio.create_task(bg())
-    await bg_task
+    # Run alongside the command instead of in front of it
+    task = asyncio.create_task(bg())
+    _background_tasks.add(task)
+    task.add_done_callback(_background_task_done)
 
 
 @bot.event
@@ -167,22 +224,19 @@ async def on_ready():
     try:
         print(f"{Fore.GREEN}[+] {Fore.WHITE}Bot is online as {Fore.GREEN}{bot.user.name} ({bot.user.id}){Fore.WHITE}")
         print(f"{Fore.GREEN}[+] {Fore.WHITE}Servers: {Fore.GREEN}{len(bot.guilds)}{Fore.WHITE}")
+        if bot.shard_count:
+            shard_ids = sorted(getattr(bot, "shards", {}) or [bot.shard_id])
+            print(f"{Fore.GREEN}[+] {Fore.WHITE}Cluster {Fore.GREEN}{CLUSTER_ID}{Fore.WHITE} running shards {Fore.GREEN}{shard_ids}{Fore.WHITE} of {Fore.GREEN}{bot.shard_count}{Fore.WHITE}")
+        print(f"{Fore.GREEN}[+] {Fore.WHITE}Gateway profile: {Fore.GREEN}{GATEWAY_PROFILE}{Fore.WHITE} ({len(bot.users)} cached users)")
 
         # Set bot status
         await bot.change_presence(activity=discord.Game(name="!help | BetSync Casino"))
 
-        # Load cogs
-        print(f"{Fore.CYAN}[*] {Fore.WHITE}Loading cogs...")
-        for cog in cogs:
-            try:
-                bot.load_extension(cog)
-                print(f"{Fore.GREEN}[+] {Fore.WHITE}Loaded Cog: {Fore.GREEN}{cog}{Fore.WHITE}")
-            except Exception as e:
-                print(f"{Fore.RED}[-] {Fore.WHITE}Failed to load cog {Fore.RED}{cog}{Fore.WHITE}: {e}")
-
-        print(f"{Fore.GREEN}[+] {Fore.WHITE}Bot initialization complete!")
-        await asyncio.sleep(3)
-        os.system("clear")
+        # on_ready fires again after every reconnect, only report the first boot
+        if startup.phases[-1][0] == "login_to_ready":
+            return
+        startup.mark("login_to_ready")
+
         print("""
 
   ____       _    _____                  _____  ____  
@@ -194,12 +248,44 @@ async def on_ready():
                          __/ |                        
                         |___/                         
                         """)
+        startup.report()
+        lazy_imports.report()
+
+        # Warm the registered-user cache with an id-only projection
+        try:
+            warmed = await asyncio.to_thread(Users().warm_known_users)
+            print(f"{Fore.GREEN}[+] {Fore.WHITE}Cached {Fore.GREEN}{warmed}{Fore.WHITE} registered user ids")
+        except Exception as e:
+            print(f"{Fore.RED}[!] {Fore.WHITE}Error warming user cache: {Fore.RED}{e}")
+
+        # Optionally pull in the deferred crypto/plotting modules now, off the event loop,
+        # so the first deposit doesn't pay for them. Game-only shards leave this off.
+        if lazy_imports.warm_requested():
+            lazy_imports.warm_in_background()
         now = datetime.datetime.now()
         rn = now.strftime("%X")
         print(f"{Back.CYAN}     {Style.DIM}NOHASH{Style.RESET_ALL}{Back.RESET}{Fore.CYAN}{Fore.WHITE}    {Fore.LIGHTWHITE_EX}{rn}{Fore.WHITE}    {Style.BRIGHT}BetsyncDB Initialized{Style.RESET_ALL}")
     except Exception as e:
         print(f"{Fore.RED}[!] {Fore.WHITE}Error in on_ready: {Fore.RED}{e}")
 
+
+def load_cogs():
+    """Load every cog before login so commands are ready as soon as the gateway is"""
+    print(f"{Fore.CYAN}[*] {Fore.WHITE}Loading cogs...")
+    for cog in cogs:
+        started = time.perf_counter()
+        try:
+            bot.load_extension(cog)
+            print(f"{Fore.GREEN}[+] {Fore.WHITE}Loaded Cog: {Fore.GREEN}{cog}{Fore.WHITE}")
+        except Exception as e:
+            print(f"{Fore.RED}[-] {Fore.WHITE}Failed to load cog {Fore.RED}{cog}{Fore.WHITE}: {e}")
+        startup.time_cog(cog, time.perf_counter() - started)
+    print(f"{Fore.GREEN}[+] {Fore.WHITE}Bot initialization complete!")
+
+
+load_cogs()
+startup.mark("cogs")
+
 # Start the bot
 print(f"{Fore.CYAN}[*] {Fore.WHITE}Starting bot...")
 try: